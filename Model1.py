@@ -1,18 +1,16 @@
 from aws_session import (
-    ec2, ec2_client, lambda_client, rds_client,
-    iam, elb_client,route53
+    ec2_client,
+    elb_client, account_shared, iter_items
 )
 from collections import defaultdict
+from fanout import FanOut
+from inventory import get_name_from_tags, InstanceGroups
+from output import emit
+import datasets
+import render
 
 # Utilities
 
-def get_name_from_tags(tags):
-    if tags:
-        for tag in tags:
-            if tag['Key'] == 'Name':
-                return tag['Value']
-    return 'N/A'
-
 def get_internet_gateway_vpcs():
     igws = ec2_client.describe_internet_gateways()
     vpc_with_igw = set()
@@ -41,25 +39,45 @@ def get_route_table_maps():
 
     return subnet_public_map, route_table_map
 
+def get_subnets_in_vpc(vpc_id):
+    return ec2_client.describe_subnets(Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}])['Subnets']
+
 def get_all_lambda_functions():
-    lambdas = []
-    paginator = lambda_client.get_paginator('list_functions')
-    for page in paginator.paginate():
-        lambdas.extend(page['Functions'])
-    return lambdas
+    return datasets.get('lambda_functions')
 
 def get_all_rds_instances_grouped_by_vpc():
-    rds_instances = rds_client.describe_db_instances()['DBInstances']
     vpc_rds_map = defaultdict(list)
-    for db in rds_instances:
+    for db in datasets.items('db_instances'):
         vpc_id = db.get('DBSubnetGroup', {}).get('VpcId')
         if vpc_id:
             vpc_rds_map[vpc_id].append(db)
     return vpc_rds_map
 
-def describe_security_group(sg_id):
-    sg = ec2_client.describe_security_groups(GroupIds=[sg_id])['SecurityGroups'][0]
+def get_security_group_index():
+    """Fetch every security group once and index it by GroupId."""
+    sg_index = {}
+    paginator = ec2_client.get_paginator('describe_security_groups')
+    for page in paginator.paginate():
+        for sg in page['SecurityGroups']:
+            sg_index[sg['GroupId']] = sg
+    return sg_index
+
+def _lookup_security_group(sg_id, sg_index):
+    sg = sg_index.get(sg_id)
+    if sg is None:
+        # not in this account's prefetch (e.g. shared/peered SG) – fetch once and remember it
+        try:
+            sg = ec2_client.describe_security_groups(GroupIds=[sg_id])['SecurityGroups'][0]
+        except Exception:
+            sg = {'GroupId': sg_id, 'GroupName': 'N/A', 'IpPermissions': []}
+        sg_index[sg_id] = sg
+    return sg
+
+def describe_security_group(sg_id, sg_index):
+    sg = _lookup_security_group(sg_id, sg_index)
     print(f"        🔐 Security Group: {sg['GroupName']} ({sg['GroupId']})")
+    if not render.full_detail():
+        return
     for perm in sg['IpPermissions']:
         protocol = perm.get('IpProtocol', 'all')
         from_port = perm.get('FromPort')
@@ -69,14 +87,19 @@ def describe_security_group(sg_id):
         for ip_range in perm.get('IpRanges', []):
             print(f"            ➤ Source CIDR: {ip_range.get('CidrIp')}")
         for sg_source in perm.get('UserIdGroupPairs', []):
-            print(f"            ➤ Source SG: {sg_source.get('GroupId')}")
+            source_id = sg_source.get('GroupId')
+            source_sg = sg_index.get(source_id)
+            source_name = source_sg['GroupName'] if source_sg else sg_source.get('GroupName', 'N/A')
+            print(f"            ➤ Source SG: {source_id} ({source_name})")
         for ipv6_range in perm.get('Ipv6Ranges', []):
             print(f"            ➤ Source IPv6: {ipv6_range.get('CidrIpv6')}")
 
-def get_albs_grouped_by_vpc():
+def get_all_load_balancers():
+    return datasets.get('load_balancers')
+
+def get_albs_grouped_by_vpc(load_balancers):
     vpc_albs_map = defaultdict(list)
-    albs = elb_client.describe_load_balancers()['LoadBalancers']
-    for alb in albs:
+    for alb in load_balancers:
         if alb['Type'] == 'application':
             vpc_albs_map[alb['VpcId']].append(alb)
     return vpc_albs_map
@@ -92,29 +115,51 @@ def _normalize_dns(name:str) -> str:
 
 
 
-def find_route53_records_for_alb_dns(alb_dns_name):
-    """Print Route 53 records (name & type) that alias/CNAME to the given ALB DNS."""
-    target = _normalize_dns(alb_dns_name)
-    zones = route53.list_hosted_zones()['HostedZones']
-
-    for zone in zones:
-        zid = zone['Id'].split('/')[-1]
-        records = route53.list_resource_record_sets(HostedZoneId=zid)['ResourceRecordSets']
-        for rec in records:
+def get_route53_target_index():
+    """Map each normalized alias/CNAME target to the Route 53 records pointing at it."""
+    target_index = defaultdict(list)
+    for entry in datasets.get('hosted_zones')['zones'].values():
+        for rec in entry['records']:
             # Alias A/AAAA
             alias_dns = _normalize_dns(rec.get('AliasTarget', {}).get('DNSName', ''))
-            if alias_dns.endswith(target):
-                print(f"      🔗 Route53 Alias: {rec['Name']} | Type: {rec['Type']}")
-                continue  # found – no need to test CNAME values
+            if alias_dns:
+                target_index[alias_dns].append(('Alias', rec))
+                continue
             # CNAME values (might be multiple)
-            for r in rec.get('ResourceRecords', []):
-                if _normalize_dns(r.get('Value')) .endswith(target):
-                    print(f"      🔗 Route53 CNAME: {rec['Name']} | Type: {rec['Type']}")
-                    break
+            if rec['Type'] == 'CNAME':
+                for r in rec.get('ResourceRecords', []):
+                    target_index[_normalize_dns(r.get('Value'))].append(('CNAME', rec))
+    return target_index
 
-def describe_albs_in_vpc(vpc_id, albs):
-    print(f"\n  🧩 ALBs in this VPC:")
+def find_route53_records_for_alb_dns(alb_dns_name, route53_index):
+    """Print Route 53 records (name & type) that alias/CNAME to the given ALB DNS."""
+    for kind, rec in route53_index.get(_normalize_dns(alb_dns_name), []):
+        print(f"      🔗 Route53 {kind}: {rec['Name']} | Type: {rec['Type']}")
+
+def report_dangling_route53_records(route53_index, load_balancers):
+    """Print records that point at a load balancer in this region which no longer exists."""
+    region_suffix = f".{elb_client.meta.region_name}.elb.amazonaws.com"
+    existing = {_normalize_dns(lb['DNSName']) for lb in load_balancers}
+    dangling = [
+        (target, kind, rec)
+        for target, entries in route53_index.items()
+        if target.endswith(region_suffix) and target not in existing
+        for kind, rec in entries
+    ]
+    if dangling:
+        render.heading("\n⚠️ Route53 Records Pointing to Missing ALBs:")
+        for target, kind, rec in dangling:
+            emit('route53_dangling_record', name=rec['Name'], record_type=rec['Type'], kind=kind, target=target)
+            print(f"  ▶ {rec['Name']} | Type: {rec['Type']} | {kind} ➡ {target}")
+    else:
+        render.heading("\n✅ No Route53 records point to missing ALBs.")
+
+def describe_albs_in_vpc(vpc_id, albs, report):
+    sg_index = report['sg_index']
+    render.heading(f"\n  🧩 ALBs in this VPC:", 2)
     for alb in albs:
+        emit('alb', vpc_id=vpc_id, name=alb['LoadBalancerName'], arn=alb['LoadBalancerArn'],
+             scheme=alb['Scheme'], dns_name=alb['DNSName'], security_groups=alb.get('SecurityGroups', []))
         print(f"    ▶ ALB Name: {alb['LoadBalancerName']}")
         print(f"      ARN: {alb['LoadBalancerArn']}")
         print(f"      Scheme: {alb['Scheme']} (e.g. internet-facing or internal)")
@@ -122,13 +167,13 @@ def describe_albs_in_vpc(vpc_id, albs):
         print(f"      Subnets:[{', '.join(az_subnets)}]")
         print(f"      DNS Name: {alb['DNSName']}")
         # ⇩ NEW – show Route53 records pointing to this ALB
-        find_route53_records_for_alb_dns(alb['DNSName'])
+        find_route53_records_for_alb_dns(alb['DNSName'], report['route53_index'])
         print(f"      Security Groups: {alb.get('SecurityGroups')}")
 
         for sg_id in alb.get('SecurityGroups', []):
-            describe_security_group(sg_id)
+            describe_security_group(sg_id, sg_index)
 
-        listeners = elb_client.describe_listeners(LoadBalancerArn=alb['LoadBalancerArn'])['Listeners']
+        listeners = report['listeners_by_alb'][alb['LoadBalancerArn']]
         for listener in listeners:
             print(f"      🔊 Listener:")
             print(f"        Port: {listener['Port']}")
@@ -141,24 +186,128 @@ def describe_albs_in_vpc(vpc_id, albs):
                     if action['Type'] == 'forward':
                         tg_arn = action['TargetGroupArn']
                         print(f"        Default Target Group ARN: {tg_arn}")
-                        describe_target_group_details(tg_arn)
-
-def describe_vpcs_ec2_lambda_rds():
-    vpcs = ec2_client.describe_vpcs()['Vpcs']
-    igw_vpcs = get_internet_gateway_vpcs()
-    subnet_public_map, route_table_map = get_route_table_maps()
-    all_instances = list(ec2.instances.all())
-    all_lambdas = get_all_lambda_functions()
-    rds_by_vpc = get_all_rds_instances_grouped_by_vpc()
-
-    for vpc in vpcs:
+                        describe_target_group_details(tg_arn, report)
+
+def _forward_target_group_arns(listeners):
+    for listener in listeners:
+        for action in listener.get('DefaultActions', []):
+            if action['Type'] == 'forward':
+                yield action['TargetGroupArn']
+
+def _referenced_sg_ids(instances, lambdas, rds_by_vpc, albs):
+    sg_ids = set()
+    for instance in instances:
+        for interface in instance.interfaces:
+            sg_ids.update(interface.group_ids)
+    for fn in lambdas:
+        sg_ids.update(fn.get('VpcConfig', {}).get('SecurityGroupIds', []))
+    for dbs in rds_by_vpc.values():
+        for db in dbs:
+            sg_ids.update(sg['VpcSecurityGroupId'] for sg in db.get('VpcSecurityGroups', []))
+    for alb in albs:
+        sg_ids.update(alb.get('SecurityGroups', []))
+    return sg_ids
+
+def collect_vpc_report(max_workers=None):
+    """Fetch everything the VPC report needs before anything is printed.
+
+    Independent calls are fanned out to a bounded thread pool in waves:
+    account-wide listings, then per-VPC subnets and per-ALB listeners and
+    target groups, then target health. Targets are resolved from the
+    instance/IP/Lambda indexes built from the already-loaded inventory.
+    """
+    with FanOut(max_workers) as pool:
+        vpcs_f = pool.submit('ec2', lambda: list(iter_items(ec2_client, 'describe_vpcs', 'Vpcs[]')))
+        igw_f = pool.submit('ec2', get_internet_gateway_vpcs)
+        route_tables_f = pool.submit('ec2', get_route_table_maps)
+        instances_f = pool.submit('ec2', datasets.get, 'instances')
+        lambdas_f = pool.submit('lambda', get_all_lambda_functions)
+        rds_f = pool.submit('rds', get_all_rds_instances_grouped_by_vpc)
+        sg_index_f = pool.submit('ec2', get_security_group_index)
+        load_balancers_f = pool.submit('elbv2', get_all_load_balancers)
+        route53_f = pool.submit('route53', account_shared, 'route53_target_index', get_route53_target_index)
+
+        vpcs = vpcs_f.result()
+        subnets_fs = {vpc['VpcId']: pool.submit('ec2', get_subnets_in_vpc, vpc['VpcId']) for vpc in vpcs}
+
+        load_balancers = load_balancers_f.result()
+        albs_by_vpc = get_albs_grouped_by_vpc(load_balancers)
+        alb_arns = [alb['LoadBalancerArn'] for albs in albs_by_vpc.values() for alb in albs]
+        listeners_by_alb = pool.map(
+            'elbv2',
+            lambda arn: elb_client.describe_listeners(LoadBalancerArn=arn)['Listeners'],
+            alb_arns,
+        )
+        target_groups_by_alb = pool.map('elbv2', get_target_groups_for_alb, alb_arns)
+        target_groups = {tg['TargetGroupArn']: tg for tgs in target_groups_by_alb.values() for tg in tgs}
+
+        tg_arns = list(dict.fromkeys(
+            tg_arn for listeners in listeners_by_alb.values() for tg_arn in _forward_target_group_arns(listeners)
+        ))
+        missing_tg_arns = [tg_arn for tg_arn in tg_arns if tg_arn not in target_groups]
+        for start in range(0, len(missing_tg_arns), 20):
+            response = elb_client.describe_target_groups(TargetGroupArns=missing_tg_arns[start:start + 20])
+            target_groups.update((tg['TargetGroupArn'], tg) for tg in response['TargetGroups'])
+        target_health = pool.map(
+            'elbv2',
+            lambda arn: elb_client.describe_target_health(TargetGroupArn=arn)['TargetHealthDescriptions'],
+            tg_arns,
+        )
+
+        instances = instances_f.result()
+        lambdas = lambdas_f.result()
+        rds_by_vpc = rds_f.result()
+        sg_index = sg_index_f.result()
+        albs = [alb for albs in albs_by_vpc.values() for alb in albs]
+        missing_sg_ids = _referenced_sg_ids(instances, lambdas, rds_by_vpc, albs) - sg_index.keys()
+        sg_index.update(pool.map('ec2', lambda sg_id: _lookup_security_group(sg_id, {}), sorted(missing_sg_ids)))
+
+        subnet_public_map, route_table_map = route_tables_f.result()
+        return {
+            'vpcs': vpcs,
+            'igw_vpcs': igw_f.result(),
+            'subnet_public_map': subnet_public_map,
+            'route_table_map': route_table_map,
+            'subnets_by_vpc': {vpc_id: f.result() for vpc_id, f in subnets_fs.items()},
+            'instances': instances,
+            'instance_groups': InstanceGroups(instances),
+            'lambdas': lambdas,
+            'rds_by_vpc': rds_by_vpc,
+            'sg_index': sg_index,
+            'load_balancers': load_balancers,
+            'albs_by_vpc': albs_by_vpc,
+            'route53_index': route53_f.result(),
+            'listeners_by_alb': listeners_by_alb,
+            'target_groups': target_groups,
+            'target_health': target_health,
+            'target_index': build_target_index(instances, lambdas),
+        }
+
+@datasets.dataset('vpc_report')
+def _load_vpc_report():
+    return collect_vpc_report()
+
+@datasets.shared_datasets
+def describe_vpcs_ec2_lambda_rds(max_workers=None):
+    report = datasets.get('vpc_report') if max_workers is None else collect_vpc_report(max_workers)
+    igw_vpcs = report['igw_vpcs']
+    subnet_public_map = report['subnet_public_map']
+    route_table_map = report['route_table_map']
+    instances_by_vpc = report['instance_groups'].by_vpc
+    all_lambdas = report['lambdas']
+    rds_by_vpc = report['rds_by_vpc']
+    sg_index = report['sg_index']
+    albs_by_vpc = report['albs_by_vpc']
+
+    for vpc in report['vpcs']:
         vpc_id = vpc['VpcId']
         vpc_name = get_name_from_tags(vpc.get('Tags', []))
-        print(f"\n🛡️ VPC: {vpc_id} ({vpc_name})")
+        emit('vpc', vpc_id=vpc_id, name=vpc_name, cidr=vpc['CidrBlock'], internet_gateway=vpc_id in igw_vpcs)
+        render.heading(f"\n🛡️ VPC: {vpc_id} ({vpc_name})")
         print(f"  CIDR: {vpc['CidrBlock']}")
         print(f"  Has Internet Gateway: {'✅ Yes' if vpc_id in igw_vpcs else '❌ No'}")
 
-        subnets = ec2_client.describe_subnets(Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}])['Subnets']
+        subnets = report['subnets_by_vpc'][vpc_id]
         for subnet in subnets:
             subnet_id = subnet['SubnetId']
             subnet_name = get_name_from_tags(subnet.get('Tags', []))
@@ -166,8 +315,10 @@ def describe_vpcs_ec2_lambda_rds():
             az = subnet['AvailabilityZone']
             is_public = subnet_public_map.get(subnet_id, False)
             rt = route_table_map.get(subnet_id)
+            emit('subnet', vpc_id=vpc_id, subnet_id=subnet_id, name=subnet_name, cidr=cidr, az=az,
+                 subnet_type='Public' if is_public else 'Private')
 
-            print(f"\n  🌐 Subnet: {subnet_id} ({subnet_name})")
+            render.heading(f"\n  🌐 Subnet: {subnet_id} ({subnet_name})", 2)
             print(f"    CIDR: {cidr}")
             print(f"    AZ: {az}")
             print(f"    Type: {'Public' if is_public else 'Private'}")
@@ -178,28 +329,35 @@ def describe_vpcs_ec2_lambda_rds():
                     target = route.get('GatewayId') or route.get('NatGatewayId') or route.get('TransitGatewayId') or route.get('InstanceId') or 'local'
                     print(f"      - {dest} -> {target}")
 
-        vpc_instances = [i for i in all_instances if any(eni.vpc_id == vpc_id for eni in i.network_interfaces)]
+        vpc_instances = instances_by_vpc.get(vpc_id)
         if vpc_instances:
-            print(f"\n  🖥️ EC2 Instances in this VPC:")
+            render.heading(f"\n  🖥️ EC2 Instances in this VPC:", 2)
             for instance in vpc_instances:
-                name = get_name_from_tags(instance.tags)
-                print(f"    ▶ Instance Name: {name}")
-                print(f"      Instance ID: {instance.id}")
-                print(f"      Public IP: {instance.public_ip_address}")
-                print(f"      Private IP: {instance.private_ip_address}")
-                for interface in instance.network_interfaces:
+                emit('ec2_instance', vpc_id=vpc_id, instance_id=instance.instance_id, name=instance.name,
+                     public_ip=instance.public_ip, private_ip=instance.private_ip,
+                     subnets=[interface.subnet_id for interface in instance.interfaces],
+                     security_groups=[g for interface in instance.interfaces for g in interface.group_ids])
+                print(f"    ▶ Instance Name: {instance.name}")
+                print(f"      Instance ID: {instance.instance_id}")
+                print(f"      Public IP: {instance.public_ip}")
+                print(f"      Private IP: {instance.private_ip}")
+                for interface in instance.interfaces:
                     subnet_id = interface.subnet_id
                     is_public = subnet_public_map.get(subnet_id, False)
                     print(f"      Subnet ID: {subnet_id} | Type: {'Public' if is_public else 'Private'}")
-                    for sg in interface.groups:
-                        describe_security_group(sg['GroupId'])
+                    for sg_id in interface.group_ids:
+                        describe_security_group(sg_id, sg_index)
         else:
             print("  ⚠️ No EC2 instances in this VPC.")
 
         lambda_in_vpc = [fn for fn in all_lambdas if fn.get('VpcConfig', {}).get('VpcId') == vpc_id]
         if lambda_in_vpc:
-            print(f"\n  🌀 Lambda Functions in this VPC:")
+            render.heading(f"\n  🌀 Lambda Functions in this VPC:", 2)
             for fn in lambda_in_vpc:
+                emit('lambda_function', vpc_id=vpc_id, name=fn['FunctionName'], arn=fn['FunctionArn'],
+                     runtime=fn.get('Runtime'), timeout=fn.get('Timeout'),
+                     subnets=fn['VpcConfig'].get('SubnetIds', []),
+                     security_groups=fn['VpcConfig'].get('SecurityGroupIds', []))
                 print(f"    ▶ Lambda Name: {fn['FunctionName']}")
                 print(f"      ARN: {fn['FunctionArn']}")
                 print(f"      Runtime: {fn.get('Runtime')}")
@@ -209,13 +367,16 @@ def describe_vpcs_ec2_lambda_rds():
                 print(f"      Subnet IDs: {subnet_ids}")
                 print(f"      Security Group IDs: {sg_ids}")
                 for sg_id in sg_ids:
-                    describe_security_group(sg_id)
+                    describe_security_group(sg_id, sg_index)
         else:
             print("  ⚠️ No Lambda functions in this VPC.")
 
         if vpc_id in rds_by_vpc:
-            print(f"\n  🗃️ RDS Instances in this VPC:")
+            render.heading(f"\n  🗃️ RDS Instances in this VPC:", 2)
             for db in rds_by_vpc[vpc_id]:
+                emit('rds_instance', vpc_id=vpc_id, db_instance=db['DBInstanceIdentifier'], engine=db['Engine'],
+                     db_class=db['DBInstanceClass'], publicly_accessible=db['PubliclyAccessible'],
+                     security_groups=[sg['VpcSecurityGroupId'] for sg in db.get('VpcSecurityGroups', [])])
                 print(f"    ▶ DB Identifier: {db['DBInstanceIdentifier']}")
                 print(f"      Engine: {db['Engine']}")
                 print(f"      DB Class: {db['DBInstanceClass']}")
@@ -223,14 +384,13 @@ def describe_vpcs_ec2_lambda_rds():
                 print(f"      Subnets: {[s['SubnetIdentifier'] for s in db['DBSubnetGroup']['Subnets']]}")
                 print(f"      Public Access: {'✅ Yes' if db['PubliclyAccessible'] else '❌ No'}")
                 for sg in db.get('VpcSecurityGroups', []):
-                    describe_security_group(sg['VpcSecurityGroupId'])
+                    describe_security_group(sg['VpcSecurityGroupId'], sg_index)
         else:
             print("  ⚠️ No RDS instances in this VPC.")
 
-        albs_by_vpc = get_albs_grouped_by_vpc()
         vpc_albs = albs_by_vpc.get(vpc_id, [])
         if vpc_albs:
-            describe_albs_in_vpc(vpc_id, vpc_albs)
+            describe_albs_in_vpc(vpc_id, vpc_albs, report)
         else:
             print("  ⚠️ No ALBs in this VPC.")
 
@@ -238,43 +398,72 @@ def describe_vpcs_ec2_lambda_rds():
 
     lambda_without_vpc = [fn for fn in all_lambdas if not fn.get('VpcConfig', {}).get('VpcId')]
     if lambda_without_vpc:
-        print("\n📦 Lambda Functions NOT Bound to Any VPC:")
+        render.heading("\n📦 Lambda Functions NOT Bound to Any VPC:")
         for fn in lambda_without_vpc:
+            emit('lambda_function', vpc_id=None, name=fn['FunctionName'], arn=fn['FunctionArn'],
+                 runtime=fn.get('Runtime'), timeout=fn.get('Timeout'), subnets=[], security_groups=[])
             print(f"  ▶ Lambda Name: {fn['FunctionName']}")
             print(f"    ARN: {fn['FunctionArn']}")
             print(f"    Runtime: {fn.get('Runtime')}")
             print(f"    Timeout: {fn.get('Timeout')} sec")
     else:
-        print("\n✅ All Lambda functions are assigned to a VPC.")
+        render.heading("\n✅ All Lambda functions are assigned to a VPC.")
+
+    report_dangling_route53_records(report['route53_index'], report['load_balancers'])
 
 
 import boto3
 
-def describe_target_group_details(tg_arn):
-    tg = elb_client.describe_target_groups(TargetGroupArns=[tg_arn])['TargetGroups'][0]
+def get_target_groups_for_alb(alb_arn):
+    target_groups = []
+    paginator = elb_client.get_paginator('describe_target_groups')
+    for page in paginator.paginate(LoadBalancerArn=alb_arn):
+        target_groups.extend(page['TargetGroups'])
+    return target_groups
+
+def build_target_index(instances, lambdas):
+    """Index ALB target IDs (instance ID, private IP, Lambda ARN) to what they point at."""
+    target_index = {}
+    for instance in instances:
+        entry = ('instance', instance.name, instance.instance_id, instance.private_ip)
+        target_index[instance.instance_id] = entry
+        for interface in instance.interfaces:
+            for address in interface.private_ips:
+                target_index.setdefault(address, entry)
+    for fn in lambdas:
+        target_index[fn['FunctionArn']] = ('lambda', fn['FunctionName'], fn['FunctionArn'], None)
+    return target_index
+
+def describe_target_group_details(tg_arn, report):
+    tg = report['target_groups'][tg_arn]
     print(f"        ➤ Target Group Name: {tg['TargetGroupName']}")
     print(f"          Target Type: {tg['TargetType']}")
-    print(f"          Protocol: {tg['Protocol']} | Port: {tg['Port']}")
-    print(f"          VPC ID: {tg['VpcId']}")
+    print(f"          Protocol: {tg.get('Protocol')} | Port: {tg.get('Port')}")
+    print(f"          VPC ID: {tg.get('VpcId')}")
 
-    targets = elb_client.describe_target_health(TargetGroupArn=tg_arn)['TargetHealthDescriptions']
+    targets = report['target_health'][tg_arn]
     if not targets:
         print(f"          No targets registered.")
     else:
         print(f"          Registered Targets:")
         for target in targets:
             target_id = target['Target']['Id']
-            port = target['Target']['Port']
+            port = target['Target'].get('Port')
             health = target['TargetHealth']['State']
 
-            # Describe the EC2 instance to get its name and IP
-            try:
-                instance = ec2.Instance(target_id)
-                instance_name = get_name_from_tags(instance.tags)
-                private_ip = instance.private_ip_address
-                print(f"            ▶ EC2 Instance: {instance_name} ({target_id})")
+            # resolved from the inventory already loaded for this report
+            kind, name, resource_id, private_ip = report['target_index'].get(target_id, (None, None, None, None))
+            emit('alb_target', target_group=tg['TargetGroupName'], target_id=target_id, port=port,
+                 health=health, resolved_kind=kind, resolved_name=name, resolved_id=resource_id)
+            if kind == 'instance' and target_id == resource_id:
+                print(f"            ▶ EC2 Instance: {name} ({target_id})")
                 print(f"              ➤ Private IP: {private_ip}")
                 print(f"              ➤ Port: {port} | Health: {health}")
-            except Exception as e:
+            elif kind == 'instance':
+                print(f"            ▶ IP Target: {target_id} ➤ EC2 Instance: {name} ({resource_id})")
+                print(f"              ➤ Port: {port} | Health: {health}")
+            elif kind == 'lambda':
+                print(f"            ▶ Lambda Function: {name}")
+                print(f"              ➤ ARN: {target_id} | Health: {health}")
+            else:
                 print(f"            ▶ Target ID: {target_id} | Port: {port} | Health: {health} (⚠️ Not EC2?)")
-
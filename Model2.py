@@ -1,32 +1,61 @@
 # Model2.py
 from aws_session import iam
+from output import emit
+from iam_policy import AccessIndex, ALLOW, DENY, RISK_LOW, compile_policy, load_document
+import datasets
+import render
 import json
 
-def get_policy_detail(policy_arn):
-    try:
-        policy = iam.get_policy(PolicyArn=policy_arn)['Policy']
-        version_id = policy['DefaultVersionId']
-        policy_version = iam.get_policy_version(
-            PolicyArn=policy_arn,
-            VersionId=version_id
-        )['PolicyVersion']
-
-        document = policy_version['Document']
-        statements = document.get("Statement", [])
-        if not isinstance(statements, list):
-            statements = [statements]
-
-        # 🔍 判斷風險等級
-        risk_level = "🟢"
-        for stmt in statements:
-            actions = stmt.get("Action", [])
-            if isinstance(actions, str):
-                actions = [actions]
-            if "*" in actions:
-                risk_level = "🔴"
+@datasets.dataset('iam_authorization')
+def get_authorization_snapshot():
+    """Users, groups, roles and managed policies from one paginated GetAccountAuthorizationDetails walk."""
+    snapshot = {'users': [], 'groups': [], 'roles': [], 'policies': {}}
+    paginator = iam.get_paginator('get_account_authorization_details')
+    for page in paginator.paginate():
+        snapshot['users'].extend(page.get('UserDetailList', []))
+        snapshot['groups'].extend(page.get('GroupDetailList', []))
+        snapshot['roles'].extend(page.get('RoleDetailList', []))
+        for policy in page.get('Policies', []):
+            snapshot['policies'][policy['Arn']] = policy
+    return snapshot
+
+def rate_policy_risk(document):
+    """Risk icon of a policy document from its compiled statements (Deny, NotAction and Resource included)."""
+    return compile_policy(document).risk()
+
+def _policy_detail(arn, version_id, document):
+    compiled = compile_policy(document, (arn, version_id))
+    return compiled.risk(), document, compiled
+
+def build_policy_details(policies):
+    """Parse and risk-score each managed policy's default version once: {arn: (risk, document, compiled)}.
+
+    Documents are compiled once per policy version; the compiled policies are kept
+    for the rest of the session, so a later scan only compiles new versions.
+    """
+    details = {}
+    for arn, policy in policies.items():
+        for version in policy.get('PolicyVersionList', []):
+            if version.get('IsDefaultVersion'):
+                document = load_document(version['Document'])
+                details[arn] = _policy_detail(arn, version['VersionId'], document)
                 break
-            elif any(a.startswith(("iam:*", "s3:*", "ec2:*")) for a in actions):
-                risk_level = "🕀"
+    return details
+
+def get_policy_detail(policy_arn, policy_details):
+    try:
+        if policy_arn not in policy_details:
+            # not in the snapshot (e.g. AWS managed policy the filter skipped) – fetch once
+            policy = iam.get_policy(PolicyArn=policy_arn)['Policy']
+            version_id = policy['DefaultVersionId']
+            policy_version = iam.get_policy_version(
+                PolicyArn=policy_arn,
+                VersionId=version_id
+            )['PolicyVersion']
+            document = load_document(policy_version['Document'])
+            policy_details[policy_arn] = _policy_detail(policy_arn, version_id, document)
+
+        risk_level, document, _ = policy_details[policy_arn]
 
         # 🔨 輸出 policy document
         print(f"{risk_level} Policy Statement:")
@@ -38,50 +67,124 @@ def get_policy_detail(policy_arn):
 def describe_iam_resources():
     print("\n🔐 IAM 資源總覽")
 
+    snapshot = datasets.get('iam_authorization')
+    policy_details = build_policy_details(snapshot['policies'])
+
+    members_by_group = {}
+    for user in snapshot['users']:
+        for group_name in user.get('GroupList', []):
+            members_by_group.setdefault(group_name, []).append(user['UserName'])
+
     # 👤 IAM Users
-    print("\n👤 IAM Users:")
-    users = iam.list_users()['Users']
-    for user in users:
+    render.heading("\n👤 IAM Users:")
+    for user in snapshot['users']:
         user_name = user['UserName']
-        print(f"\n  ▶ User: {user_name}")
+        render.heading(f"\n  ▶ User: {user_name}", 2)
 
-        attached = iam.list_attached_user_policies(UserName=user_name)['AttachedPolicies']
+        attached = user.get('AttachedManagedPolicies', [])
+        emit('iam_user', user=user_name, policies=[p['PolicyName'] for p in attached],
+             groups=user.get('GroupList', []))
         if attached:
             print(f"    🔗 Attached Policies:")
             for policy in attached:
                 print(f"      - {policy['PolicyName']}")
-                get_policy_detail(policy['PolicyArn'])
+                get_policy_detail(policy['PolicyArn'], policy_details)
         else:
             print("    ❌ No direct policies.")
 
-        groups = iam.list_groups_for_user(UserName=user_name)['Groups']
+        groups = user.get('GroupList', [])
         if groups:
             print(f"    👥 Member of Groups:")
-            for g in groups:
-                print(f"      - {g['GroupName']}")
+            for group_name in groups:
+                print(f"      - {group_name}")
         else:
             print("    ❌ Not in any group.")
 
     # 👥 IAM Groups
-    print("\n👥 IAM Groups:")
-    groups = iam.list_groups()['Groups']
-    for group in groups:
+    render.heading("\n👥 IAM Groups:")
+    for group in snapshot['groups']:
         group_name = group['GroupName']
-        print(f"\n  ▶ Group: {group_name}")
-        users = iam.get_group(GroupName=group_name)['Users']
-        print(f"    👤 Users: {[u['UserName'] for u in users]}")
-        policies = iam.list_attached_group_policies(GroupName=group_name)['AttachedPolicies']
+        render.heading(f"\n  ▶ Group: {group_name}", 2)
+        print(f"    👤 Users: {members_by_group.get(group_name, [])}")
+        policies = group.get('AttachedManagedPolicies', [])
+        emit('iam_group', group=group_name, users=members_by_group.get(group_name, []),
+             policies=[p['PolicyName'] for p in policies])
         if policies:
             print(f"    🔗 Attached Policies:")
             for p in policies:
                 print(f"      - {p['PolicyName']}")
-                get_policy_detail(p['PolicyArn'])
+                get_policy_detail(p['PolicyArn'], policy_details)
+        else:
+            print("    ❌ No attached policies.")
+
+    # 🎭 IAM Roles
+    render.heading("\n🎭 IAM Roles:")
+    for role in snapshot['roles']:
+        render.heading(f"\n  ▶ Role: {role['RoleName']}", 2)
+        policies = role.get('AttachedManagedPolicies', [])
+        emit('iam_role', role=role['RoleName'], policies=[p['PolicyName'] for p in policies])
+        if policies:
+            print(f"    🔗 Attached Policies:")
+            for p in policies:
+                print(f"      - {p['PolicyName']}")
+                get_policy_detail(p['PolicyArn'], policy_details)
         else:
             print("    ❌ No attached policies.")
 
     # 🧹 Custom IAM Policies
-    print("\n📄 Custom IAM Policies:")
-    policies = iam.list_policies(Scope='Local')['Policies']
-    for policy in policies:
-        print(f"\n  ▶ Policy Name: {policy['PolicyName']} | ARN: {policy['Arn']}")
-        get_policy_detail(policy['Arn'])
+    render.heading("\n📄 Custom IAM Policies:")
+    for arn, policy in snapshot['policies'].items():
+        if ':iam::aws:policy/' in arn:
+            continue
+        emit('iam_policy', policy=policy['PolicyName'], arn=arn, risk=policy_details.get(arn, (None,))[0])
+        render.heading(f"\n  ▶ Policy Name: {policy['PolicyName']} | ARN: {arn}", 2)
+        get_policy_detail(arn, policy_details)
+
+    index = AccessIndex(snapshot, {arn: detail[2] for arn, detail in policy_details.items()})
+    describe_principal_risks(index)
+    return index
+
+def describe_principal_risks(index):
+    """Users and roles whose combined policies allow every action, a sensitive service or privilege escalation."""
+    render.heading("\n🚨 具高風險權限的使用者/角色:")
+    risky = 0
+    for principal in sorted(index.principals):
+        level, actions = index.principal_risk(principal)
+        if level == RISK_LOW:
+            continue
+        risky += 1
+        emit('iam_principal_risk', principal=principal, risk=level, actions=actions)
+        print(f"  ▶ {level} {principal} | {'全部動作' if actions == ['*'] else ', '.join(actions)}")
+    if not risky:
+        print("  ✅ 無")
+    if index.unresolved:
+        print(f"  ⚠️ 無法取得的 Managed Policy（未納入評估）: {', '.join(sorted(index.unresolved))}")
+
+def _print_access(principal, result):
+    icon = {ALLOW: '✅', DENY: '⛔'}.get(result['decision'], '➖')
+    conditional = '（視條件而定）' if result['conditional'] else ''
+    policies = f" | {', '.join(result['policies'])}" if result['policies'] else ''
+    print(f"  {icon} {principal}: {result['decision']}{conditional}{policies}")
+
+def query_access(index):
+    """Interactive lookups: can a user/role do an action (on a resource), and who can."""
+    while True:
+        text = input("\n🔎 輸入「使用者或角色 動作 [資源 ARN]」，或「? 動作 [資源 ARN]」查詢誰可以執行（直接 Enter 返回）：").strip()
+        if not text:
+            return
+        parts = text.split()
+        if len(parts) < 2:
+            print("❌ 格式錯誤。")
+            continue
+        resource = parts[2] if len(parts) > 2 else '*'
+        if parts[0] == '?':
+            allowed = index.who_can(parts[1], resource)
+            print(f"\n👥 可以在 {resource} 上執行 {parts[1]} 的身分：{len(allowed)} 個")
+            for principal, result in allowed:
+                _print_access(principal, result)
+            continue
+        principal = index.find(parts[0])
+        if principal is None:
+            print("❌ 找不到此使用者或角色。")
+            continue
+        _print_access(principal, index.can(principal, parts[1], resource))
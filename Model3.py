@@ -1,22 +1,84 @@
 # Model3.py
-from aws_session import ec2, ec2_client, lambda_client, rds_client, ses_client, s3
+from aws_session import ses_client, iter_items
+from fanout import FanOut
+from output import emit
+from Model2 import rate_policy_risk
+import datasets
+import render
 import json
 
-def describe_iam_usage():
+# SES batch limits: GetIdentityPolicies takes 20 names, GetIdentityVerificationAttributes 100 identities
+SES_POLICY_BATCH = 20
+SES_VERIFICATION_BATCH = 100
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+def get_identity_policies(identity):
+    """{'policies': {name: parsed document}} for one identity, or {'error': message}."""
+    try:
+        names = ses_client.list_identity_policies(Identity=identity)['PolicyNames']
+        policies = {}
+        for start in range(0, len(names), SES_POLICY_BATCH):
+            response = ses_client.get_identity_policies(Identity=identity, PolicyNames=names[start:start + SES_POLICY_BATCH])
+            policies.update((name, json.loads(document)) for name, document in response['Policies'].items())
+        return {'policies': policies}
+    except Exception as e:
+        return {'error': str(e)}
+
+def get_verification_attributes(identities):
+    return ses_client.get_identity_verification_attributes(Identities=list(identities))['VerificationAttributes']
+
+@datasets.dataset('ses_identities')
+def _load_ses_identities():
+    identities, verification, policies = load_ses_identities()
+    return {'identities': identities, 'verification': verification, 'policies': policies}
+
+def load_ses_identities(max_workers=None):
+    """Every identity with its verification attributes and parsed sending policies, fetched in parallel."""
+    identities = list(iter_items(ses_client, 'list_identities', 'Identities[]'))
+    with FanOut(max_workers) as pool:
+        verification_fs = [
+            pool.submit('ses', get_verification_attributes, identities[start:start + SES_VERIFICATION_BATCH])
+            for start in range(0, len(identities), SES_VERIFICATION_BATCH)
+        ]
+        policies = pool.map('ses', get_identity_policies, identities)
+        verification = {}
+        for future in verification_fs:
+            verification.update(future.result())
+    return identities, verification, policies
+
+def summarize_policy(document):
+    """One line per statement: effect, principals, actions, resources and condition keys."""
+    lines = []
+    for stmt in _as_list(document.get('Statement', [])):
+        principal = stmt.get('Principal', stmt.get('NotPrincipal', '*'))
+        if isinstance(principal, dict):
+            principals = [p for value in principal.values() for p in _as_list(value)]
+        else:
+            principals = _as_list(principal)
+        actions = _as_list(stmt.get('Action', stmt.get('NotAction', [])))
+        resources = _as_list(stmt.get('Resource', stmt.get('NotResource', '*')))
+        conditions = sorted(key for clause in stmt.get('Condition', {}).values() for key in clause)
+        line = f"{stmt.get('Effect', '?')} {', '.join(principals)} ➡ {', '.join(actions)} on {', '.join(resources)}"
+        if conditions:
+            line += f"（條件: {', '.join(conditions)}）"
+        lines.append(line)
+    return lines
+
+@datasets.shared_datasets
+def describe_iam_usage(include_global=True):
     print("\n🧭 IAM Role 使用狀況")
 
     # 🖥️ EC2
-    print("\n🖥️ EC2 Instances 使用的 IAM Role：")
-    for instance in ec2.instances.all():
-        name = "N/A"
-        if instance.tags:
-            for tag in instance.tags:
-                if tag["Key"] == "Name":
-                    name = tag["Value"]
-        instance_id = instance.id
-        profile = instance.iam_instance_profile
-        if profile:
-            profile_arn = profile['Arn']
+    render.heading("\n🖥️ EC2 Instances 使用的 IAM Role：")
+    for instance in datasets.items('instances'):
+        name = instance.name
+        instance_id = instance.instance_id
+        profile_arn = instance.iam_profile_arn
+        emit('ec2_role', instance_id=instance_id, name=name,
+             role=profile_arn.split('/')[-1] if profile_arn else None)
+        if profile_arn:
             role_name = profile_arn.split('/')[-1]
             print(f"  ▶ EC2: {name} ({instance_id})")
             print(f"    🔗 IAM Role: {role_name}")
@@ -26,21 +88,20 @@ def describe_iam_usage():
     print("-" * 60)
 
     # 🌀 Lambda
-    print("🌀 Lambda Functions 使用的 IAM Role：")
-    paginator = lambda_client.get_paginator('list_functions')
-    for page in paginator.paginate():
-        for fn in page['Functions']:
-            fn_name = fn['FunctionName']
-            role_arn = fn.get('Role')
-            print(f"  ▶ Lambda: {fn_name}")
-            print(f"    🔗 IAM Role: {role_arn}")
+    render.heading("🌀 Lambda Functions 使用的 IAM Role：")
+    for fn in datasets.items('lambda_functions'):
+        fn_name = fn['FunctionName']
+        role_arn = fn.get('Role')
+        emit('lambda_role', function=fn_name, role_arn=role_arn)
+        print(f"  ▶ Lambda: {fn_name}")
+        print(f"    🔗 IAM Role: {role_arn}")
     print("-" * 60)
 
     # 🗃️ RDS
-    print("🗃️ RDS 使用 IAM 認證：")
-    dbs = rds_client.describe_db_instances()['DBInstances']
-    for db in dbs:
+    render.heading("🗃️ RDS 使用 IAM 認證：")
+    for db in datasets.items('db_instances'):
         dbid = db['DBInstanceIdentifier']
+        emit('rds_iam_auth', db_instance=dbid, iam_auth=bool(db.get('IAMDatabaseAuthenticationEnabled')))
         if db.get('IAMDatabaseAuthenticationEnabled'):
             print(f"  ▶ RDS: {dbid} ✅ IAM Database Authentication 已啟用")
         else:
@@ -48,36 +109,43 @@ def describe_iam_usage():
     print("-" * 60)
 
     # ✉️ SES
-    print("✉️ SES Identity 使用 IAM 驗證狀況：")
-    identities = ses_client.list_identities()['Identities']
+    render.heading("✉️ SES Identity 使用 IAM 驗證狀況：")
+    ses = datasets.get('ses_identities')
+    identities, verification, identity_policies = ses['identities'], ses['verification'], ses['policies']
     for identity in identities:
-        try:
-            policy_names = ses_client.list_identity_policies(Identity=identity)['PolicyNames']
-            if policy_names:
-                print(f"  ▶ SES Identity: {identity} 使用 IAM Policies 發信")
-                for pname in policy_names:
-                    policy = ses_client.get_identity_policy(Identity=identity, PolicyName=pname)
-                    policy_doc = json.loads(policy['Policy'])
-                    print(f"    📄 Policy: {pname}")
-                    print(json.dumps(policy_doc, indent=4))
-            else:
-                print(f"  ▶ SES Identity: {identity} 未設定 IAM Policy")
-        except Exception as e:
-            print(f"  ▶ SES Identity: {identity} ⚠️ 無法取得 Policy - {e}")
+        status = verification.get(identity, {}).get('VerificationStatus', 'NotStarted')
+        result = identity_policies[identity]
+        if 'error' in result:
+            emit('ses_identity', identity=identity, verification=status, policies=[], error=result['error'])
+            print(f"  ▶ SES Identity: {identity} ({status}) ⚠️ 無法取得 Policy - {result['error']}")
+            continue
+        policies = result['policies']
+        emit('ses_identity', identity=identity, verification=status, policies=sorted(policies), error=None)
+        if policies:
+            print(f"  ▶ SES Identity: {identity} ({status}) 使用 IAM Policies 發信")
+            for pname, document in sorted(policies.items()):
+                print(f"    📄 Policy: {pname} {rate_policy_risk(document)}")
+                for line in summarize_policy(document):
+                    print(f"      - {line}")
+        else:
+            print(f"  ▶ SES Identity: {identity} ({status}) 未設定 IAM Policy")
+
+    if not include_global:
+        return
 
     # 🪣 S3
-    print("🪣 S3 Buckets 使用 IAM Policy：")
-    buckets = s3.list_buckets()['Buckets']
-    for bucket in buckets:
+    render.heading("🪣 S3 Buckets 使用 IAM Policy：")
+    policies = datasets.get('bucket_policies')
+    for bucket in datasets.items('buckets'):
         name = bucket['Name']
-        try:
-            policy_str = s3.get_bucket_policy(Bucket=name)['Policy']
-            policy = json.loads(policy_str)
+        result = policies[name]
+        emit('bucket_policy', bucket=name, has_policy='policy' in result, error=result.get('error'))
+        if 'policy' in result:
             print(f"  ▶ S3 Bucket: {name}")
             print("    📄 Bucket Policy 使用 IAM：")
-            print(json.dumps(policy, indent=4))
-        except s3.exceptions.from_code('NoSuchBucketPolicy'):
+            print(json.dumps(result['policy'], indent=4))
+        elif result.get('missing'):
             print(f"  ▶ S3 Bucket: {name} 沒有 Bucket Policy")
-        except Exception as e:
-            print(f"  ▶ S3 Bucket: {name} ⚠️ 無法取得 Policy - {e}")
+        else:
+            print(f"  ▶ S3 Bucket: {name} ⚠️ 無法取得 Policy - {result['error']}")
     print("-" * 60)
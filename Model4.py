@@ -1,78 +1,260 @@
-from aws_session import s3, s3_resource
+from aws_session import s3, s3_resource, regional_client, S3_SIZE_SOURCE
+from fanout import FanOut
+from output import emit
+import datasets
+import render
+import csv
+import gzip
 import json
-from datetime import datetime, timezone
-from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError, PartialCredentialsError
 
-def list_s3_buckets():
+def get_size_metrics(bucket_names, region):
+    """Latest daily BucketSizeBytes/NumberOfObjects for every bucket in one region.
+
+    BucketSizeBytes is reported per storage class, so all classes are summed.
+    Returns {bucket: {'objects', 'bytes', 'source', 'as_of'}}.
+    """
+    cloudwatch = regional_client('cloudwatch', region)
+    wanted = set(bucket_names)
+    metrics = []
+    paginator = cloudwatch.get_paginator('list_metrics')
+    for metric_name in ('BucketSizeBytes', 'NumberOfObjects'):
+        for page in paginator.paginate(Namespace='AWS/S3', MetricName=metric_name):
+            for metric in page['Metrics']:
+                dims = {d['Name']: d['Value'] for d in metric['Dimensions']}
+                if dims.get('BucketName') in wanted:
+                    metrics.append((dims['BucketName'], metric_name, metric))
+
+    now = datetime.now(timezone.utc)
+    sizes = {}
+    # get_metric_data accepts up to 500 queries per request
+    for start in range(0, len(metrics), 500):
+        batch = metrics[start:start + 500]
+        queries = [
+            {'Id': f"m{i}", 'MetricStat': {'Metric': metric, 'Period': 86400, 'Stat': 'Average'}}
+            for i, (_, _, metric) in enumerate(batch)
+        ]
+        paginator = cloudwatch.get_paginator('get_metric_data')
+        for page in paginator.paginate(MetricDataQueries=queries, StartTime=now - timedelta(days=3), EndTime=now):
+            for result in page['MetricDataResults']:
+                if not result['Values']:
+                    continue
+                bucket, metric_name, _ = batch[int(result['Id'][1:])]
+                # results are newest first
+                value, as_of = result['Values'][0], result['Timestamps'][0]
+                info = sizes.setdefault(bucket, {'objects': None, 'bytes': 0, 'source': 'CloudWatch', 'as_of': as_of})
+                if metric_name == 'NumberOfObjects':
+                    info['objects'] = int(value)
+                else:
+                    info['bytes'] += int(value)
+                info['as_of'] = max(info['as_of'], as_of)
+    return sizes
+
+_INVENTORY_RUN = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}-\d{2}Z/$')
+
+def get_inventory_size(name, region=None):
+    """Sum object count/size from the newest CSV S3 Inventory report, if one is configured."""
+    # inventory reports are delivered to a bucket in the source bucket's region
+    client = regional_client('s3', region) if region else s3
+    configs = client.list_bucket_inventory_configurations(Bucket=name).get('InventoryConfigurationList', [])
+    for config in configs:
+        dest = config['Destination']['S3BucketDestination']
+        if not config.get('IsEnabled') or dest.get('Format') != 'CSV':
+            continue
+        dest_bucket = dest['Bucket'].split(':::')[-1]
+        base = '/'.join(p for p in (dest.get('Prefix', '').strip('/'), name, config['Id']) if p) + '/'
+
+        runs = []
+        for page in client.get_paginator('list_objects_v2').paginate(Bucket=dest_bucket, Prefix=base, Delimiter='/'):
+            runs.extend(p['Prefix'] for p in page.get('CommonPrefixes', []) if _INVENTORY_RUN.search(p['Prefix']))
+        if not runs:
+            continue
+
+        manifest = json.loads(client.get_object(Bucket=dest_bucket, Key=max(runs) + 'manifest.json')['Body'].read())
+        schema = [field.strip() for field in manifest['fileSchema'].split(',')]
+        size_col = schema.index('Size') if 'Size' in schema else None
+        latest_col = schema.index('IsLatest') if 'IsLatest' in schema else None
+        marker_col = schema.index('IsDeleteMarker') if 'IsDeleteMarker' in schema else None
+
+        total_objects = 0
+        total_size = 0
+        for data_file in manifest['files']:
+            body = client.get_object(Bucket=dest_bucket, Key=data_file['key'])['Body']
+            with gzip.open(body, 'rt', newline='') as rows:
+                for row in csv.reader(rows):
+                    if latest_col is not None and row[latest_col] != 'true':
+                        continue
+                    if marker_col is not None and row[marker_col] == 'true':
+                        continue
+                    total_objects += 1
+                    if size_col is not None and row[size_col]:
+                        total_size += int(row[size_col])
+        as_of = datetime.fromtimestamp(int(manifest['creationTimestamp']) / 1000, timezone.utc)
+        return {'objects': total_objects, 'bytes': total_size, 'source': 'S3 Inventory', 'as_of': as_of}
+    return None
+
+def get_listed_size(name):
+    """Walk every object in the bucket (slow: one LIST request per 1,000 objects)."""
+    total_size = 0
+    total_objects = 0
+    bucket_obj = s3_resource.Bucket(name)
+    for obj in bucket_obj.objects.all():
+        total_objects += 1
+        total_size += obj.size
+    return {'objects': total_objects, 'bytes': total_size, 'source': '逐一列舉', 'as_of': datetime.now(timezone.utc)}
+
+def get_bucket_sizes(bucket_regions, size_source):
+    """Size every bucket using the cheapest available source; missing buckets are left out."""
+    sizes = {}
+    if size_source == 'list':
+        return {name: get_listed_size(name) for name in bucket_regions}
+
+    if size_source in ('auto', 'metrics'):
+        by_region = defaultdict(list)
+        for name, region in bucket_regions.items():
+            if region:
+                by_region[region].append(name)
+        for region, names in by_region.items():
+            try:
+                sizes.update(get_size_metrics(names, region))
+            except (ClientError, BotoCoreError):
+                pass
+
+    if size_source in ('auto', 'inventory'):
+        pending = [name for name in bucket_regions if name not in sizes or sizes[name]['objects'] is None]
+        with FanOut() as pool:
+            inventories = pool.map('s3', lambda name: _try_inventory_size(name, bucket_regions[name]), pending)
+        sizes.update((name, inventory) for name, inventory in inventories.items() if inventory)
+    return sizes
+
+def _try_inventory_size(name, region):
+    try:
+        return get_inventory_size(name, region)
+    except (ClientError, BotoCoreError):
+        return None
+
+def _describe_size_source(info):
+    age_days = (datetime.now(timezone.utc) - info['as_of']).days
+    return f"來源: {info['source']}，資料時間 {info['as_of'].strftime('%Y-%m-%d')}（{age_days} 天前）"
+
+def probe_bucket(name, region):
+    """Fetch a bucket's public status, encryption and logging through its own region's client."""
+    client = regional_client('s3', region) if region else s3
+    record = {}
+
+    try:
+        block = client.get_bucket_policy_status(Bucket=name)
+        record['is_public'] = block.get('PolicyStatus', {}).get('IsPublic', False)
+    except (ClientError, BotoCoreError):
+        record['is_public'] = None
+
+    try:
+        enc = client.get_bucket_encryption(Bucket=name)
+        rules = enc['ServerSideEncryptionConfiguration']['Rules']
+        record['encryption'] = [rule['ApplyServerSideEncryptionByDefault']['SSEAlgorithm'] for rule in rules]
+    except (ClientError, BotoCoreError):
+        record['encryption'] = None
+
+    try:
+        logging = client.get_bucket_logging(Bucket=name)
+        record['logging'] = logging['LoggingEnabled']['TargetBucket'] if logging.get('LoggingEnabled') else ''
+    except Exception:
+        record['logging'] = None
+    return record
+
+@datasets.dataset('bucket_settings')
+def _load_bucket_settings():
+    bucket_regions = datasets.get('bucket_regions')
+    with FanOut() as pool:
+        return pool.map('s3', lambda name: probe_bucket(name, bucket_regions[name]), list(bucket_regions))
+
+@datasets.dataset('bucket_sizes')
+def _load_bucket_sizes():
+    return get_bucket_sizes(datasets.get('bucket_regions'), S3_SIZE_SOURCE)
+
+@datasets.shared_datasets
+def list_s3_buckets(size_source=None, max_workers=None):
+    size_source = size_source or S3_SIZE_SOURCE
     try:
-        buckets = s3.list_buckets()['Buckets']
+        # bucket list, regions and policies are shared with the IAM usage report
+        buckets = datasets.get('buckets')
+        bucket_regions = datasets.get('bucket_regions')
+        policies = datasets.get('bucket_policies')
+        with FanOut(max_workers) as pool:
+            # settings and sizes load side by side; later runs in the session read them from the store
+            records_f = pool.submit('s3', datasets.get, 'bucket_settings')
+            if size_source == S3_SIZE_SOURCE:
+                sizes = datasets.get('bucket_sizes')
+            else:
+                sizes = get_bucket_sizes(bucket_regions, size_source)
+            records = records_f.result()
 
         print("🪣 S3 Bucket 詳細資訊：")
         for bucket in buckets:
             name = bucket['Name']
+            record = records[name]
+            policy = policies[name]
             created = bucket['CreationDate']
             created_days = (datetime.now(timezone.utc) - created).days
 
-            print(f"\n📦 Bucket: {name}")
+            size = sizes.get(name)
+            emit('s3_bucket', bucket=name, created=created.isoformat(), region=bucket_regions[name],
+                 objects=size['objects'] if size else None, bytes=size['bytes'] if size else None,
+                 size_source=size['source'] if size else None, is_public=record['is_public'],
+                 has_policy='policy' in policy, encryption=record['encryption'] or [], logging=record['logging'])
+
+            render.heading(f"\n📦 Bucket: {name}")
             print(f"  📅 建立時間: {created.strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"  🕒 建立至今: {created_days} 天")
 
             # 區域資訊
-            try:
-                region = s3.get_bucket_location(Bucket=name).get('LocationConstraint') or "us-east-1"
+            region = bucket_regions[name]
+            if region:
                 print(f"  🌍 地區: {region}")
-            except:
+            else:
                 print("  🌍 地區: 無法取得")
 
-            # 計算檔案數量和總容量
-            total_size = 0
-            total_objects = 0
-            bucket_obj = s3_resource.Bucket(name)
-            for obj in bucket_obj.objects.all():
-                total_objects += 1
-                total_size += obj.size
-            print(f"  📦 物件總數: {total_objects}")
-            print(f"  📁 總大小: {total_size / 1024 / 1024:.2f} MB")
+            # 檔案數量和總容量（CloudWatch 每日指標 / S3 Inventory / 逐一列舉）
+            if size:
+                objects = size['objects'] if size['objects'] is not None else '無法取得'
+                print(f"  📦 物件總數: {objects}")
+                print(f"  📁 總大小: {size['bytes'] / 1024 / 1024:.2f} MB")
+                print(f"  🧮 {_describe_size_source(size)}")
+            else:
+                print("  📦 物件總數 / 📁 總大小: 無可用的指標或 Inventory（設定 S3_SIZE_SOURCE=list 可逐一列舉）")
 
             # 公開權限
-            try:
-                block = s3.get_bucket_policy_status(Bucket=name)
-                is_public = block.get('PolicyStatus', {}).get('IsPublic', False)
-                print(f"  🔒 公開狀態: {'❌ 私有' if not is_public else '⚠️ 公開'}")
-            except ClientError:
+            if record['is_public'] is None:
                 print("  🔒 公開狀態: 無法檢查")
+            else:
+                print(f"  🔒 公開狀態: {'❌ 私有' if not record['is_public'] else '⚠️ 公開'}")
 
             # IAM Policy
-            try:
-                policy = s3.get_bucket_policy(Bucket=name)
+            if 'policy' in policy:
                 print("  📜 IAM Policy:")
-                print(json.dumps(json.loads(policy['Policy']), indent=4))
-            except ClientError as e:
-                if e.response['Error']['Code'] == 'NoSuchBucketPolicy':
-                    print("  📜 IAM Policy: 無")
-                else:
-                    print("  📜 IAM Policy: 無法取得")
+                print(json.dumps(policy['policy'], indent=4))
+            elif policy.get('missing'):
+                print("  📜 IAM Policy: 無")
+            else:
+                print("  📜 IAM Policy: 無法取得")
 
             # Server Side Encryption
-            try:
-                enc = s3.get_bucket_encryption(Bucket=name)
-                rules = enc['ServerSideEncryptionConfiguration']['Rules']
+            if record['encryption'] is not None:
                 print("  🛡️ 加密設定:")
-                for rule in rules:
-                    algo = rule['ApplyServerSideEncryptionByDefault']['SSEAlgorithm']
+                for algo in record['encryption']:
                     print(f"    ➤ 加密方式: {algo}")
-            except ClientError:
+            else:
                 print("  🛡️ 加密設定: 未啟用")
 
             # Logging
-            try:
-                logging = s3.get_bucket_logging(Bucket=name)
-                if logging.get('LoggingEnabled'):
-                    target = logging['LoggingEnabled']['TargetBucket']
-                    print(f"  📝 Logging 啟用 → 記錄到: {target}")
-                else:
-                    print("  📝 Logging: 未啟用")
-            except Exception:
+            if record['logging']:
+                print(f"  📝 Logging 啟用 → 記錄到: {record['logging']}")
+            elif record['logging'] == '':
+                print("  📝 Logging: 未啟用")
+            else:
                 print("  📝 Logging: 無法取得")
 
     except NoCredentialsError:
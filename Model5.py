@@ -1,57 +1,138 @@
 # Model5.py
-from aws_session import route53, cloudfront, acm
+from aws_session import ACM_EXPIRY_DAYS
 from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from output import emit
+import datasets
+import render
 
-def describe_route53_acm_cloudfront():
-    print("\n📘 Route53 Hosted Zones & Records:")
-    hosted_zones = route53.list_hosted_zones()['HostedZones']
+def describe_route53_acm_cloudfront(include_global=True):
+    if include_global:
+        describe_route53_zones()
+        describe_cloudfront_distributions()
+    describe_acm_certificates()
 
-    for zone in sorted(hosted_zones, key=lambda z: z['Name']):
-        zone_id = zone['Id'].split('/')[-1]
-        zone_name = zone['Name']
-        print(f"\n🔹 Hosted Zone: {zone_name} (ID: {zone_id})")
+def describe_route53_zones():
+    render.heading("\n📘 Route53 Hosted Zones & Records:")
+    hosted = datasets.get('hosted_zones')
+
+    for zone_id, entry in sorted(hosted['zones'].items(), key=lambda item: item[1]['zone']['Name']):
+        zone_name = entry['zone']['Name']
+        render.heading(f"\n🔹 Hosted Zone: {zone_name} (ID: {zone_id})", 2)
 
         records_by_type = defaultdict(list)
-        records = route53.list_resource_record_sets(HostedZoneId=zone_id)['ResourceRecordSets']
-        for record in records:
+        for record in entry['records']:
             records_by_type[record['Type']].append(record)
 
+        detailed = render.full_detail()
         for record_type in sorted(records_by_type.keys()):
-            print(f"  📄 {record_type} Records:")
-            for record in records_by_type[record_type]:
+            records = records_by_type[record_type]
+            print(f"  📄 {record_type} Records:" if detailed else f"  📄 {record_type} Records: {len(records)} 筆")
+            for record in records:
                 name = record['Name']
-                value = (
-                    record.get('AliasTarget', {}).get('DNSName') or
-                    (record['ResourceRecords'][0]['Value'] if 'ResourceRecords' in record else 'N/A')
-                )
-                print(f"    ▶ {name} ➡ {value}")
+                value = _record_value(record)
+                emit('route53_record', zone=zone_name, zone_id=zone_id, name=name, record_type=record_type, value=value)
+                if detailed:
+                    print(f"    ▶ {name} ➡ {value}")
 
-    print("\n🚀 CloudFront Distributions:")
-    dists = cloudfront.list_distributions().get('DistributionList', {}).get('Items', [])
-    for dist in dists:
+    describe_route53_changes(hosted)
+
+def _record_value(record):
+    return (
+        record.get('AliasTarget', {}).get('DNSName') or
+        (record['ResourceRecords'][0]['Value'] if 'ResourceRecords' in record else 'N/A')
+    )
+
+def describe_route53_changes(hosted, limit=10):
+    """Summarize what changed since the previous scan (zones served from the snapshot didn't change)."""
+    entries = sorted(hosted['zones'].values(), key=lambda entry: entry['zone']['Name'])
+    sources = defaultdict(int)
+    for entry in entries:
+        sources[entry['source']] += 1
+    render.heading(f"\n🔄 Route53 自上次掃描以來的變更（重新列舉 {sources['fetched'] + sources['new']} 個 Zone，"
+          f"沿用快照 {sources['snapshot']} 個）:")
+
+    if entries and sources['new'] == len(entries) and not hosted['removed']:
+        print("  ℹ️ 首次掃描，已建立快照")
+        return
+
+    changed = False
+    for entry in entries:
+        if entry['source'] == 'new':
+            changed = True
+            print(f"  ➕ 新增 Zone: {entry['zone']['Name']}")
+    for name in sorted(hosted['removed']):
+        changed = True
+        print(f"  ➖ 移除 Zone: {name}")
+    for entry in entries:
+        changes = entry['changes']
+        if not changes or not any(changes.values()):
+            continue
+        changed = True
+        zone_name = entry['zone']['Name']
+        print(f"  🔹 {zone_name}: 新增 {len(changes['added'])}，移除 {len(changes['removed'])}，修改 {len(changes['modified'])}")
+        for mark, kind in (('+', 'added'), ('-', 'removed'), ('~', 'modified')):
+            for i, record in enumerate(changes[kind]):
+                emit('route53_change', zone=zone_name, change=kind, name=record['Name'],
+                     record_type=record['Type'], value=_record_value(record))
+                if i < limit:
+                    print(f"    {mark} {record['Name']} {record['Type']} ➡ {_record_value(record)}")
+            if len(changes[kind]) > limit:
+                print(f"    … 另有 {len(changes[kind]) - limit} 筆")
+    if not changed:
+        print("  ✅ 沒有變更")
+
+def describe_cloudfront_distributions():
+    render.heading("\n🚀 CloudFront Distributions:")
+    for dist in datasets.items('distributions'):
         dist_id = dist['Id']
         domain_name = dist['DomainName']
         aliases = dist.get('Aliases', {}).get('Items', [])
         cert_arn = dist.get('ViewerCertificate', {}).get('ACMCertificateArn', '無')
         origin_domain = dist['Origins']['Items'][0]['DomainName']
+        emit('cloudfront_distribution', distribution_id=dist_id, domain=domain_name, origin=origin_domain,
+             aliases=aliases, certificate_arn=cert_arn)
 
-        print(f"\n🔹 Distribution ID: {dist_id}")
+        render.heading(f"\n🔹 Distribution ID: {dist_id}", 2)
         print(f"  🌐 CloudFront Domain: {domain_name}")
         print(f"  🎯 Origin: {origin_domain}")
         print(f"  🧾 Aliases (CNAMEs): {aliases if aliases else '無'}")
         print(f"  🔐 ACM Certificate ARN: {cert_arn}")
 
-    print("\n📜 ACM Certificates:")
-    certs = acm.list_certificates(CertificateStatuses=['ISSUED'])['CertificateSummaryList']
-    for cert in certs:
-        cert_arn = cert['CertificateArn']
-        cert_detail = acm.describe_certificate(CertificateArn=cert_arn)['Certificate']
-        domains = cert_detail['SubjectAlternativeNames']
+def describe_acm_certificates(expiry_days=ACM_EXPIRY_DAYS):
+    render.heading("\n📜 ACM Certificates:")
+    for cert_arn, cert_detail in datasets.items('certificates'):
+        domains = cert_detail.get('SubjectAlternativeNames', [cert_detail.get('DomainName')])
         in_use = cert_detail.get('InUseBy', [])
-        print(f"\n🔹 Certificate ARN: {cert_arn}")
+        status = cert_detail.get('Status')
+        not_after = cert_detail.get('NotAfter')
+        emit('acm_certificate', arn=cert_arn, domains=domains, in_use_by=in_use, status=status,
+             not_after=not_after.isoformat() if not_after else None)
+        render.heading(f"\n🔹 Certificate ARN: {cert_arn}", 2)
         print(f"  🌐 Domains: {domains}")
+        print(f"  📌 Status: {status} | 到期: {not_after:%Y-%m-%d}" if not_after else f"  📌 Status: {status}")
         print(f"  🛠️ In Use By: {in_use if in_use else '未綁定服務'}")
 
+    describe_expiring_certificates(list(datasets.get('certificates').values()), expiry_days)
+
+def describe_expiring_certificates(certificates, days):
+    """Issued certificates whose NotAfter falls within `days`, soonest first."""
+    now = datetime.now(timezone.utc)
+    cutoff = now + timedelta(days=days)
+    expiring = sorted(
+        (cert for cert in certificates
+         if cert.get('Status') == 'ISSUED' and cert.get('NotAfter') and cert['NotAfter'] <= cutoff),
+        key=lambda cert: cert['NotAfter'],
+    )
+    render.heading(f"\n⏰ {days} 天內到期的憑證：{len(expiring)} 張")
+    for cert in expiring:
+        left = (cert['NotAfter'] - now).days
+        renewal = cert.get('RenewalEligibility', 'N/A')
+        in_use = '使用中' if cert.get('InUseBy') else '未綁定'
+        emit('acm_expiring', arn=cert['CertificateArn'], domain=cert.get('DomainName'),
+             not_after=cert['NotAfter'].isoformat(), days_left=left, renewal_eligibility=renewal,
+             in_use=bool(cert.get('InUseBy')))
+        print(f"  ⚠️ {cert.get('DomainName')} | 剩 {left} 天（{cert['NotAfter']:%Y-%m-%d}）| 自動續約: {renewal} | {in_use}")
 
 '''
 import os
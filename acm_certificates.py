@@ -0,0 +1,64 @@
+# acm_certificates.py
+from datetime import datetime, timedelta, timezone
+from aws_session import acm, iter_items, response_cache
+from fanout import FanOut
+
+# cached certificate details expire this long before NotAfter, so the status flip is seen
+CERT_CACHE_MARGIN = timedelta(days=1)
+
+# latest ListCertificates summary per ARN; the detail cache is checked against it
+_listed_certificates = {}
+
+def _model_enum(client, shape):
+    return client.meta.service_model.shape_for(shape).enum
+
+def list_certificates():
+    """Certificate summaries of every status and key type (the API defaults to issued-ish RSA only)."""
+    summaries = list(iter_items(
+        acm, 'list_certificates', 'CertificateSummaryList[]',
+        CertificateStatuses=_model_enum(acm, 'CertificateStatus'),
+        Includes={'keyTypes': _model_enum(acm, 'KeyAlgorithm')},
+    ))
+    _listed_certificates.update((cert['CertificateArn'], cert) for cert in summaries)
+    return summaries
+
+def _certificate_cache_valid(params, body, stored_at):
+    """A cached DescribeCertificate stays valid until shortly before an issued certificate's
+    NotAfter, or until the listing shows a different status, NotAfter (renewal) or in-use flag."""
+    cert = body.get('Certificate', {})
+    not_after = cert.get('NotAfter')
+    if cert.get('Status') == 'ISSUED' and not_after and datetime.now(timezone.utc) >= not_after - CERT_CACHE_MARGIN:
+        return False
+    summary = _listed_certificates.get(params.get('CertificateArn'))
+    if summary is None:
+        return True
+    in_use = bool(cert.get('InUseBy'))
+    return (summary.get('Status') == cert.get('Status')
+            and summary.get('NotAfter', not_after) == not_after
+            and summary.get('InUse', in_use) == in_use)
+
+response_cache.add_validator('acm', 'DescribeCertificate', _certificate_cache_valid)
+
+def describe_certificate(cert_arn):
+    try:
+        return acm.describe_certificate(CertificateArn=cert_arn)['Certificate']
+    except Exception as e:
+        # deleted between listing and describing
+        print(f"⚠️ 無法取得憑證 {cert_arn}: {e}")
+        return None
+
+def iter_certificates(max_workers=None):
+    """(arn, DescribeCertificate detail) for every listed certificate, fetched in parallel and
+    yielded in listing order as soon as each one is in."""
+    summaries = list_certificates()
+    with FanOut(max_workers) as pool:
+        futures = [(cert['CertificateArn'], pool.submit('acm', describe_certificate, cert['CertificateArn']))
+                   for cert in summaries]
+        for arn, future in futures:
+            detail = future.result()
+            if detail is not None:
+                yield arn, detail
+
+def load_certificates(max_workers=None):
+    """{arn: DescribeCertificate detail} for every listed certificate, fetched in parallel."""
+    return dict(iter_certificates(max_workers))
@@ -1,16 +1,28 @@
 # aws_session.py
 import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 import boto3
+from botocore.config import Config
 from dotenv import load_dotenv
+from response_cache import ResponseCache
+from throttle import RequestScheduler
+from profiler import CallProfiler
 from pathlib import Path
 import sys
 import traceback
 
+def _pause_before_exit():
+    # 雙擊 exe 時保留視窗讓使用者看到錯誤；cron / 批次模式（無 TTY）直接結束
+    if sys.stdin and sys.stdin.isatty():
+        input("🔚 按下 Enter 結束")
+
 # ✅ 載入 .env（支援 exe）
 env_path = Path(__file__).parent / ".env"
 if not env_path.exists():
     print("❌ 找不到 .env 檔案，請確認它與程式在同一資料夾")
-    input("🔚 按下 Enter 結束")
+    _pause_before_exit()
     sys.exit(1)
 
 load_dotenv(dotenv_path=env_path)
@@ -27,9 +39,219 @@ if not AWS_REGION: missing.append("AWS_REGION")
 
 if missing:
     print(f"❌ 缺少以下 .env 設定：{', '.join(missing)}")
-    input("🔚 按下 Enter 結束")
+    _pause_before_exit()
     sys.exit(1)
 
+# ✅ 併發設定（可選，於 .env 覆寫）
+#    MAX_WORKERS=16
+#    SERVICE_CONCURRENCY=ec2=8,elbv2=8,route53=2
+def _parse_service_caps(value):
+    caps = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            service, limit = item.split('=', 1)
+            caps[service.strip()] = max(1, int(limit))
+    return caps
+
+MAX_WORKERS = max(1, int(os.getenv("MAX_WORKERS", "16")))
+SERVICE_CONCURRENCY = _parse_service_caps(os.getenv("SERVICE_CONCURRENCY", "ec2=8,elbv2=8,route53=2"))
+
+# ✅ 多區域/多帳號掃描設定（可選）
+#    SCAN_REGIONS=us-east-1,ap-northeast-1
+#    SCAN_ACCOUNTS=default,arn:aws:iam::123456789012:role/ReadOnly
+#    SCAN_EXECUTOR=thread   (或 process)
+def _parse_list(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+SCAN_REGIONS = _parse_list(os.getenv("SCAN_REGIONS")) or [AWS_REGION]
+SCAN_ACCOUNTS = _parse_list(os.getenv("SCAN_ACCOUNTS")) or ["default"]
+SCAN_EXECUTOR = os.getenv("SCAN_EXECUTOR", "thread")
+
+# ✅ ACM：列出 N 天內到期的憑證
+ACM_EXPIRY_DAYS = int(os.getenv("ACM_EXPIRY_DAYS", "30"))
+
+# ✅ 安全群組暴露分析預設檢查的 Port（選單 12）
+SG_EXPOSURE_PORTS = [int(port) for port in _parse_list(os.getenv("SG_EXPOSURE_PORTS", "22,3389,5432"))]
+
+# ✅ S3 容量來源：auto（CloudWatch → Inventory）、metrics、inventory、list（逐一列舉物件，最慢）
+S3_SIZE_SOURCE = os.getenv("S3_SIZE_SOURCE", "auto")
+
+# ✅ 報表輸出：詳細程度 full / summary（略過 SG 規則與 DNS 記錄明細）/ quiet（只列標題）；REPORT_PAGER=1 使用內建分頁
+REPORT_DETAIL = os.getenv("REPORT_DETAIL", "full")
+REPORT_PAGER = os.getenv("REPORT_PAGER", "") == "1"
+
+# ✅ 本機回應快取（SQLite，放在 .env 旁邊）；TTL 單位為秒，0 代表不快取
+#    CACHE_TTLS=default=300,iam=3600,route53=1800,acm=3600,acm.DescribeCertificate=604800,cloudfront=1800
+#    CACHE_REFRESH=1   略過快取讀取（仍會寫入最新結果）
+#    acm.DescribeCertificate 這類「服務.操作」可單獨設定 TTL；憑證明細在到期前、或清單顯示狀態/使用中變動時會提早失效
+def _parse_ttls(value):
+    ttls = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            service, ttl = item.split('=', 1)
+            ttls[service.strip()] = max(0, int(ttl))
+    return ttls
+
+CACHE_PATH = Path(os.getenv("CACHE_PATH") or env_path.parent / ".aws_cache.sqlite")
+CACHE_TTLS = _parse_ttls(os.getenv("CACHE_TTLS", "default=300,iam=3600,route53=1800,acm=3600,acm.DescribeCertificate=604800,cloudfront=1800"))
+response_cache = ResponseCache(CACHE_PATH, CACHE_TTLS, default_ttl=CACHE_TTLS.pop('default', 0))
+response_cache.force_refresh = os.getenv("CACHE_REFRESH", "") == "1"
+
+# ✅ 儀表板（python main.py serve）：預設只在本機監聽；要讓同事連線請設 SERVE_HOST=0.0.0.0（無登入驗證）
+#    SERVE_REFRESH=default=900,iam_authorization=3600   各資料集在背景重新整理的間隔（秒）
+SERVE_HOST = os.getenv("SERVE_HOST", "127.0.0.1")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8000"))
+SERVE_REFRESH = _parse_ttls(os.getenv("SERVE_REFRESH", "default=900,iam_authorization=3600,certificates=3600,bucket_sizes=21600"))
+
+# ✅ Route53 增量更新：記住每個 Hosted Zone 的記錄數與 SOA serial，未變動的 Zone 直接讀本機快照
+#    ROUTE53_SNAPSHOT_MAX_AGE=86400   快照最長保留秒數，超過就重新列舉
+#    ROUTE53_SOA_CHECK=0              只比對記錄數（省下每個 Zone 一次 SOA 查詢）
+ROUTE53_SNAPSHOT_PATH = Path(os.getenv("ROUTE53_SNAPSHOT_PATH") or env_path.parent / ".route53_snapshot.sqlite")
+ROUTE53_SNAPSHOT_MAX_AGE = int(os.getenv("ROUTE53_SNAPSHOT_MAX_AGE", "86400"))
+ROUTE53_SOA_CHECK = os.getenv("ROUTE53_SOA_CHECK", "1") == "1"
+
+# ✅ 請求排程：每個帳號/服務/區域一個速率（次/秒），遇到節流降為 70%、排隊時逐步調升（AIMD）
+#    REQUEST_RATES=default=20,iam=10,route53=4,cloudfront=5,acm=10,sts=10
+#    MAX_REQUEST_RATE=100   速率上限
+#    RETRY_MODE=standard    botocore 重試模式（standard / adaptive / legacy），含指數退避
+#    RETRY_MAX_ATTEMPTS=10
+REQUEST_RATES = _parse_service_caps(os.getenv("REQUEST_RATES", "default=20,iam=10,route53=4,cloudfront=5,acm=10,sts=10"))
+request_scheduler = RequestScheduler(
+    REQUEST_RATES,
+    default_rate=REQUEST_RATES.pop('default', 20),
+    max_rate=int(os.getenv("MAX_REQUEST_RATE", "100")),
+)
+
+# ✅ 每個 API 操作的呼叫次數、延遲、重試、回應大小與呼叫來源（每次選單動作後列出）
+call_profiler = CallProfiler()
+
+# ✅ 連線池需容納所有 worker，否則併發呼叫會互相等待
+client_config = Config(
+    max_pool_connections=max(10, MAX_WORKERS),
+    retries={
+        'mode': os.getenv("RETRY_MODE", "standard"),
+        'max_attempts': int(os.getenv("RETRY_MAX_ATTEMPTS", "10")),
+    },
+)
+
+# name -> (kind, service)；Model* 以這些名稱匯入 client/resource
+CLIENT_SPECS = {
+    'ec2': ('resource', 'ec2'),
+    'ec2_client': ('client', 'ec2'),
+    'lambda_client': ('client', 'lambda'),
+    'rds_client': ('client', 'rds'),
+    'ses_client': ('client', 'ses'),
+    's3': ('client', 's3'),
+    's3_resource': ('resource', 's3'),
+    'iam': ('client', 'iam'),
+    'elb_client': ('client', 'elbv2'),
+    'cloudfront': ('client', 'cloudfront'),
+    'acm': ('client', 'acm'),
+    'route53': ('client', 'route53'),
+}
+
+class AccountCache:
+    """Per-account results shared by every region of one scan (global services)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get_or_fetch(self, key, fetch):
+        with self._lock:
+            entry = self._entries.setdefault(key, {'lock': threading.Lock()})
+        with entry['lock']:
+            if 'value' not in entry:
+                entry['value'] = fetch()
+            return entry['value']
+
+class AwsContext:
+    """One account/region: its own boto3 session and its own clients.
+
+    Clients are created on first use (thread-safe), so only the services a
+    report actually touches pay botocore's model-loading cost.
+    """
+
+    def __init__(self, session, account='default', shared=None):
+        self.session = session
+        self.account = account
+        self.region = session.region_name
+        self.shared = shared
+        # cache entries are scoped per account; the .env key stands in for the default account
+        self.cache_scope = account if account != 'default' else session.get_credentials().access_key
+        self._clients = {}
+        self._regional_clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, name):
+        """Client/resource registered under `name` in CLIENT_SPECS, created once."""
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    kind, service = CLIENT_SPECS[name]
+                    client = getattr(self.session, kind)(service, config=client_config)
+                    botocore_client = client if kind == 'client' else client.meta.client
+                    response_cache.attach(botocore_client, self.cache_scope)
+                    request_scheduler.attach(botocore_client, self.cache_scope)
+                    call_profiler.attach(botocore_client)
+                    self._clients[name] = client
+        return client
+
+    def regional_client(self, service, region):
+        """Client for a region other than the session's own, created once and reused."""
+        key = (service, region)
+        with self._lock:
+            if key not in self._regional_clients:
+                client = self.session.client(service, region_name=region, config=client_config)
+                response_cache.attach(client, self.cache_scope)
+                request_scheduler.attach(client, self.cache_scope)
+                call_profiler.attach(client)
+                self._regional_clients[key] = client
+            return self._regional_clients[key]
+
+_active_context = ContextVar('aws_context', default=None)
+
+def current_context():
+    return _active_context.get() or default_context
+
+@contextmanager
+def use_context(context):
+    """Route every client below to `context` for the current thread/task."""
+    token = _active_context.set(context)
+    try:
+        yield context
+    finally:
+        _active_context.reset(token)
+
+def regional_client(service, region):
+    return current_context().regional_client(service, region)
+
+def iter_items(client, operation, expression, **params):
+    """Yield the items of every page of `operation` lazily; only one page is held at a time.
+
+    `expression` is a JMESPath selecting the items of a page, e.g. 'Vpcs[]'.
+    """
+    return client.get_paginator(operation).paginate(**params).search(expression)
+
+def account_shared(key, fetch):
+    """Fetch global-service data once per account during a multi-region scan."""
+    shared = current_context().shared
+    return fetch() if shared is None else shared.get_or_fetch(key, fetch)
+
+class _ContextClient:
+    """Stands in for a client/resource and forwards to the active context's instance."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(current_context().client(self._name), attr)
+
+    def __repr__(self):
+        return f"<{self._name} of {current_context().account}/{current_context().region}>"
+
 # ✅ 建立 AWS session（完整憑證）
 try:
     session = boto3.Session(
@@ -38,22 +260,23 @@ try:
         region_name=AWS_REGION
     )
 
-    # ✅ 建立各 client/resource
-    ec2 = session.resource('ec2')
-    ec2_client = session.client('ec2')
-    lambda_client = session.client('lambda')
-    rds_client = session.client('rds')
-    ses_client = session.client('ses')
-    s3 = session.client('s3')
-    s3_resource = session.resource('s3')
-    iam = session.client('iam')
-    elb_client = session.client('elbv2')
-    cloudfront = session.client('cloudfront')
-    acm = session.client('acm')
-    route53 = session.client('route53')
+    # ✅ 各 client/resource 於第一次使用時才建立
+    default_context = AwsContext(session)
+    ec2 = _ContextClient('ec2')
+    ec2_client = _ContextClient('ec2_client')
+    lambda_client = _ContextClient('lambda_client')
+    rds_client = _ContextClient('rds_client')
+    ses_client = _ContextClient('ses_client')
+    s3 = _ContextClient('s3')
+    s3_resource = _ContextClient('s3_resource')
+    iam = _ContextClient('iam')
+    elb_client = _ContextClient('elb_client')
+    cloudfront = _ContextClient('cloudfront')
+    acm = _ContextClient('acm')
+    route53 = _ContextClient('route53')
 
 except Exception as e:
     print("❌ 建立 AWS Session 或初始化 client 時發生錯誤：")
     traceback.print_exc()
-    input("🔚 按下 Enter 結束")
+    _pause_before_exit()
     sys.exit(1)
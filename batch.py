@@ -0,0 +1,51 @@
+# batch.py
+import io
+import sys
+import time
+import traceback
+from contextlib import redirect_stdout, nullcontext
+from pathlib import Path
+from aws_session import response_cache, request_scheduler, call_profiler
+from datasets import DatasetStore, use_store
+from output import record_writers
+from profiler import export_profile, export_chrome_trace
+from render import rendering
+from reports import REPORTS, load_report
+
+FORMATS = ('text', 'jsonl', 'csv')
+
+def run_batch(options, formats, out_dir, profile=False):
+    """Run the given reports without prompts and write them to out_dir; returns the exit code.
+
+    All reports share one DatasetStore, so data several reports need (EC2
+    instances, Lambda functions, buckets and bucket policies) is fetched once.
+    With profile=True the API call profile is written to profile.json and
+    profile.trace.json (Chrome trace format).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    failed = []
+    with use_store(DatasetStore()):
+        for option in options:
+            slug, title, _, _, _ = REPORTS[option]
+            started = time.perf_counter()
+            text_file = open(out_dir / f"{slug}.txt", 'w', encoding='utf-8') if 'text' in formats else None
+            try:
+                output = rendering(paged=False, sink=text_file) if text_file else redirect_stdout(io.StringIO())
+                with text_file or nullcontext(), output, record_writers(formats, out_dir, slug):
+                    load_report(option)()
+            except Exception:
+                failed.append(option)
+                print(f"❌ {title} 失敗：", file=sys.stderr)
+                traceback.print_exc()
+            else:
+                print(f"✅ {title} → {out_dir / slug}.*（{time.perf_counter() - started:.1f} s）")
+
+    response_cache.print_stats()
+    request_scheduler.print_stats()
+    call_profiler.print_summary()
+    if profile:
+        snapshot = call_profiler.snapshot()
+        export_profile(snapshot, out_dir / 'profile.json')
+        export_chrome_trace(snapshot, out_dir / 'profile.trace.json')
+    return 1 if failed else 0
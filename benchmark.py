@@ -0,0 +1,190 @@
+# benchmark.py
+"""python benchmark.py：以本機產生的合成帳號量測每個報表（不需 AWS 帳號）。
+
+每個報表在獨立子行程執行，記錄：總耗時、首次輸出時間、每個 API 的呼叫次數、峰值 RSS。
+
+    python benchmark.py --scale ci --latency 0.02
+    python benchmark.py --scale large --set instances=5000 --json bench.json
+    python benchmark.py --scale ci --compare bench.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+class _FirstOutput:
+    """stdout sink that discards report output but remembers when the first line arrived."""
+
+    def __init__(self):
+        self.first = None
+        self.chars = 0
+
+    def write(self, text):
+        if text.strip() and self.first is None:
+            self.first = time.perf_counter()
+        self.chars += len(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def run_worker(option, scale, seed, latency):
+    """Run one report against a synthetic account in this process and return its measurements."""
+    # every run starts cold: no response cache and no Route53 snapshot from an earlier run
+    snapshot_path = os.path.join(tempfile.gettempdir(), f'aws_dashboard_bench_route53_{os.getpid()}.sqlite')
+    os.environ.update(AWS_ACCESS_KEY='synthetic', AWS_SECRET_KEY='synthetic', AWS_REGION='us-east-1',
+                      CACHE_TTLS='default=0', CACHE_PATH=os.path.join(tempfile.gettempdir(), 'aws_dashboard_bench.sqlite'),
+                      ROUTE53_SNAPSHOT_PATH=snapshot_path)
+    from synthetic_account import SyntheticAccount
+    account = SyntheticAccount(scale, seed=seed, latency=latency)
+
+    from aws_session import session
+    from reports import load_report
+    account.install(session)
+    report_fn = load_report(option)
+
+    sink = _FirstOutput()
+    real_stdout = sys.stdout
+    sys.stdout = sink
+    start = time.perf_counter()
+    error = None
+    try:
+        report_fn()
+    except Exception as e:
+        error = repr(e)
+    finally:
+        sys.stdout = real_stdout
+    elapsed = time.perf_counter() - start
+    for suffix in ('', '-wal', '-shm'):
+        try:
+            os.remove(snapshot_path + suffix)
+        except OSError:
+            pass
+    return {
+        'wall_s': round(elapsed, 3),
+        'first_output_s': round(sink.first - start, 3) if sink.first else None,
+        'output_chars': sink.chars,
+        'api_calls': sum(account.calls.values()),
+        'calls': dict(sorted(account.calls.items())),
+        'unstubbed': dict(account.unstubbed),
+        'peak_rss_mb': _peak_rss_mb(),
+        'error': error,
+    }
+
+def run_benchmark(options, scale, seed, latency):
+    results = {}
+    for option in options:
+        proc = subprocess.run(
+            [sys.executable, __file__, '--worker', option, '--scale-json', json.dumps(scale),
+             '--seed', str(seed), '--latency', str(latency)],
+            capture_output=True, text=True, encoding='utf-8', cwd=Path(__file__).parent,
+        )
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode or not lines:
+            results[option] = {'error': (proc.stderr or proc.stdout).strip()[-2000:]}
+        else:
+            results[option] = json.loads(lines[-1])
+    return results
+
+def _print_results(results, baseline=None):
+    from reports import REPORTS
+    print("\n⏱️ 基準測試結果")
+    for option, result in results.items():
+        title = REPORTS[option][1]
+        if result.get('error') and 'wall_s' not in result:
+            print(f"\n  ❌ {title}：{result['error']}")
+            continue
+        rss = f"{result['peak_rss_mb']:.0f} MB" if result['peak_rss_mb'] is not None else "N/A"
+        first = f"{result['first_output_s']:.2f} s" if result['first_output_s'] is not None else "N/A"
+        print(f"\n  ▶ {title}")
+        print(f"    總耗時: {result['wall_s']:.2f} s | 首次輸出: {first} | API 呼叫: {result['api_calls']} | 峰值 RSS: {rss}")
+        if baseline and option in baseline and 'wall_s' in baseline[option]:
+            base = baseline[option]
+            print(f"    與基準比較: 耗時 {base['wall_s']:.2f} → {result['wall_s']:.2f} s | "
+                  f"API 呼叫 {base['api_calls']} → {result['api_calls']}")
+        for operation, count in result['calls'].items():
+            print(f"      {operation:<48} {count}")
+        if result['unstubbed']:
+            print(f"    ⚠️ 合成帳號未模擬的 API: {result['unstubbed']}")
+        if result['error']:
+            print(f"    ⚠️ 報表錯誤: {result['error']}")
+
+def _regressions(results, baseline, tolerance):
+    found = []
+    for option, result in results.items():
+        base = baseline.get(option)
+        if not base or 'wall_s' not in base:
+            continue
+        if 'wall_s' not in result or result.get('error'):
+            found.append(f"報表 {option} 執行失敗")
+            continue
+        if result['api_calls'] > base['api_calls']:
+            found.append(f"報表 {option} API 呼叫 {base['api_calls']} → {result['api_calls']}")
+        if result['wall_s'] > base['wall_s'] * (1 + tolerance):
+            found.append(f"報表 {option} 耗時 {base['wall_s']:.2f} → {result['wall_s']:.2f} s")
+    return found
+
+def main(argv=None):
+    from synthetic_account import SCALES
+
+    parser = argparse.ArgumentParser(description="AWS 資源總覽工具：合成帳號基準測試")
+    parser.add_argument('--reports', default='1,2,3,4,5,9,12', help="報表編號，以逗號分隔")
+    parser.add_argument('--scale', default='ci', choices=sorted(SCALES), help="合成帳號規模")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=N', help="覆寫規模，例如 instances=5000")
+    parser.add_argument('--latency', type=float, default=0.0, help="每次 API 呼叫的模擬延遲（秒）")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="將結果寫入 JSON 檔")
+    parser.add_argument('--compare', help="與先前的 JSON 結果比較，退步時以非零代碼結束")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="耗時可接受的退步比例")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--scale-json', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, json.loads(args.scale_json), args.seed, args.latency)))
+        return 0
+
+    scale = dict(SCALES[args.scale])
+    for item in args.set:
+        key, value = item.split('=', 1)
+        if key not in scale:
+            parser.error(f"未知的規模項目：{key}")
+        scale[key] = int(value)
+
+    options = [item.strip() for item in args.reports.split(',') if item.strip()]
+    print(f"🧪 合成帳號：{args.scale} {scale}")
+    print(f"   每次呼叫延遲: {args.latency * 1000:.0f} ms")
+    results = run_benchmark(options, scale, args.seed, args.latency)
+
+    baseline = None
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        if previous['scale'] != scale or previous['latency'] != args.latency:
+            print("⚠️ 基準檔的規模或延遲與本次不同，比較結果僅供參考")
+        baseline = previous['results']
+    _print_results(results, baseline)
+    if args.json:
+        Path(args.json).write_text(json.dumps({'scale': scale, 'latency': args.latency, 'results': results},
+                                              indent=2, ensure_ascii=False), encoding='utf-8')
+
+    failed = [option for option, result in results.items() if 'wall_s' not in result]
+    regressions = _regressions(results, baseline, args.tolerance) if baseline else []
+    for line in regressions:
+        print(f"❌ 退步：{line}")
+    return 1 if failed or regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+# datasets.py
+import functools
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from aws_session import (
+    lambda_client, rds_client, s3, elb_client, cloudfront, regional_client, iter_items, current_context,
+    response_cache,
+)
+from fanout import FanOut
+from inventory import iter_instances
+from route53_zones import load_hosted_zones
+from acm_certificates import iter_certificates
+
+# name -> loader; a loader returns an iterable (streamed to the first reader) or a dict
+LOADERS = {}
+# datasets whose loader yields (key, value) pairs: streamed as pairs, kept as a dict
+PAIR_DATASETS = set()
+
+# name of the dataset whose loader is running (inherited by its FanOut workers)
+_loading = ContextVar('loading_dataset', default=None)
+
+def dataset(name, pairs=False):
+    def register(loader):
+        LOADERS[name] = loader
+        if pairs:
+            PAIR_DATASETS.add(name)
+        return loader
+    return register
+
+@dataset('instances')
+def _load_instances():
+    return iter_instances()
+
+@dataset('lambda_functions')
+def _load_lambda_functions():
+    return iter_items(lambda_client, 'list_functions', 'Functions[]')
+
+@dataset('db_instances')
+def _load_db_instances():
+    return iter_items(rds_client, 'describe_db_instances', 'DBInstances[]')
+
+@dataset('buckets')
+def _load_buckets():
+    return iter_items(s3, 'list_buckets', 'Buckets[]')
+
+# legacy LocationConstraint values that are not region names
+_LEGACY_BUCKET_REGIONS = {None: 'us-east-1', '': 'us-east-1', 'EU': 'eu-west-1'}
+
+def get_bucket_region(name):
+    try:
+        region = s3.get_bucket_location(Bucket=name).get('LocationConstraint')
+    except Exception:
+        return None
+    return _LEGACY_BUCKET_REGIONS.get(region, region)
+
+@dataset('bucket_regions')
+def _load_bucket_regions():
+    with FanOut() as pool:
+        return pool.map('s3', get_bucket_region, [bucket['Name'] for bucket in get('buckets')])
+
+def get_bucket_policy(name, region):
+    """{'policy': document} / {'missing': True} (NoSuchBucketPolicy) / {'error': message}."""
+    client = regional_client('s3', region) if region else s3
+    try:
+        return {'policy': json.loads(client.get_bucket_policy(Bucket=name)['Policy'])}
+    except Exception as e:
+        if getattr(e, 'response', {}).get('Error', {}).get('Code') == 'NoSuchBucketPolicy':
+            return {'missing': True}
+        return {'error': str(e)}
+
+@dataset('bucket_policies')
+def _load_bucket_policies():
+    regions = get('bucket_regions')
+    with FanOut() as pool:
+        futures = {name: pool.submit('s3', get_bucket_policy, name, region) for name, region in regions.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+@dataset('hosted_zones')
+def _load_hosted_zones():
+    return load_hosted_zones()
+
+@dataset('load_balancers')
+def _load_load_balancers():
+    return iter_items(elb_client, 'describe_load_balancers', 'LoadBalancers[]')
+
+@dataset('distributions')
+def _load_distributions():
+    return iter_items(cloudfront, 'list_distributions', 'DistributionList.Items[]')
+
+@dataset('certificates', pairs=True)
+def _load_certificates():
+    return iter_certificates()
+
+def _iterate(value):
+    return iter(value.items()) if isinstance(value, dict) else iter(value)
+
+class DatasetStore:
+    """Loads each dataset once per account/region and serves every later read from memory.
+
+    The first read of a dataset streams it from its loader page by page while
+    filling the entry; concurrent reads wait for that one load to finish, and
+    a reader that stops early leaves the dataset unloaded. A dataset read while
+    another one loads is recorded as its input, so invalidating it also drops
+    everything built from it; the next load of an invalidated dataset skips
+    the response cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dependents = defaultdict(set)
+        self._refresh = set()
+
+    def _entry(self, name):
+        context = current_context()
+        key = (context.cache_scope, context.region, name)
+        parent = _loading.get()
+        with self._lock:
+            entry = self._entries.setdefault(key, {'lock': threading.Lock()})
+            if parent is not None:
+                self._dependents[name].add(parent)
+        return key, entry
+
+    def get(self, name):
+        """The whole dataset as a list/dict."""
+        key, entry = self._entry(name)
+        if 'value' not in entry:
+            if entry.get('streamer') == threading.get_ident():
+                # read again by the thread still streaming it: waiting would never end
+                return _collect(name, LOADERS[name]())
+            with entry['lock']:
+                if 'value' not in entry:
+                    for _ in self._stream(key, entry, name):
+                        pass
+        return entry['value']
+
+    def items(self, name):
+        """Iterate a dataset (key/value pairs for dicts); the first read streams it from AWS."""
+        key, entry = self._entry(name)
+        if 'value' not in entry and entry.get('streamer') == threading.get_ident():
+            return _iterate(LOADERS[name]())
+        return self._read(key, entry, name)
+
+    def _read(self, key, entry, name):
+        with entry['lock']:
+            if 'value' in entry:
+                value = entry['value']
+            else:
+                # the lock stays held while the load streams to this reader
+                yield from self._stream(key, entry, name)
+                return
+        yield from _iterate(value)
+
+    def _stream(self, key, entry, name):
+        entry['streamer'] = threading.get_ident()
+        try:
+            started = time.perf_counter()
+            with self._loading(key, name):
+                source = LOADERS[name]()
+            if isinstance(source, dict):
+                value = source
+                yield from source.items()
+            else:
+                value = {} if name in PAIR_DATASETS else []
+                source = iter(source)
+                while True:
+                    # the loader runs one page at a time, inside its own loading scope
+                    with self._loading(key, name):
+                        item = next(source, _END)
+                    if item is _END:
+                        break
+                    if name in PAIR_DATASETS:
+                        value[item[0]] = item[1]
+                    else:
+                        value.append(item)
+                    yield item
+            # time to the last item, including the time readers took between pages
+            entry['seconds'] = time.perf_counter() - started
+            entry['loaded_at'] = time.time()
+            entry['value'] = value
+            self._refresh.discard(key)
+        finally:
+            del entry['streamer']
+
+    @contextmanager
+    def _loading(self, key, name):
+        token = _loading.set(name)
+        try:
+            with (response_cache.bypassing() if key in self._refresh else nullcontext()):
+                yield
+        finally:
+            _loading.reset(token)
+
+    def invalidate(self, names):
+        """Drop the named datasets and every dataset built from them; return all names dropped."""
+        with self._lock:
+            dropped, pending = set(), list(names)
+            while pending:
+                name = pending.pop()
+                if name not in dropped:
+                    dropped.add(name)
+                    pending.extend(self._dependents.get(name, ()))
+            for key in [key for key in self._entries if key[2] in dropped]:
+                del self._entries[key]
+                self._refresh.add(key)
+        return dropped
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def loaded(self):
+        """[(name, scope, region, size, loaded_at, seconds)] for every dataset held in memory."""
+        with self._lock:
+            entries = [(key, entry) for key, entry in self._entries.items() if 'value' in entry]
+        return sorted(
+            (name, scope, region, len(entry['value']), entry['loaded_at'], entry['seconds'])
+            for (scope, region, name), entry in entries
+        )
+
+@contextmanager
+def consumer(name):
+    """Record the datasets read inside the block as inputs of `name` (e.g. a rendered report),
+    so invalidate() of any of them lists `name` among the dropped names."""
+    token = _loading.set(name)
+    try:
+        yield
+    finally:
+        _loading.reset(token)
+
+_END = object()
+
+def _collect(name, source):
+    if isinstance(source, dict):
+        return source
+    return dict(source) if name in PAIR_DATASETS else list(source)
+
+_active_store = ContextVar('dataset_store', default=None)
+
+@contextmanager
+def use_store(store):
+    token = _active_store.set(store)
+    try:
+        yield store
+    finally:
+        _active_store.reset(token)
+
+def active_store():
+    return _active_store.get()
+
+def shared_datasets(report_fn):
+    """Give a report its own store unless the caller (batch mode, the menu session) already set one up."""
+    @functools.wraps(report_fn)
+    def run(*args, **kwargs):
+        if _active_store.get() is not None:
+            return report_fn(*args, **kwargs)
+        with use_store(DatasetStore()):
+            return report_fn(*args, **kwargs)
+    return run
+
+def items(name):
+    """Iterate a dataset through the active store (every report runs with one); the first
+    read streams it from AWS page by page."""
+    store = _active_store.get()
+    if store is None:
+        # outside any report: a throwaway store, as in get()
+        store = DatasetStore()
+    return store.items(name)
+
+def get(name):
+    """A dataset as a list/dict: from the active store if there is one, otherwise fetched now."""
+    store = _active_store.get()
+    if store:
+        return store.get(name)
+    # a throwaway store still lets a loader's own get() calls share their inputs
+    with use_store(DatasetStore()) as store:
+        return store.get(name)
@@ -0,0 +1,43 @@
+# fanout.py
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from aws_session import MAX_WORKERS, SERVICE_CONCURRENCY
+
+class FanOut:
+    """Bounded thread pool for independent AWS calls, with a concurrency cap per service.
+
+    Submit only from the calling thread and wait on results between waves;
+    tasks must not block on other tasks in the same pool.
+    """
+
+    def __init__(self, max_workers=None, service_caps=None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or MAX_WORKERS)
+        caps = SERVICE_CONCURRENCY if service_caps is None else service_caps
+        self._limits = {service: threading.BoundedSemaphore(limit) for service, limit in caps.items()}
+
+    def submit(self, service, fn, *args, **kwargs):
+        # workers inherit the caller's context so clients resolve to the same account/region
+        context = contextvars.copy_context()
+        limit = self._limits.get(service)
+        if limit is None:
+            return self._pool.submit(context.run, fn, *args, **kwargs)
+
+        def run():
+            with limit:
+                return fn(*args, **kwargs)
+        return self._pool.submit(context.run, run)
+
+    def map(self, service, fn, keys):
+        """Run fn(key) for every key and return {key: result} in the order of keys."""
+        futures = {key: self.submit(service, fn, key) for key in keys}
+        return {key: future.result() for key, future in futures.items()}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
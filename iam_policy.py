@@ -0,0 +1,326 @@
+# iam_policy.py
+"""IAM policy engine: statements are compiled once into wildcard matchers, so risk
+scores, "can this principal do action Y on resource Z" and "who can do Y" are
+answered without re-reading the JSON.
+
+Only identity-based policies are evaluated (managed and inline, including the
+policies of a user's groups). Permission boundaries, SCPs, session and resource
+policies are not, and Condition blocks are not evaluated: a matching statement
+with a Condition (or a policy variable in its resources) only makes the answer
+conditional.
+"""
+import functools
+import json
+import re
+from urllib.parse import unquote
+
+ALLOW, DENY, IMPLICIT = 'allow', 'deny', 'implicit'
+RISK_HIGH, RISK_MEDIUM, RISK_LOW = '🔴', '🕀', '🟢'
+
+# a service-wide wildcard on these services counts as medium risk
+SENSITIVE_SERVICES = ('iam', 's3', 'ec2')
+# actions that let a principal raise its own permissions
+ESCALATION_ACTIONS = (
+    'iam:PassRole', 'iam:CreatePolicyVersion', 'iam:SetDefaultPolicyVersion', 'iam:AttachUserPolicy',
+    'iam:AttachRolePolicy', 'iam:PutUserPolicy', 'iam:PutRolePolicy', 'iam:CreateAccessKey',
+    'iam:UpdateAssumeRolePolicy', 'iam:CreateLoginProfile', 'iam:UpdateLoginProfile', 'iam:AddUserToGroup',
+)
+# no policy names this action, so only wildcards and NotAction match it
+_PROBE = 'PolicyEngineProbe'
+# stands for "every resource": '*' and 'arn:aws:*' cover it, an account or bucket ARN pattern does not
+_PROBE_ACCOUNT = '000000000000'
+
+_VARIABLE = re.compile(r'\$\{[^}]*\}')
+
+def load_document(document):
+    # botocore normally decodes IAM policy documents; decode here if it did not
+    if isinstance(document, str):
+        document = json.loads(unquote(document))
+    return document
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+class WildcardSet:
+    """IAM patterns split by shape: exact names (a set), 'prefix*' (one str.startswith over a
+    tuple) and the rest ('*' or '?' inside, policy variables) in one regex.
+
+    Most patterns are exact or 'service:Verb*', so building and matching rarely touch re.
+    """
+    __slots__ = ('exact', 'prefixes', 'rest', '_regex', 'ignore_case')
+
+    def __init__(self, patterns, ignore_case):
+        self.ignore_case = ignore_case
+        self.exact, prefixes, rest = set(), [], []
+        for pattern in patterns:
+            if ignore_case:
+                pattern = pattern.lower()
+            head = pattern[:-1] if pattern.endswith('*') else pattern
+            if '*' in head or '?' in head or _VARIABLE.search(pattern):
+                rest.append(pattern)
+            elif pattern.endswith('*'):
+                prefixes.append(head)
+            else:
+                self.exact.add(pattern)
+        self.prefixes = tuple(prefixes)
+        self.rest = tuple(rest)
+        self._regex = None
+
+    def match(self, text):
+        if self.ignore_case:
+            text = text.lower()
+        if text in self.exact or text.startswith(self.prefixes):
+            return True
+        if not self.rest:
+            return False
+        if self._regex is None:
+            # compiled on first use: most statements never get this far
+            self._regex = _wildcard_regex(self.rest)
+        return self._regex.match(text) is not None
+
+@functools.lru_cache(maxsize=4096)
+def _wildcard_regex(patterns):
+    """One compiled regex for IAM patterns ('*' and '?'); policy variables match anything."""
+    parts = []
+    for pattern in patterns:
+        pieces = _VARIABLE.split(pattern)
+        parts.append('.*'.join(re.escape(piece).replace(r'\*', '.*').replace(r'\?', '.') for piece in pieces))
+    return re.compile(f"(?:{'|'.join(parts)})\\Z", re.DOTALL)
+
+def _service(pattern):
+    """Lower-case service prefix of an action pattern, or None when it can match any service."""
+    service, separator, _ = pattern.partition(':')
+    return None if not separator or '*' in service or '?' in service else service.lower()
+
+def _probe_resource(action):
+    return f"arn:aws:{action.partition(':')[0].lower()}::{_PROBE_ACCOUNT}:{_PROBE}"
+
+class CompiledStatement:
+    __slots__ = ('effect', 'action', 'not_action', 'resource', 'not_resource', 'conditional', 'services',
+                 'some_resource')
+
+    def __init__(self, stmt):
+        self.effect = ALLOW if stmt.get('Effect') == 'Allow' else DENY
+        self.not_action = 'NotAction' in stmt
+        actions = [str(a) for a in _as_list(stmt.get('NotAction' if self.not_action else 'Action', []))]
+        self.action = WildcardSet(actions, ignore_case=True)
+        self.not_resource = 'NotResource' in stmt
+        resources = [str(r) for r in _as_list(stmt.get('NotResource' if self.not_resource else 'Resource', '*'))]
+        self.resource = WildcardSet(resources, ignore_case=False)
+        self.conditional = bool(stmt.get('Condition')) or any(_VARIABLE.search(r) for r in resources)
+        # whether the statement names at least one resource ('NotResource': '*' names none)
+        self.some_resource = bool(resources) and not (self.not_resource and '*' in resources)
+        services = {_service(a) for a in actions}
+        self.services = None if self.not_action or None in services else services
+
+    def matches(self, action, resource):
+        return self.action.match(action) != self.not_action and self.resource.match(resource) != self.not_resource
+
+    def risk_matches(self, action, every):
+        """Whether the statement applies to action on every resource, or (every=False) on at least one.
+
+        A Deny only lifts the risk when it covers every resource, so Denies are always
+        checked against every resource.
+        """
+        if every or self.effect == DENY:
+            return self.matches(action, _probe_resource(action))
+        return self.some_resource and self.action.match(action) != self.not_action
+
+class CompiledPolicy:
+    """Statements of one policy version, indexed by the service prefixes they can match.
+
+    Evaluations are memoized, so every principal the version is attached to
+    shares one evaluation per (action, resource).
+    """
+    __slots__ = ('statements', 'by_service', 'any_service', '_memo', '_risk_memo', '_risk')
+
+    def __init__(self, document):
+        self.statements = [CompiledStatement(stmt) for stmt in _as_list(document.get('Statement', []))]
+        self.by_service = {}
+        self.any_service = []
+        for stmt in self.statements:
+            if stmt.services is None:
+                self.any_service.append(stmt)
+            else:
+                for service in stmt.services:
+                    self.by_service.setdefault(service, []).append(stmt)
+        self._memo = {}
+        self._risk_memo = {}
+        self._risk = None
+
+    def matches(self, action, resource='*'):
+        """frozenset of (effect, conditional) for the statements matching action on resource."""
+        key = (action, resource)
+        found = self._memo.get(key)
+        if found is None:
+            service = action.partition(':')[0].lower()
+            found = self._memo[key] = frozenset(
+                (stmt.effect, stmt.conditional)
+                for stmt in self.any_service + self.by_service.get(service, [])
+                if stmt.matches(action, resource)
+            )
+        return found
+
+    def risk_matches(self, action, every):
+        """Like matches(), for risk probes: on every resource, or on at least one (every=False)."""
+        key = (action, every)
+        found = self._risk_memo.get(key)
+        if found is None:
+            service = action.partition(':')[0].lower()
+            found = self._risk_memo[key] = frozenset(
+                (stmt.effect, stmt.conditional)
+                for stmt in self.any_service + self.by_service.get(service, [])
+                if stmt.risk_matches(action, every)
+            )
+        return found
+
+    def risk(self):
+        if self._risk is None:
+            self._risk = risk_level(lambda action, every: decide(self.risk_matches(action, every)))[0]
+        return self._risk
+
+def decide(matches):
+    """(decision, conditional) from the (effect, conditional) pairs of every matching statement.
+
+    An unconditional Deny wins; otherwise any Allow allows, conditionally when the
+    Allow has a condition or a conditional Deny might still apply.
+    """
+    if (DENY, False) in matches:
+        return DENY, False
+    if (ALLOW, False) in matches:
+        return ALLOW, (DENY, True) in matches
+    if (ALLOW, True) in matches:
+        return ALLOW, True
+    return IMPLICIT, False
+
+def risk_level(decision):
+    """(risk icon, risky actions allowed); decision(action, every) gives (decision, conditional)
+    on every resource, or on at least one resource when `every` is False.
+
+    High: every action of every service on every resource, conditionally or not.
+    Medium: every action on some resources, every action but IAM's, a service-wide
+    wildcard on a sensitive service, or a privilege-escalation action, on any resource.
+
+    >>> def rate(*statements):
+    ...     return CompiledPolicy({'Statement': list(statements)}).risk()
+    >>> rate({'Effect': 'Allow', 'Action': '*', 'Resource': '*'})
+    '🔴'
+    >>> rate({'Effect': 'Allow', 'Action': '*', 'Resource': 'arn:aws:*'})
+    '🔴'
+    >>> rate({'Effect': 'Allow', 'Action': '*', 'Resource': '*'},
+    ...      {'Effect': 'Deny', 'Action': '*', 'Resource': '*', 'Condition': {'Bool': {'aws:MultiFactorAuthPresent': 'false'}}})
+    '🔴'
+    >>> rate({'Effect': 'Allow', 'Action': 'iam:*', 'Resource': 'arn:aws:iam::123456789012:*'})
+    '🕀'
+    >>> rate({'Effect': 'Allow', 'Action': 's3:*', 'Resource': 'arn:aws:s3:::*'})
+    '🕀'
+    >>> rate({'Effect': 'Allow', 'Action': 'iam:PassRole', 'Resource': 'arn:aws:iam::123456789012:role/app'})
+    '🕀'
+    >>> rate({'Effect': 'Allow', 'Action': '*', 'Resource': 'arn:aws:s3:::logs/*'})
+    '🕀'
+    >>> rate({'Effect': 'Allow', 'Action': 'iam:*', 'Resource': '*'},
+    ...      {'Effect': 'Deny', 'Action': 'iam:*', 'Resource': '*'})
+    '🟢'
+    >>> rate({'Effect': 'Allow', 'Action': 'logs:PutLogEvents', 'Resource': '*'})
+    '🟢'
+    """
+    everything = [decision(f"{service}:{_PROBE}", True) for service in ('anyservice', 'iam')]
+    if all(found[0] == ALLOW for found in everything):
+        conditional = any(found[1] for found in everything)
+        return RISK_HIGH, ['*（視條件而定）' if conditional else '*']
+
+    def allowed(action):
+        return decision(action, False)[0] == ALLOW
+
+    if allowed(f"anyservice:{_PROBE}") and allowed(f"iam:{_PROBE}"):
+        return RISK_MEDIUM, ['*（限定資源）']
+    actions = [f"{service}:*" for service in SENSITIVE_SERVICES if allowed(f"{service}:{_PROBE}")]
+    if allowed(f"anyservice:{_PROBE}"):
+        actions.insert(0, '*（IAM 以外）')
+    # escalation actions already covered by an allowed service wildcard are not repeated
+    actions += [action for action in ESCALATION_ACTIONS
+                if f"{action.partition(':')[0]}:*" not in actions and allowed(action)]
+    return (RISK_MEDIUM if actions else RISK_LOW), actions
+
+_compiled = {}
+
+def compile_policy(document, version_key=None):
+    """CompiledPolicy for a document, compiled once per policy version (or per distinct inline document)."""
+    key = version_key or json.dumps(document, sort_keys=True)
+    policy = _compiled.get(key)
+    if policy is None:
+        policy = _compiled[key] = CompiledPolicy(document)
+    return policy
+
+class AccessIndex:
+    """Effective identity-based permissions of every user and role in an authorization snapshot.
+
+    Principals are keyed 'user:name' / 'role:name' and hold the compiled policies
+    that apply to them; a policy attached to many principals is evaluated once.
+    """
+
+    def __init__(self, snapshot, managed):
+        self.managed = managed
+        self.principals = {}
+        self.unresolved = set()
+        self._risks = {}
+        groups = {group['GroupName']: self._policies(group, 'GroupPolicyList') for group in snapshot['groups']}
+        for user in snapshot['users']:
+            policies = self._policies(user, 'UserPolicyList')
+            for group_name in user.get('GroupList', []):
+                policies += groups.get(group_name, [])
+            self.principals[f"user:{user['UserName']}"] = policies
+        for role in snapshot['roles']:
+            self.principals[f"role:{role['RoleName']}"] = self._policies(role, 'RolePolicyList')
+
+    def _policies(self, entity, inline_key):
+        policies = []
+        for attached in entity.get('AttachedManagedPolicies', []):
+            policy = self.managed.get(attached['PolicyArn'])
+            if policy is None:
+                self.unresolved.add(attached['PolicyArn'])
+            else:
+                policies.append((attached['PolicyName'], policy))
+        for inline in entity.get(inline_key, []):
+            policies.append((f"{inline['PolicyName']}（inline）", compile_policy(load_document(inline['PolicyDocument']))))
+        return policies
+
+    def find(self, text):
+        if text in self.principals:
+            return text
+        return next((key for key in self.principals if key.split(':', 1)[1] == text), None)
+
+    def _decision(self, principal, action, resource='*'):
+        matches = set()
+        for _, policy in self.principals[principal]:
+            matches |= policy.matches(action, resource)
+        return decide(matches)
+
+    def can(self, principal, action, resource='*'):
+        """{'decision', 'conditional', 'policies'} for one principal; policies are the ones whose statements matched."""
+        matches, matched = set(), []
+        for name, policy in self.principals[principal]:
+            found = policy.matches(action, resource)
+            if found:
+                matches |= found
+                matched.append(name)
+        decision, conditional = decide(matches)
+        return {'decision': decision, 'conditional': conditional, 'policies': matched}
+
+    def who_can(self, action, resource='*'):
+        """[(principal, result of can())] for every principal allowed to perform action on resource."""
+        return [(principal, self.can(principal, action, resource)) for principal in self.principals
+                if self._decision(principal, action, resource)[0] == ALLOW]
+
+    def principal_risk(self, principal):
+        # principals with the same set of policies share one evaluation
+        policies = frozenset(policy for _, policy in self.principals[principal])
+        risk = self._risks.get(policies)
+        if risk is None:
+            def decision(action, every):
+                matches = set()
+                for policy in policies:
+                    matches |= policy.risk_matches(action, every)
+                return decide(matches)
+            risk = self._risks[policies] = risk_level(decision)
+        return risk
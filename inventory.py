@@ -0,0 +1,111 @@
+# inventory.py
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from aws_session import ec2, ec2_client, iter_items
+
+def get_name_from_tags(tags):
+    if tags:
+        for tag in tags:
+            if tag['Key'] == 'Name':
+                return tag['Value']
+    return 'N/A'
+
+class InterfaceRecord:
+    """The parts of an ENI the reports render."""
+    __slots__ = ('vpc_id', 'subnet_id', 'group_ids', 'private_ips')
+
+    def __init__(self, vpc_id, subnet_id, group_ids, private_ips):
+        self.vpc_id = vpc_id
+        self.subnet_id = subnet_id
+        self.group_ids = group_ids
+        self.private_ips = private_ips
+
+class InstanceRecord:
+    """The parts of an EC2 instance the reports render (replaces boto3 Instance resources)."""
+    __slots__ = ('instance_id', 'name', 'public_ip', 'private_ip', 'iam_profile_arn', 'interfaces')
+
+    def __init__(self, instance_id, name, public_ip, private_ip, iam_profile_arn, interfaces):
+        self.instance_id = instance_id
+        self.name = name
+        self.public_ip = public_ip
+        self.private_ip = private_ip
+        self.iam_profile_arn = iam_profile_arn
+        self.interfaces = interfaces
+
+def _instance_record(instance):
+    # VPC/subnet/SG IDs repeat across thousands of instances; intern them
+    interfaces = tuple(
+        InterfaceRecord(
+            sys.intern(eni.get('VpcId', '')),
+            sys.intern(eni.get('SubnetId', '')),
+            tuple(sys.intern(g['GroupId']) for g in eni.get('Groups', [])),
+            tuple(a['PrivateIpAddress'] for a in eni.get('PrivateIpAddresses', [])),
+        )
+        for eni in instance.get('NetworkInterfaces', [])
+    )
+    return InstanceRecord(
+        instance['InstanceId'],
+        get_name_from_tags(instance.get('Tags')),
+        instance.get('PublicIpAddress'),
+        instance.get('PrivateIpAddress'),
+        instance.get('IamInstanceProfile', {}).get('Arn'),
+        interfaces,
+    )
+
+def iter_instances():
+    """Yield every EC2 instance as a compact InstanceRecord, one describe_instances page at a time."""
+    for instance in iter_items(ec2_client, 'describe_instances', 'Reservations[].Instances[]'):
+        yield _instance_record(instance)
+
+def load_instances():
+    return list(iter_instances())
+
+class InstanceGroups:
+    """Instances grouped once by VPC, subnet and security group (original order kept)."""
+    __slots__ = ('by_vpc', 'by_subnet', 'by_security_group')
+
+    def __init__(self, instances):
+        self.by_vpc = defaultdict(list)
+        self.by_subnet = defaultdict(list)
+        self.by_security_group = defaultdict(list)
+        for instance in instances:
+            vpc_ids = {eni.vpc_id for eni in instance.interfaces}
+            subnet_ids = {eni.subnet_id for eni in instance.interfaces}
+            group_ids = {g for eni in instance.interfaces for g in eni.group_ids}
+            for vpc_id in vpc_ids:
+                self.by_vpc[vpc_id].append(instance)
+            for subnet_id in subnet_ids:
+                self.by_subnet[subnet_id].append(instance)
+            for group_id in group_ids:
+                self.by_security_group[group_id].append(instance)
+
+def measure_inventory():
+    """python main.py --inventory-profile：比較 boto3 resource 與精簡紀錄的峰值記憶體與分組時間。"""
+    vpc_ids = list(iter_items(ec2_client, 'describe_vpcs', 'Vpcs[].VpcId'))
+
+    def profile(load, group):
+        tracemalloc.start()
+        start = time.perf_counter()
+        instances = load()
+        loaded = time.perf_counter()
+        group(instances)
+        grouped = time.perf_counter()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(instances), loaded - start, grouped - loaded, peak
+
+    def nested_scan(instances):
+        # the original per-VPC scan over every instance's network_interfaces
+        return {vpc_id: [i for i in instances if any(eni.vpc_id == vpc_id for eni in i.network_interfaces)]
+                for vpc_id in vpc_ids}
+
+    rows = [
+        ('boto3 Instance + 巢狀掃描', profile(lambda: list(ec2.instances.all()), nested_scan)),
+        ('InstanceRecord + 一次分組', profile(load_instances, InstanceGroups)),
+    ]
+    print(f"⏱️ EC2 inventory 分析（{len(vpc_ids)} 個 VPC）")
+    for label, (count, load_time, group_time, peak) in rows:
+        print(f"  ▶ {label}")
+        print(f"    執行個體: {count} | 載入: {load_time:.2f} s | 分組: {group_time * 1000:.1f} ms | 峰值記憶體: {peak / 1024 / 1024:.1f} MB")
@@ -1,13 +1,70 @@
-from Model1 import describe_vpcs_ec2_lambda_rds
-from Model2 import describe_iam_resources
-from Model3 import describe_iam_usage
-from Model4 import list_s3_buckets
-from Model5 import describe_route53_acm_cloudfront
+import time
+_started = time.perf_counter()
+
+from aws_session import response_cache, request_scheduler, call_profiler
+from reports import REPORTS, load_report
+import render
 
+import sys
 import traceback
-import time
+import multiprocessing
+
+# 報表模組在選擇該選項時才匯入（加快啟動，尤其是打包後的 exe）
+
+def export_last_profile(profile):
+    from profiler import export_profile, export_chrome_trace
+    if not profile or not profile['operations']:
+        print("⚠️ 尚未有可匯出的 API 呼叫紀錄。")
+        return
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(profile['started']))
+    export_profile(profile, f"aws_profile-{stamp}.json")
+    export_chrome_trace(profile, f"aws_profile-{stamp}.trace.json")
+    print(f"💾 已匯出 aws_profile-{stamp}.json 與 aws_profile-{stamp}.trace.json（可用 chrome://tracing 開啟）")
+
+def refresh_datasets(store):
+    """Menu option 10: drop chosen in-memory datasets (and what was built from them) so they reload fresh."""
+    import datasets
+
+    loaded = store.loaded()
+    if not loaded:
+        print("ℹ️ 目前沒有已載入的資料集。")
+        return
+    print("\n🗂️ 本次已載入的資料集：")
+    for name, scope, region, size, loaded_at, seconds in loaded:
+        stamp = time.strftime('%H:%M:%S', time.localtime(loaded_at))
+        print(f"  ▶ {name:<18} {region or '-':<16} {size:>7} 筆 | 載入 {seconds:.1f} s | {stamp}")
+    text = input("要重新整理的資料集（以逗號分隔，all = 全部，直接 Enter 取消）：").strip()
+    if not text:
+        return
+    names = sorted({name for name, *_ in loaded}) if text == 'all' else [n.strip() for n in text.split(',') if n.strip()]
+    unknown = [name for name in names if name not in datasets.LOADERS]
+    if unknown:
+        print(f"❌ 未知的資料集：{', '.join(unknown)}")
+        return
+    dropped = store.invalidate(names)
+    print(f"🔄 已清除：{', '.join(sorted(dropped))}（下次使用時會略過本機快取重新抓取）")
+
+def set_report_output():
+    """Menu option 11: choose the detail level and whether reports open in the built-in pager."""
+    text = input(f"詳細程度（{' / '.join(render.LEVELS)}，直接 Enter 不變）：").strip()
+    if text in render.LEVELS:
+        render.level = text
+    elif text:
+        print(f"❌ 未知的詳細程度：{text}")
+        return
+    render.pager = input("使用內建分頁？(y/N)：").strip().lower() == 'y'
+    print(f"🖨️ 報表輸出：詳細程度 {render.level} | 分頁 {'開' if render.pager else '關'}")
 
 def main_menu():
+    import datasets
+
+    # one store for the whole session: later options reuse what earlier ones loaded
+    store = datasets.DatasetStore()
+    with datasets.use_store(store):
+        run_menu(store)
+
+def run_menu(store):
+    last_profile = None
     while True:
         print("\n📦 AWS 資源總覽工具")
         print("1️⃣ 查看 VPC/EC2/Lambda/RDS/ALB 資訊")
@@ -15,20 +72,53 @@ def main_menu():
         print("3️⃣ 查看 IAM 使用狀況")
         print("4️⃣ 查看 S3 Bucket 詳細資訊")
         print("5️⃣ 查看 Route53/ACM/CloudFront 資訊")
+        print("6️⃣ 多區域/多帳號掃描（依 .env 的 SCAN_REGIONS / SCAN_ACCOUNTS）")
+        print(f"7️⃣ 強制重新整理（略過本機快取）：{'開' if response_cache.force_refresh else '關'}")
+        print("8️⃣ 匯出上一個動作的 API 呼叫分析（JSON / Chrome trace）")
+        print("9️⃣ 查看網域 → CloudFront/ALB → 憑證 → 目標 拓撲（可查詢）")
+        print("🔟 重新整理已載入的資料（EC2、Lambda、Bucket、Route53 …）")
+        print(f"1️⃣1️⃣ 報表輸出：詳細程度 {render.level} | 分頁 {'開' if render.pager else '關'}")
+        print("1️⃣2️⃣ 安全群組暴露分析（哪些 EC2/RDS/ALB 可從 0.0.0.0/0 或指定 CIDR 連入，可查詢）")
         print("0️⃣ 離開")
 
         choice = input("請輸入選項號碼：")
+        if response_cache.force_refresh and (choice in REPORTS or choice == '6'):
+            store.clear()  # force refresh: every option reads live data
         try:
-            if choice == '1':
-                describe_vpcs_ec2_lambda_rds()
-            elif choice == '2':
-                describe_iam_resources()
-            elif choice == '3':
-                describe_iam_usage()
-            elif choice == '4':
-                list_s3_buckets()
-            elif choice == '5':
-                describe_route53_acm_cloudfront()
+            if choice in REPORTS:
+                started = time.perf_counter()
+                with render.rendering() as renderer:
+                    result = load_report(choice)()
+                render.print_render_stats(renderer, time.perf_counter() - started)
+                if choice == '9':
+                    from topology import query_topology
+                    query_topology(result)
+                elif choice == '2':
+                    from Model2 import query_access
+                    query_access(result)
+                elif choice == '12':
+                    from sg_exposure import query_exposure
+                    query_exposure(result)
+            elif choice == '6':
+                from multiscan import run_scan
+                report = input("要掃描的報表 (1-5, 9, 12)：").strip()
+                if report in REPORTS:
+                    run_scan(report)
+                else:
+                    print("❌ 無效的報表編號。")
+            elif choice == '7':
+                response_cache.force_refresh = not response_cache.force_refresh
+                print(f"🔄 強制重新整理已{'開啟' if response_cache.force_refresh else '關閉'}")
+                continue
+            elif choice == '8':
+                export_last_profile(last_profile)
+                continue
+            elif choice == '10':
+                refresh_datasets(store)
+                continue
+            elif choice == '11':
+                set_report_output()
+                continue
             elif choice == '0':
                 print("👋 離開系統，再見！")
                 break
@@ -38,7 +128,95 @@ def main_menu():
             print("\n⚠️ 程式發生錯誤！以下是詳細錯誤訊息：\n")
             traceback.print_exc()
 
+        response_cache.print_stats()
+        response_cache.reset_stats()
+        request_scheduler.print_stats()
+        request_scheduler.reset_stats()
+        call_profiler.print_summary()
+        last_profile = call_profiler.snapshot()
+        call_profiler.reset()
         input("\n🔚 按下 Enter 繼續...")
 
+def measure_startup():
+    """python main.py --startup-time：顯示啟動耗時，以及每個 client 首次建立的成本。"""
+    from aws_session import CLIENT_SPECS, AwsContext, session
+
+    menu_ready = time.perf_counter() - _started
+    print("⏱️ 啟動時間分析")
+    print(f"  選單可用前耗時（匯入 aws_session 等）: {menu_ready * 1000:.0f} ms")
+
+    context = AwsContext(session)
+    total = 0.0
+    print("  各 client 首次建立耗時（舊版會在啟動時全部建立）：")
+    for name in CLIENT_SPECS:
+        start = time.perf_counter()
+        context.client(name)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        print(f"    ▶ {name:<14} {elapsed * 1000:7.0f} ms")
+    print(f"  全部 client 合計: {total * 1000:.0f} ms（現在只在報表用到時才產生）")
+
+    for module in ('Model1', 'Model2', 'Model3', 'Model4', 'Model5'):
+        start = time.perf_counter()
+        __import__(module)
+        print(f"  匯入 {module}: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+def batch_main(argv):
+    """python main.py --reports 1,3,4 --format text,jsonl,csv --out dir/：不經選單直接輸出報表（適合 cron）。"""
+    import argparse
+    from batch import FORMATS, run_batch
+    from reports import REPORTS
+
+    parser = argparse.ArgumentParser(description="AWS 資源總覽工具（批次模式）")
+    parser.add_argument('--reports', required=True, help=f"報表編號，以逗號分隔（{','.join(REPORTS)}）")
+    parser.add_argument('--format', default='text', help=f"輸出格式，以逗號分隔（{','.join(FORMATS)}）")
+    parser.add_argument('--out', default='.', help="輸出資料夾")
+    parser.add_argument('--refresh', action='store_true', help="略過本機快取")
+    parser.add_argument('--profile', action='store_true', help="輸出 API 呼叫分析（profile.json / profile.trace.json）")
+    parser.add_argument('--summary', action='store_true', help="文字報表略過 SG 規則與 DNS 記錄明細")
+    parser.add_argument('--quiet', action='store_true', help="文字報表只列各段標題")
+    parser.add_argument('--pager', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    options = [item.strip() for item in args.reports.split(',') if item.strip()]
+    formats = [item.strip() for item in args.format.split(',') if item.strip()]
+    if not options or any(option not in REPORTS for option in options):
+        parser.error(f"未知的報表編號：{args.reports}")
+    if not formats or any(fmt not in FORMATS for fmt in formats):
+        parser.error(f"未知的輸出格式：{args.format}")
+    if args.pager:
+        parser.error("--pager 只適用於互動選單，批次模式會直接寫入檔案")
+    response_cache.force_refresh = response_cache.force_refresh or args.refresh
+    if args.quiet or args.summary:
+        render.level = render.QUIET if args.quiet else render.SUMMARY
+    return run_batch(options, formats, args.out, profile=args.profile)
+
+def serve_main(argv):
+    """python main.py serve [--host 0.0.0.0] [--port 8000]：本機 HTTP 儀表板，所有人共用同一份資料。"""
+    import argparse
+    from aws_session import SERVE_HOST, SERVE_PORT
+    from serve import serve
+
+    parser = argparse.ArgumentParser(prog="main.py serve", description="AWS 資源總覽工具（儀表板模式）")
+    parser.add_argument('--host', default=SERVE_HOST, help="監聽位址（預設只允許本機連線）")
+    parser.add_argument('--port', type=int, default=SERVE_PORT, help="連接埠")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port)
+
 if __name__ == "__main__":
-    main_menu()
+    multiprocessing.freeze_support()  # 打包成 exe 時 process pool 需要
+    if '--quiet' in sys.argv or '--summary' in sys.argv:
+        render.level = render.QUIET if '--quiet' in sys.argv else render.SUMMARY
+    if '--pager' in sys.argv:
+        render.pager = True
+    if sys.argv[1:2] == ['serve']:
+        serve_main(sys.argv[2:])
+    elif '--reports' in sys.argv:
+        sys.exit(batch_main(sys.argv[1:]))
+    elif '--startup-time' in sys.argv:
+        measure_startup()
+    elif '--inventory-profile' in sys.argv:
+        from inventory import measure_inventory
+        measure_inventory()
+    else:
+        main_menu()
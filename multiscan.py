@@ -0,0 +1,113 @@
+# multiscan.py
+import io
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import boto3
+from aws_session import (
+    session as base_session, AwsContext, AccountCache, use_context, client_config, request_scheduler, call_profiler,
+    SCAN_REGIONS, SCAN_ACCOUNTS, SCAN_EXECUTOR, MAX_WORKERS,
+)
+from reports import REPORTS, load_report
+from render import install_stdout_router, output_buffer
+
+def _sts_client(session, account):
+    sts = session.client('sts', config=client_config)
+    request_scheduler.attach(sts, account)
+    call_profiler.attach(sts)
+    return sts
+
+def _account_session(account, region):
+    """Return (account label, boto3.Session) for 'default' or an assume-role ARN."""
+    if account == 'default':
+        creds = base_session.get_credentials().get_frozen_credentials()
+        scan_session = boto3.Session(
+            aws_access_key_id=creds.access_key,
+            aws_secret_access_key=creds.secret_key,
+            aws_session_token=creds.token,
+            region_name=region,
+        )
+        label = _sts_client(scan_session, account).get_caller_identity()['Account']
+        return label, scan_session
+
+    role = _sts_client(base_session, 'default').assume_role(RoleArn=account, RoleSessionName='aws-dashboard-scan')
+    creds = role['Credentials']
+    scan_session = boto3.Session(
+        aws_access_key_id=creds['AccessKeyId'],
+        aws_secret_access_key=creds['SecretAccessKey'],
+        aws_session_token=creds['SessionToken'],
+        region_name=region,
+    )
+    return account.split(':')[4], scan_session
+
+def _run_region(report, account_session, label, region, shared, include_global):
+    scope = REPORTS[report][4]
+    report_fn = load_report(report)
+    creds = account_session.get_credentials().get_frozen_credentials()
+    # every worker gets its own session and clients (boto3 sessions are not thread-safe)
+    context = AwsContext(
+        boto3.Session(
+            aws_access_key_id=creds.access_key,
+            aws_secret_access_key=creds.secret_key,
+            aws_session_token=creds.token,
+            region_name=region,
+        ),
+        account=label,
+        shared=shared,
+    )
+    buffer = io.StringIO()
+    output_buffer.set(buffer)
+    with use_context(context):
+        try:
+            if scope == 'split':
+                report_fn(include_global=include_global)
+            else:
+                report_fn()
+        except Exception as e:
+            print(f"⚠️ 掃描失敗：{e}")
+    return buffer.getvalue()
+
+def scan_account(report, account, regions, max_workers=None):
+    """Scan one account in every region; returns [(title, output)] in region order."""
+    install_stdout_router()
+    scope = REPORTS[report][4]
+    try:
+        label, account_session = _account_session(account, regions[0])
+    except Exception as e:
+        return [(f"帳號 {account}", f"⚠️ 無法取得帳號憑證：{e}\n")]
+
+    if scope == 'account':
+        regions = regions[:1]
+    shared = AccountCache()
+    with ThreadPoolExecutor(max_workers=max_workers or len(regions)) as pool:
+        futures = [
+            pool.submit(copy_context().run, _run_region, report, account_session, label, region, shared, i == 0)
+            for i, region in enumerate(regions)
+        ]
+        outputs = [f.result() for f in futures]
+
+    if scope == 'account':
+        return [(f"帳號 {label} | 全域", outputs[0])]
+    titles = [
+        f"帳號 {label} | 區域 {region}" + (" (含全域服務)" if scope == 'split' and i == 0 else "")
+        for i, region in enumerate(regions)
+    ]
+    return list(zip(titles, outputs))
+
+def run_scan(report, regions=None, accounts=None, executor=None, max_workers=None):
+    """Run one report across accounts x regions in parallel and print the merged result."""
+    regions = regions or SCAN_REGIONS
+    accounts = accounts or SCAN_ACCOUNTS
+    executor = executor or SCAN_EXECUTOR
+    pool_cls = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+
+    title = REPORTS[report][1]
+    print(f"\n🌏 多區域/多帳號掃描：{title}")
+    print(f"  帳號: {accounts}")
+    print(f"  區域: {regions}")
+
+    with pool_cls(max_workers=max_workers or min(len(accounts), MAX_WORKERS)) as pool:
+        futures = [pool.submit(scan_account, report, account, regions) for account in accounts]
+        for future in futures:
+            for section_title, output in future.result():
+                print(f"\n{'=' * 80}\n🏷️ {section_title}\n{'=' * 80}")
+                print(output, end='')
@@ -0,0 +1,87 @@
+# output.py
+import csv
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+class JsonlWriter:
+    """One JSON object per line: {"type": kind, ...fields}, written as records are emitted."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, kind, record):
+        self._file.write(json.dumps({'type': kind, **record}, ensure_ascii=False, default=str) + '\n')
+
+    def close(self):
+        self._file.close()
+
+class CsvWriter:
+    """One CSV file per record type (<base>-<kind>.csv); columns come from the first record."""
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self._files = {}
+
+    def write(self, kind, record):
+        if kind not in self._files:
+            handle = open(f"{self.base_path}-{kind}.csv", 'w', newline='', encoding='utf-8-sig')
+            writer = csv.DictWriter(handle, fieldnames=list(record), restval='', extrasaction='ignore')
+            writer.writeheader()
+            self._files[kind] = (handle, writer)
+        _, writer = self._files[kind]
+        writer.writerow({k: ';'.join(map(str, v)) if isinstance(v, (list, tuple, set)) else v for k, v in record.items()})
+
+    def close(self):
+        for handle, _ in self._files.values():
+            handle.close()
+
+class RecordList:
+    """Keeps records in memory as [{"type": kind, ...fields}] (dashboard JSON)."""
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, kind, record):
+        self.records.append({'type': kind, **record})
+
+    def close(self):
+        pass
+
+WRITERS = {
+    'jsonl': lambda base: JsonlWriter(f"{base}.jsonl"),
+    'csv': CsvWriter,
+}
+
+_active_writers = ContextVar('record_writers', default=())
+
+@contextmanager
+def record_writers(formats, out_dir, slug):
+    """Send emit() calls to the given structured formats for the duration of one report."""
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    base = str(Path(out_dir) / slug)
+    writers = [WRITERS[fmt](base) for fmt in formats if fmt in WRITERS]
+    token = _active_writers.set(tuple(writers))
+    try:
+        yield writers
+    finally:
+        _active_writers.reset(token)
+        for writer in writers:
+            writer.close()
+
+@contextmanager
+def collected_records():
+    """Collect emit() calls in memory for the duration of one report; yields the record list."""
+    writer = RecordList()
+    token = _active_writers.set((writer,))
+    try:
+        yield writer.records
+    finally:
+        _active_writers.reset(token)
+
+def emit(kind, /, **record):
+    """Hand one structured record to the active writers (no-op in the interactive menu)."""
+    for writer in _active_writers.get():
+        writer.write(kind, record)
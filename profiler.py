@@ -0,0 +1,159 @@
+# profiler.py
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# latency histogram bucket upper bounds (ms)
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, float('inf'))
+
+# infrastructure modules are skipped when looking for the calling report function
+_INFRA_FILES = {'aws_session.py', 'fanout.py', 'profiler.py', 'response_cache.py', 'throttle.py'}
+_REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_current_report = ContextVar('profiled_report', default=None)
+
+@contextmanager
+def report_scope(name):
+    """Attribute every AWS call made below (including FanOut workers) to report `name`."""
+    token = _current_report.set(name)
+    try:
+        yield
+    finally:
+        _current_report.reset(token)
+
+def _calling_function():
+    # innermost frame in this repo that isn't client/cache/scheduler plumbing
+    frame = sys._getframe(2)
+    while frame:
+        filename = frame.f_code.co_filename
+        if os.path.dirname(os.path.abspath(filename)) == _REPO_DIR and os.path.basename(filename) not in _INFRA_FILES:
+            code = frame.f_code
+            return f"{os.path.basename(filename)[:-3]}.{getattr(code, 'co_qualname', code.co_name)}"
+        frame = frame.f_back
+    return '?'
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+class CallProfiler:
+    """Per-operation API call profile collected from botocore events on every client.
+
+    Records count, latency, retries, response bytes, cache hits, errors and the
+    report/function that made each call, plus one trace event per call for
+    Chrome's trace viewer (chrome://tracing or ui.perfetto.dev).
+    """
+
+    MAX_TRACE_EVENTS = 200000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._origin = time.perf_counter()
+            self.operations = defaultdict(lambda: {
+                'count': 0, 'errors': 0, 'retries': 0, 'cache_hits': 0, 'bytes': 0,
+                'durations_ms': [], 'callers': Counter(),
+            })
+            self.trace_events = []
+
+    def attach(self, client):
+        service = client.meta.service_model.service_name
+
+        def start(model, context, **kwargs):
+            context['profile'] = {
+                'operation': model.name, 'start': time.perf_counter(), 'streaming': model.has_streaming_output,
+                'report': _current_report.get(), 'caller': _calling_function(),
+            }
+
+        def finish(http_response, parsed, context, **kwargs):
+            # streaming bodies (S3 GetObject) are left unread for the caller
+            size = 0 if context.get('profile', {}).get('streaming') else len(http_response.content or b'')
+            retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            self._record(service, context, http_response.status_code >= 300, retries, size)
+
+        def failed(context, **kwargs):
+            self._record(service, context, True, 0, 0)
+
+        events = client.meta.events
+        events.register_first('before-parameter-build.*.*', start)
+        events.register('after-call.*.*', finish)
+        events.register('after-call-error.*.*', failed)
+
+    def _record(self, service, context, error, retries, size):
+        call = context.pop('profile', None)
+        if call is None:
+            return
+        end = time.perf_counter()
+        duration_ms = (end - call['start']) * 1000
+        cache_hit = bool(context.get('cache_hit'))
+        key = f"{service}.{call['operation']}"
+        with self._lock:
+            stats = self.operations[key]
+            stats['count'] += 1
+            stats['errors'] += error
+            stats['retries'] += retries
+            stats['cache_hits'] += cache_hit
+            stats['bytes'] += size
+            stats['durations_ms'].append(duration_ms)
+            stats['callers'][(call['report'] or '-', call['caller'])] += 1
+            if len(self.trace_events) < self.MAX_TRACE_EVENTS:
+                self.trace_events.append({
+                    'name': key, 'cat': service, 'ph': 'X', 'pid': os.getpid(), 'tid': threading.get_ident(),
+                    'ts': round((call['start'] - self._origin) * 1e6), 'dur': round(duration_ms * 1000),
+                    'args': {'report': call['report'], 'caller': call['caller'], 'retries': retries,
+                             'bytes': size, 'cache_hit': cache_hit, 'error': bool(error)},
+                })
+
+    def snapshot(self):
+        """The profile as plain data: per-operation totals, histograms and callers, plus trace events."""
+        with self._lock:
+            operations = {}
+            for key, stats in self.operations.items():
+                durations = sorted(stats['durations_ms'])
+                histogram = Counter()
+                for value in durations:
+                    histogram[next(b for b in LATENCY_BUCKETS_MS if value <= b)] += 1
+                operations[key] = {
+                    'count': stats['count'], 'errors': stats['errors'], 'retries': stats['retries'],
+                    'cache_hits': stats['cache_hits'], 'bytes': stats['bytes'],
+                    'total_ms': round(sum(durations), 1),
+                    'p50_ms': round(_percentile(durations, 0.5), 1),
+                    'p95_ms': round(_percentile(durations, 0.95), 1),
+                    'max_ms': round(durations[-1], 1) if durations else 0.0,
+                    'histogram_ms': {('inf' if b == float('inf') else f"<={b}"): histogram[b] for b in LATENCY_BUCKETS_MS},
+                    'callers': [{'report': report, 'function': function, 'count': count}
+                                for (report, function), count in stats['callers'].most_common()],
+                }
+            return {'started': self.started, 'operations': operations, 'trace_events': list(self.trace_events)}
+
+    def print_summary(self, limit=15):
+        profile = self.snapshot()
+        operations = sorted(profile['operations'].items(), key=lambda item: -item[1]['total_ms'])
+        if not operations:
+            return
+        print(f"\n📊 API 呼叫分析（依總耗時排序，前 {min(limit, len(operations))} 名）")
+        print(f"  {'操作':<46}{'次數':>6}{'總耗時 s':>10}{'p50 ms':>9}{'p95 ms':>9}{'重試':>6}{'KB':>9}  主要呼叫者")
+        for key, stats in operations[:limit]:
+            caller = stats['callers'][0]['function'] if stats['callers'] else '?'
+            print(f"  {key:<46}{stats['count']:>6}{stats['total_ms'] / 1000:>10.2f}{stats['p50_ms']:>9.0f}"
+                  f"{stats['p95_ms']:>9.0f}{stats['retries']:>6}{stats['bytes'] / 1024:>9.0f}  {caller}")
+
+def export_profile(profile, path):
+    """Write a snapshot() as JSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({k: v for k, v in profile.items() if k != 'trace_events'}, f, indent=2, ensure_ascii=False)
+
+def export_chrome_trace(profile, path):
+    """Write a snapshot()'s calls in Chrome trace event format."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': profile['trace_events'], 'displayTimeUnit': 'ms'}, f)
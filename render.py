@@ -0,0 +1,261 @@
+# render.py
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from aws_session import REPORT_DETAIL, REPORT_PAGER
+
+# detail levels: full prints everything; summary skips per-rule SG and per-record DNS lines;
+# quiet prints only top-level headings (with their line counts) and text outside any section
+FULL, SUMMARY, QUIET = 'full', 'summary', 'quiet'
+LEVELS = (FULL, SUMMARY, QUIET)
+
+level = REPORT_DETAIL if REPORT_DETAIL in LEVELS else FULL
+pager = REPORT_PAGER
+
+# console writes are batched: flushed at this size, or by the background flusher
+BUFFER_CHARS = 1 << 16
+FLUSH_INTERVAL = 0.25
+
+def full_detail():
+    return level == FULL
+
+class ReportRenderer:
+    """Stands in for sys.stdout while a report runs.
+
+    heading() splits the output into sections. Streamed output reaches the
+    console in large chunks instead of one write per print() (slow on the
+    Windows console); paged output is kept whole for the built-in pager.
+    Time spent writing to the console is tracked as render time.
+    """
+
+    def __init__(self, sink, paged=False, detail=None):
+        self.sink = sink
+        self.paged = paged
+        self.detail = detail or level
+        self.sections = [{'title': None, 'depth': 0, 'lines': []}]
+        self.lines = 0
+        self.render_seconds = 0.0
+        self._partial = ''
+        self._buffer = []
+        self._buffered = 0
+        self._quiet_count = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    # --- file protocol -------------------------------------------------
+    def write(self, text):
+        with self._lock:
+            *complete, self._partial = (self._partial + text).split('\n')
+            for line in complete:
+                self._add_line(line)
+        return len(text)
+
+    def flush(self):
+        # print(flush=True) and the like: the background flusher keeps output timely
+        pass
+
+    def __getattr__(self, attr):
+        return getattr(self.sink, attr)
+
+    # --- sections ------------------------------------------------------
+    def heading(self, text, depth=1):
+        with self._lock:
+            if self._partial:
+                self._add_line(self._partial)
+                self._partial = ''
+            title = text.lstrip('\n')
+            for _ in range(len(text) - len(title)):
+                self._add_line('')
+            if self.detail == QUIET and depth > 1:
+                self._add_line(title)
+                return
+            self._close_quiet_section()
+            self.sections.append({'title': title, 'depth': depth, 'lines': []})
+            self.lines += 1
+            if not self.paged and self.detail != QUIET:
+                self._emit(title)
+
+    def _add_line(self, line):
+        self.lines += 1
+        if self.paged:
+            self.sections[-1]['lines'].append(line)
+        elif self.detail == QUIET and self.sections[-1]['title'] is not None:
+            self._quiet_count += 1
+        else:
+            self._emit(line)
+
+    def _close_quiet_section(self):
+        section = self.sections[-1]
+        if self.detail == QUIET and not self.paged and section['title'] is not None:
+            self._emit(f"{section['title']}（{self._quiet_count} 行已省略）")
+        self._quiet_count = 0
+        if not self.paged:
+            # streamed sections are not kept
+            self.sections = [{'title': section['title'], 'depth': section['depth'], 'lines': []}]
+
+    # --- console writes ------------------------------------------------
+    def _emit(self, line):
+        self._buffer.append(line)
+        self._buffered += len(line) + 1
+        if self._buffered >= BUFFER_CHARS:
+            self._write_out()
+
+    def _write_out(self):
+        with self._lock:
+            if not self._buffer:
+                return
+            started = time.perf_counter()
+            self.sink.write('\n'.join(self._buffer) + '\n')
+            self.sink.flush()
+            self._buffer, self._buffered = [], 0
+            self.render_seconds += time.perf_counter() - started
+
+    def _flush_periodically(self):
+        while not self._stop.wait(FLUSH_INTERVAL):
+            self._write_out()
+
+    def start(self):
+        if not self.paged:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+
+    def finish(self):
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join()
+        with self._lock:
+            if self._partial:
+                self._add_line(self._partial)
+                self._partial = ''
+            self._close_quiet_section()
+            self._write_out()
+        if self.paged:
+            started = time.perf_counter()
+            Pager(self.sections, self.sink, self.detail).run()
+            self.render_seconds += time.perf_counter() - started
+
+# per-thread report output (multi-region scan workers, dashboard renders); see install_stdout_router()
+output_buffer = ContextVar('report_output', default=None)
+
+class RoutedStdout:
+    """sys.stdout replacement that sends prints to the output_buffer of the current context, if set."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        buffer = output_buffer.get()
+        return (buffer or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, attr):
+        return getattr(self.stream, attr)
+
+_stdout_lock = threading.Lock()
+
+def install_stdout_router():
+    with _stdout_lock:
+        if not isinstance(sys.stdout, RoutedStdout):
+            sys.stdout = RoutedStdout(sys.stdout)
+
+def heading(text, depth=1):
+    """Start a report section (print() when no renderer is active, e.g. multi-region scans)."""
+    renderer = sys.stdout
+    if isinstance(renderer, ReportRenderer):
+        renderer.heading(text, depth)
+    else:
+        print(text)
+
+@contextmanager
+def rendering(paged=None, detail=None, sink=None):
+    """Route report output through a ReportRenderer; yields it for its line count and render time."""
+    previous = sys.stdout
+    sink = sink or previous
+    paged = (pager if paged is None else paged) and sink.isatty()
+    renderer = ReportRenderer(sink, paged=paged, detail=detail)
+    sys.stdout = renderer
+    renderer.start()
+    try:
+        yield renderer
+    finally:
+        sys.stdout = previous
+        renderer.finish()
+
+def print_render_stats(renderer, total_seconds):
+    fetch = max(0.0, total_seconds - renderer.render_seconds)
+    print(f"\n⏱️ 資料取得與整理 {fetch:.2f} s | 輸出 {renderer.render_seconds:.2f} s（{renderer.lines} 行，{renderer.detail}）")
+
+class Pager:
+    """Built-in pager with collapsible sections (sections are numbered in the margin)."""
+
+    HELP = "Enter 下一頁 | b 上一頁 | 數字 收合/展開該段 | c 全部收合 | o 全部展開 | /文字 搜尋 | q 離開"
+
+    def __init__(self, sections, sink, detail):
+        self.sections = sections
+        self.sink = sink
+        # quiet starts with every section collapsed
+        self.collapsed = {i for i, s in enumerate(sections) if s['title'] is not None} if detail == QUIET else set()
+
+    def _size(self, index):
+        """Lines of a section including its subsections."""
+        depth, size = self.sections[index]['depth'], len(self.sections[index]['lines'])
+        for section in self.sections[index + 1:]:
+            if section['depth'] <= depth:
+                break
+            size += len(section['lines']) + 1
+        return size
+
+    def view(self):
+        lines, hidden_below = [], None
+        for i, section in enumerate(self.sections):
+            if hidden_below is not None and section['depth'] > hidden_below:
+                continue
+            hidden_below = None
+            if section['title'] is not None:
+                closed = i in self.collapsed
+                suffix = f"（{self._size(i)} 行）" if closed else ''
+                lines.append(f"{'▸' if closed else '▾'}{i:>4} {'  ' * (section['depth'] - 1)}{section['title']}{suffix}")
+                if closed:
+                    hidden_below = section['depth']
+                    continue
+            lines.extend(section['lines'])
+        return lines
+
+    def run(self):
+        height = max(5, shutil.get_terminal_size().lines - 2)
+        top = 0
+        while True:
+            lines = self.view()
+            top = max(0, min(top, len(lines) - 1))
+            self.sink.write('\n'.join(lines[top:top + height]) + '\n')
+            self.sink.flush()
+            if top + height >= len(lines) and not self.collapsed:
+                return
+            command = input(f"-- {min(top + height, len(lines))}/{len(lines)} 行 | {self.HELP} -- ").strip()
+            if command == 'q':
+                return
+            if command == '':
+                if top + height >= len(lines):
+                    return
+                top += height
+            elif command == 'b':
+                top -= height
+            elif command == 'c':
+                self.collapsed = {i for i, s in enumerate(self.sections) if s['title'] is not None}
+                top = 0
+            elif command == 'o':
+                self.collapsed = set()
+            elif command.isdigit() and int(command) < len(self.sections):
+                self.collapsed ^= {int(command)}
+            elif command.startswith('/') and len(command) > 1:
+                match = next((n for n in range(top + 1, len(lines)) if command[1:] in lines[n]), None)
+                if match is None:
+                    self.sink.write("（找不到）\n")
+                else:
+                    top = match
@@ -0,0 +1,34 @@
+# reports.py
+import functools
+import importlib
+from profiler import report_scope
+
+# option -> (slug, title, module, function, scope)
+#   slug    : file name used by batch output
+#   scope   : for multi-region scans
+#     region  : run once per account/region
+#     account : global services only, run once per account
+#     split   : first region of each account also prints the global sections
+REPORTS = {
+    '1': ('vpc', 'VPC/EC2/Lambda/RDS/ALB', 'Model1', 'describe_vpcs_ec2_lambda_rds', 'region'),
+    '2': ('iam', 'IAM 使用者/角色/群組', 'Model2', 'describe_iam_resources', 'account'),
+    '3': ('iam-usage', 'IAM 使用狀況', 'Model3', 'describe_iam_usage', 'split'),
+    '4': ('s3', 'S3 Bucket', 'Model4', 'list_s3_buckets', 'account'),
+    '5': ('dns-edge', 'Route53/ACM/CloudFront', 'Model5', 'describe_route53_acm_cloudfront', 'split'),
+    '9': ('topology', '網域/CloudFront/ALB/憑證/目標 拓撲', 'topology', 'describe_edge_topology', 'region'),
+    '12': ('sg-exposure', '安全群組暴露分析', 'sg_exposure', 'describe_sg_exposure', 'region'),
+}
+
+def load_report(option):
+    """Import the report's module on demand and return its entry function.
+
+    AWS calls made while it runs are attributed to the report's slug in the call profile.
+    """
+    slug, _, module_name, func_name, _ = REPORTS[option]
+    report_fn = getattr(importlib.import_module(module_name), func_name)
+
+    @functools.wraps(report_fn)
+    def run(*args, **kwargs):
+        with report_scope(slug):
+            return report_fn(*args, **kwargs)
+    return run
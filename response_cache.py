@@ -0,0 +1,150 @@
+# response_cache.py
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# set while reloading data the user asked to refresh; FanOut workers inherit it
+_bypass = ContextVar('cache_bypass', default=False)
+
+class _CachedHttp:
+    """Minimal stand-in for the HTTP response botocore expects alongside a cached result."""
+    status_code = 200
+    headers = {}
+    raw = None
+    content = b''
+
+class ResponseCache:
+    """Persistent SQLite cache for read-only (Describe*/List*/Get*) AWS calls.
+
+    Hooks into botocore's before-call/after-call events, so every client it is
+    attached to is served from disk while the entry is younger than its
+    service's TTL. Entries are keyed by account, region, operation and
+    parameters; a TTL of 0 disables caching for that service. A TTL keyed
+    'service.Operation' overrides the service's, and a validator registered
+    for an operation can expire an entry early based on its contents.
+    """
+
+    READ_PREFIXES = ('Describe', 'List', 'Get')
+
+    def __init__(self, path, ttls, default_ttl=0):
+        self.path = str(path)
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self.force_refresh = False
+        self.validators = {}
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS responses '
+                '(key TEXT PRIMARY KEY, service TEXT, operation TEXT, stored_at REAL, body BLOB)'
+            )
+        return self._db
+
+    @property
+    def bypassed(self):
+        """True when reads should skip the cache: force refresh, or inside bypassing()."""
+        return self.force_refresh or _bypass.get()
+
+    @contextmanager
+    def bypassing(self):
+        """Skip cache reads for calls made below (results are still stored)."""
+        token = _bypass.set(True)
+        try:
+            yield
+        finally:
+            _bypass.reset(token)
+
+    def ttl_for(self, service, operation=None):
+        return self.ttls.get(f"{service}.{operation}", self.ttls.get(service, self.default_ttl))
+
+    def add_validator(self, service, operation, validator):
+        """validator(params, body, stored_at) -> False when a cached response must be refetched."""
+        self.validators[(service, operation)] = validator
+
+    def attach(self, client, scope):
+        """Register the cache on a botocore client; scope identifies the account."""
+        region = client.meta.region_name
+
+        def build_key(params, model, context, **kwargs):
+            service = model.service_model.service_name
+            if (not model.name.startswith(self.READ_PREFIXES) or model.has_streaming_output
+                    or self.ttl_for(service, model.name) <= 0):
+                return
+            raw = json.dumps([scope, region, service, model.name, params], sort_keys=True, default=str)
+            context['cache_key'] = hashlib.sha256(raw.encode()).hexdigest()
+            context['cache_params'] = params
+
+        def lookup(model, context, **kwargs):
+            key = context.get('cache_key')
+            if not key:
+                return None
+            service = model.service_model.service_name
+            if not self.bypassed:
+                with self._lock:
+                    row = self._connection().execute(
+                        'SELECT stored_at, body FROM responses WHERE key = ?', (key,)
+                    ).fetchone()
+                if row and time.time() - row[0] < self.ttl_for(service, model.name):
+                    body = pickle.loads(row[1])
+                    validator = self.validators.get((service, model.name))
+                    if validator is None or validator(context['cache_params'], body, row[0]):
+                        self._count(service, 'hit')
+                        context['cache_hit'] = True
+                        return _CachedHttp(), body
+            self._count(service, 'miss')
+            return None
+
+        def store(http_response, parsed, model, context, **kwargs):
+            key = context.get('cache_key')
+            if not key or context.get('cache_hit') or http_response.status_code >= 300:
+                return
+            body = {k: v for k, v in parsed.items() if k != 'ResponseMetadata'}
+            with self._lock:
+                db = self._connection()
+                db.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)',
+                    (key, model.service_model.service_name, model.name, time.time(), pickle.dumps(body)),
+                )
+                db.commit()
+
+        events = client.meta.events
+        events.register('before-parameter-build.*.*', build_key)
+        events.register_first('before-call.*.*', lookup)
+        # store before botocore's own after-call handlers (IAM policy decoding, S3 key
+        # unquoting) rewrite the response, since they run again on every cache hit
+        events.register_first('after-call.*.*', store)
+
+    def _count(self, service, kind):
+        with self._lock:
+            self.stats[(service, kind)] += 1
+
+    def clear(self):
+        with self._lock:
+            db = self._connection()
+            db.execute('DELETE FROM responses')
+            db.commit()
+
+    def reset_stats(self):
+        self.stats.clear()
+
+    def print_stats(self):
+        if not self.stats:
+            return
+        services = sorted({service for service, _ in self.stats})
+        hits = sum(n for (_, kind), n in self.stats.items() if kind == 'hit')
+        misses = sum(n for (_, kind), n in self.stats.items() if kind == 'miss')
+        print(f"\n💾 本機快取：命中 {hits} / 未命中 {misses}" + ("（強制重新整理中）" if self.force_refresh else ""))
+        for service in services:
+            print(f"  ▶ {service}: 命中 {self.stats[(service, 'hit')]} | 未命中 {self.stats[(service, 'miss')]}")
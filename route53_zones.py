@@ -0,0 +1,140 @@
+# route53_zones.py
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from aws_session import (
+    route53, iter_items, current_context, response_cache,
+    ROUTE53_SNAPSHOT_PATH, ROUTE53_SOA_CHECK, ROUTE53_SNAPSHOT_MAX_AGE,
+)
+from fanout import FanOut
+
+class ZoneSnapshot:
+    """Each hosted zone's records from the previous scan, with the markers used to detect changes."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self):
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS zones (scope TEXT, zone_id TEXT, zone_name TEXT, record_count INTEGER, '
+                'soa_serial INTEGER, stored_at REAL, records BLOB, PRIMARY KEY (scope, zone_id))'
+            )
+        return self._db
+
+    def load(self, scope):
+        """{zone_id: {'name', 'record_count', 'soa_serial', 'stored_at', 'records'}} for one account."""
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT zone_id, zone_name, record_count, soa_serial, stored_at, records FROM zones WHERE scope = ?',
+                (scope,),
+            ).fetchall()
+        return {
+            zone_id: {'name': name, 'record_count': count, 'soa_serial': serial, 'stored_at': stored_at,
+                      'records': pickle.loads(records)}
+            for zone_id, name, count, serial, stored_at, records in rows
+        }
+
+    def save(self, scope, zone_id, zone_name, record_count, soa_serial, records):
+        with self._lock:
+            db = self._connection()
+            db.execute('INSERT OR REPLACE INTO zones VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       (scope, zone_id, zone_name, record_count, soa_serial, time.time(), pickle.dumps(records)))
+            db.commit()
+
+    def delete(self, scope, zone_ids):
+        with self._lock:
+            db = self._connection()
+            db.executemany('DELETE FROM zones WHERE scope = ? AND zone_id = ?', [(scope, z) for z in zone_ids])
+            db.commit()
+
+zone_snapshot = ZoneSnapshot(ROUTE53_SNAPSHOT_PATH)
+
+def _soa_serial(record):
+    # SOA value: "<mname> <rname> <serial> <refresh> <retry> <expire> <minimum>"
+    try:
+        return int(record['ResourceRecords'][0]['Value'].split()[2])
+    except (KeyError, IndexError, ValueError):
+        return None
+
+def get_soa_serial(zone_id, zone_name):
+    """Read only the zone's SOA record (one small request instead of paging the whole zone)."""
+    response = route53.list_resource_record_sets(
+        HostedZoneId=zone_id, StartRecordName=zone_name, StartRecordType='SOA', MaxItems='1')
+    for record in response['ResourceRecordSets']:
+        if record['Type'] == 'SOA' and record['Name'] == zone_name:
+            return _soa_serial(record)
+    return None
+
+def fetch_zone_records(zone_id):
+    return list(iter_items(route53, 'list_resource_record_sets', 'ResourceRecordSets[]', HostedZoneId=zone_id))
+
+def _record_key(record):
+    return record['Name'], record['Type'], record.get('SetIdentifier')
+
+def diff_records(old, new):
+    """{'added', 'removed', 'modified'} record lists between two scans of one zone."""
+    old_by_key = {_record_key(r): r for r in old}
+    new_by_key = {_record_key(r): r for r in new}
+    return {
+        'added': [r for k, r in new_by_key.items() if k not in old_by_key],
+        'removed': [r for k, r in old_by_key.items() if k not in new_by_key],
+        'modified': [r for k, r in new_by_key.items()
+                     if k in old_by_key and json.dumps(r, sort_keys=True, default=str)
+                     != json.dumps(old_by_key[k], sort_keys=True, default=str)],
+    }
+
+def load_hosted_zones(max_workers=None):
+    """Every hosted zone with its records, re-paging only zones whose change markers moved.
+
+    A zone is served from the local snapshot when its ResourceRecordSetCount
+    (free, from list_hosted_zones) and SOA serial (one MaxItems=1 request,
+    skipped with ROUTE53_SOA_CHECK=0) match the previous scan and the snapshot
+    is younger than ROUTE53_SNAPSHOT_MAX_AGE. Route 53 does not bump the SOA
+    serial on its own, so in-place edits that keep the record count are only
+    picked up by the age limit, a forced refresh (menu option 7) or a
+    dataset refresh (menu option 10).
+
+    Returns {'zones': {zone_id: entry}, 'removed': [zone names]}; each entry has
+    'zone', 'records', 'source' ('snapshot' / 'fetched' / 'new') and 'changes'.
+    """
+    scope = current_context().cache_scope
+    previous = zone_snapshot.load(scope)
+    zones = {zone['Id'].split('/')[-1]: zone for zone in iter_items(route53, 'list_hosted_zones', 'HostedZones[]')}
+    now = time.time()
+
+    def unchanged(zone_id):
+        zone, old = zones[zone_id], previous.get(zone_id)
+        if (old is None or response_cache.bypassed or now - old['stored_at'] > ROUTE53_SNAPSHOT_MAX_AGE
+                or old['record_count'] != zone.get('ResourceRecordSetCount')):
+            return False
+        return not ROUTE53_SOA_CHECK or get_soa_serial(zone_id, zone['Name']) == old['soa_serial']
+
+    with FanOut(max_workers) as pool:
+        checks = pool.map('route53', unchanged, list(zones))
+        fetched = pool.map('route53', fetch_zone_records, [zone_id for zone_id, same in checks.items() if not same])
+
+    result = {}
+    for zone_id, zone in zones.items():
+        old = previous.get(zone_id)
+        if zone_id not in fetched:
+            result[zone_id] = {'zone': zone, 'records': old['records'], 'source': 'snapshot', 'changes': None}
+            continue
+        records = fetched[zone_id]
+        soa = next((r for r in records if r['Type'] == 'SOA' and r['Name'] == zone['Name']), None)
+        zone_snapshot.save(scope, zone_id, zone['Name'], zone.get('ResourceRecordSetCount'),
+                           _soa_serial(soa) if soa else None, records)
+        result[zone_id] = {
+            'zone': zone, 'records': records, 'source': 'fetched' if old else 'new',
+            'changes': diff_records(old['records'], records) if old else None,
+        }
+
+    removed = [old['name'] for zone_id, old in previous.items() if zone_id not in zones]
+    zone_snapshot.delete(scope, [zone_id for zone_id in previous if zone_id not in zones])
+    return {'zones': result, 'removed': removed}
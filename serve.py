@@ -0,0 +1,230 @@
+# serve.py
+"""python main.py serve: a local HTTP dashboard serving every report as HTML and JSON.
+
+All requests read one DatasetStore and one set of rendered reports, so ten people
+viewing the dashboard cost the API calls of one scan. A background refresher reloads
+each dataset after its SERVE_REFRESH interval and re-renders the reports built from
+it; viewers keep getting the previous snapshot meanwhile. Concurrent requests for a
+report that has not been rendered yet wait for one shared render.
+"""
+import html
+import io
+import json
+import threading
+import time
+import traceback
+from collections import Counter
+from contextvars import copy_context
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+from aws_session import call_profiler, SERVE_HOST, SERVE_PORT, SERVE_REFRESH
+from output import collected_records
+from render import install_stdout_router, output_buffer
+from reports import REPORTS, load_report
+import datasets
+
+# how often the refresher looks for datasets and reports past their interval
+REFRESH_TICK = 30
+
+def refresh_interval(name):
+    return SERVE_REFRESH.get(name, SERVE_REFRESH.get('default', 900))
+
+class Dashboard:
+    """Rendered reports on top of a shared DatasetStore, kept fresh by a background thread."""
+
+    def __init__(self):
+        self.store = datasets.DatasetStore()
+        self.started = time.time()
+        self.requests = Counter()
+        self.renders = Counter()
+        self.api_calls = Counter()
+        self._lock = threading.Lock()
+        self._reports = {}
+        self._stop = threading.Event()
+
+    # --- reports -------------------------------------------------------
+    def report(self, option):
+        """Latest rendering of a report; the first request renders it and concurrent ones wait for it."""
+        with self._lock:
+            entry = self._reports.setdefault(option, {'lock': threading.Lock()})
+        self.requests[option] += 1
+        if 'result' not in entry:
+            with entry['lock']:
+                if 'result' not in entry:
+                    entry['result'] = copy_context().run(self._render, option)
+        return entry['result']
+
+    def rerender(self, option):
+        """Render again and swap the result in; readers keep the old one until it is done."""
+        with self._lock:
+            entry = self._reports.setdefault(option, {'lock': threading.Lock()})
+        with entry['lock']:
+            entry['result'] = copy_context().run(self._render, option, entry.get('result'))
+
+    def _render(self, option, previous=None):
+        slug, title, _, _, _ = REPORTS[option]
+        buffer = io.StringIO()
+        output_buffer.set(buffer)
+        started = time.perf_counter()
+        error = None
+        # datasets read while rendering are recorded as inputs of 'report:<slug>'
+        with datasets.use_store(self.store), datasets.consumer(f"report:{slug}"), collected_records() as records:
+            try:
+                load_report(option)()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                traceback.print_exc(file=buffer)
+        self.renders[option] += 1
+        # consecutive failed renders, for the retry backoff
+        failures = (previous['failures'] + 1 if previous else 1) if error else 0
+        return {'option': option, 'report': slug, 'title': title, 'generated_at': time.time(),
+                'seconds': round(time.perf_counter() - started, 2), 'error': error, 'failures': failures,
+                'text': buffer.getvalue(), 'records': records}
+
+    def rendered(self):
+        with self._lock:
+            return {option: entry['result'] for option, entry in self._reports.items() if 'result' in entry}
+
+    # --- background refresh ----------------------------------------------
+    def refresh_due(self):
+        """Reload datasets past their interval and re-render the reports that read them."""
+        now = time.time()
+        due = sorted({name for name, _, _, _, loaded_at, _ in self.store.loaded()
+                      if now - loaded_at >= refresh_interval(name)})
+        dropped = self.store.invalidate(due) if due else set()
+        for option, result in self.rendered().items():
+            interval = refresh_interval(f"report:{result['report']}")
+            if result['error']:
+                # failed renders are retried with exponential backoff, up to the normal interval
+                interval = min(interval, REFRESH_TICK * 2 ** result['failures'])
+            if f"report:{result['report']}" in dropped or now - result['generated_at'] >= interval:
+                self.rerender(option)
+        if due:
+            print(f"🔄 {time.strftime('%H:%M:%S')} 已重新整理：{', '.join(due)}")
+        self._fold_profile()
+
+    def _fold_profile(self):
+        # keep only running totals; the per-call trace would grow for as long as the server runs
+        for operation, stats in call_profiler.snapshot()['operations'].items():
+            self.api_calls[operation] += stats['count'] - stats['cache_hits']
+        call_profiler.reset()
+
+    def _refresh_loop(self):
+        for option in REPORTS:
+            self.report(option)
+        self._fold_profile()
+        print(f"✅ {time.strftime('%H:%M:%S')} 報表已就緒（{len(REPORTS)} 份）")
+        while not self._stop.wait(REFRESH_TICK):
+            try:
+                self.refresh_due()
+            except Exception:
+                traceback.print_exc()
+
+    def start(self):
+        threading.Thread(target=copy_context().run, args=(self._refresh_loop,), daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        now = time.time()
+        return {
+            'started': self.started,
+            'api_calls': sum(self.api_calls.values()),
+            'api_calls_by_operation': dict(self.api_calls.most_common()),
+            'datasets': [{'name': name, 'size': size, 'age_seconds': round(now - loaded_at),
+                          'load_seconds': round(seconds, 2), 'refresh_seconds': refresh_interval(name)}
+                         for name, _, _, size, loaded_at, seconds in self.store.loaded()],
+            'reports': [{'option': option, 'report': REPORTS[option][0], 'requests': self.requests[option],
+                         'renders': self.renders[option]} for option in REPORTS],
+        }
+
+# --- HTTP ----------------------------------------------------------------
+_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>body{{font-family:sans-serif;margin:1.5em}}pre{{background:#f6f8fa;padding:1em;overflow-x:auto}}
+td,th{{padding:.2em .8em;text-align:left}}</style></head>
+<body><p><a href="/">📦 AWS Dashboard</a></p>{body}</body></html>"""
+
+def _when(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+def index_page(dashboard):
+    rendered = dashboard.rendered()
+    rows = []
+    for option, (slug, title, _, _, _) in REPORTS.items():
+        result = rendered.get(option)
+        state = '尚未產生' if result is None else f"{_when(result['generated_at'])}（{result['seconds']} s）"
+        if result and result['error']:
+            state += ' ⚠️ 失敗'
+        rows.append(f'<tr><td><a href="/report/{slug}">{html.escape(title)}</a></td>'
+                    f'<td><a href="/report/{slug}.json">JSON</a></td><td>{state}</td></tr>')
+    status = dashboard.status()
+    datasets_rows = ''.join(
+        f"<tr><td>{d['name']}</td><td>{d['size']}</td><td>{d['age_seconds']} s</td><td>{d['refresh_seconds']} s</td></tr>"
+        for d in status['datasets']
+    )
+    body = (f"<h1>📦 AWS 資源總覽</h1><table><tr><th>報表</th><th></th><th>產生時間</th></tr>{''.join(rows)}</table>"
+            f"<h2>🗂️ 資料集</h2><table><tr><th>名稱</th><th>筆數</th><th>已載入</th><th>更新間隔</th></tr>{datasets_rows}</table>"
+            f"<p>啟動於 {_when(status['started'])}，AWS API 呼叫 {status['api_calls']} 次 | "
+            f'<a href="/status.json">status.json</a></p>')
+    return _PAGE.format(title='AWS Dashboard', body=body)
+
+def report_page(result):
+    error = f"<p>⚠️ {html.escape(result['error'])}</p>" if result['error'] else ''
+    body = (f"<h1>{html.escape(result['title'])}</h1>"
+            f"<p>產生時間 {_when(result['generated_at'])}（{result['seconds']} s）| "
+            f"<a href=\"/report/{result['report']}.json\">JSON</a></p>{error}<pre>{html.escape(result['text'])}</pre>")
+    return _PAGE.format(title=html.escape(result['title']), body=body)
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    dashboard = None
+    _options_by_slug = {slug: option for option, (slug, *_) in REPORTS.items()}
+
+    def do_GET(self):
+        path = urlparse(self.path).path.rstrip('/') or '/'
+        if path == '/':
+            return self._send(200, 'text/html', index_page(self.dashboard))
+        if path == '/status.json':
+            return self._send_json(self.dashboard.status())
+        if path.startswith('/report/'):
+            slug = path[len('/report/'):]
+            as_json = slug.endswith('.json')
+            option = self._options_by_slug.get(slug[:-len('.json')] if as_json else slug)
+            if option is not None:
+                result = self.dashboard.report(option)
+                if as_json:
+                    return self._send_json({k: v for k, v in result.items() if k != 'text'})
+                return self._send(200, 'text/html', report_page(result))
+        self._send(404, 'text/plain', 'not found')
+
+    def _send_json(self, data):
+        self._send(200, 'application/json', json.dumps(data, ensure_ascii=False, default=str))
+
+    def _send(self, status, content_type, text):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown the refresh messages
+
+def serve(host=SERVE_HOST, port=SERVE_PORT):
+    # each request/refresh thread prints its report into its own buffer
+    install_stdout_router()
+    dashboard = Dashboard()
+    DashboardHandler.dashboard = dashboard
+    server = ThreadingHTTPServer((host, port), DashboardHandler)
+    server.daemon_threads = True
+    dashboard.start()
+    print(f"🌐 儀表板：http://{host}:{port}/（Ctrl+C 結束）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 儀表板已關閉")
+    finally:
+        dashboard.stop()
+        server.server_close()
@@ -0,0 +1,252 @@
+# sg_exposure.py
+"""Security-group exposure: which EC2 instances, RDS databases and load balancers a
+CIDR can reach on a port, either directly or by first reaching hosts in a group that
+another group allows traffic from (UserIdGroupPairs, followed transitively).
+
+Inbound rules are flattened once into parallel integer columns (group, protocol,
+port range, source address range), so a query is one pass over the columns
+instead of a walk through the nested IpPermissions of every group.
+"""
+import ipaddress
+import time
+from array import array
+from collections import defaultdict, deque
+from aws_session import SG_EXPOSURE_PORTS
+from output import emit
+from Model1 import collect_vpc_report
+import datasets
+import render
+
+INTERNET = ('0.0.0.0/0', '::/0')
+
+_PROTOCOLS = {'-1': -1, 'all': -1, 'tcp': 6, 'udp': 17, 'icmp': 1, 'icmpv6': 58}
+
+_KIND_ICONS = {'instance': '🖥️', 'rds': '🗃️', 'alb': '🧩', 'nlb': '🔀'}
+
+def protocol_code(protocol):
+    text = str(protocol).lower()
+    return _PROTOCOLS[text] if text in _PROTOCOLS else int(text)
+
+def address_range(cidr):
+    """(IP version, first address, last address) of a CIDR as integers."""
+    network = ipaddress.ip_network(cidr.strip(), strict=False)
+    return network.version, int(network.network_address), int(network.broadcast_address)
+
+def _port_range(perm, protocol):
+    if protocol not in (6, 17) or perm.get('FromPort') in (None, -1):
+        return 0, 65535
+    return perm['FromPort'], perm['ToPort']
+
+def collect_resources(report):
+    """Resources that accept inbound traffic, with the security groups attached to them."""
+    for instance in report['instances']:
+        yield {'kind': 'instance', 'id': instance.instance_id, 'name': instance.name,
+               'public': bool(instance.public_ip),
+               'groups': sorted({g for eni in instance.interfaces for g in eni.group_ids})}
+    for dbs in report['rds_by_vpc'].values():
+        for db in dbs:
+            yield {'kind': 'rds', 'id': db['DBInstanceIdentifier'], 'name': db.get('Engine', 'N/A'),
+                   'public': bool(db.get('PubliclyAccessible')),
+                   'groups': [sg['VpcSecurityGroupId'] for sg in db.get('VpcSecurityGroups', [])]}
+    for lb in report['load_balancers']:
+        if lb.get('SecurityGroups'):
+            yield {'kind': 'alb' if lb['Type'] == 'application' else 'nlb', 'id': lb['LoadBalancerName'],
+                   'name': lb['DNSName'], 'public': lb.get('Scheme') == 'internet-facing',
+                   'groups': lb['SecurityGroups']}
+
+class ExposureIndex:
+    """Inbound rules of every security group as integer columns, plus group membership.
+
+    Groups and resources are numbered; CIDR rules hold one row per (permission,
+    address range) and group references one row per (permission, source group).
+    Prefix-list sources are not resolved.
+    """
+
+    def __init__(self, sg_index, resources):
+        self.group_ids = []
+        self._group_pos = {}
+        self.cidr_group = array('l')
+        self.cidr_protocol = array('h')
+        self.cidr_from = array('l')
+        self.cidr_to = array('l')
+        self.cidr_version = array('b')
+        # IPv6 addresses do not fit any array type
+        self.cidr_first = []
+        self.cidr_last = []
+        self.cidr_source = []
+        self.ref_group = array('l')
+        self.ref_protocol = array('h')
+        self.ref_from = array('l')
+        self.ref_to = array('l')
+        self.ref_source = array('l')
+        self.refs_from = defaultdict(list)
+        self.resources = []
+        self.members = defaultdict(list)
+        for sg in sg_index.values():
+            self._add_rules(sg)
+        for resource in resources:
+            position = len(self.resources)
+            self.resources.append(resource)
+            for sg_id in resource['groups']:
+                self.members[self._group(sg_id)].append(position)
+
+    def _group(self, sg_id):
+        position = self._group_pos.get(sg_id)
+        if position is None:
+            position = self._group_pos[sg_id] = len(self.group_ids)
+            self.group_ids.append(sg_id)
+        return position
+
+    def _add_rules(self, sg):
+        group = self._group(sg['GroupId'])
+        for perm in sg.get('IpPermissions', []):
+            protocol = protocol_code(perm.get('IpProtocol', '-1'))
+            low, high = _port_range(perm, protocol)
+            sources = [r['CidrIp'] for r in perm.get('IpRanges', [])] + \
+                      [r['CidrIpv6'] for r in perm.get('Ipv6Ranges', [])]
+            for cidr in sources:
+                version, first, last = address_range(cidr)
+                self.cidr_group.append(group)
+                self.cidr_protocol.append(protocol)
+                self.cidr_from.append(low)
+                self.cidr_to.append(high)
+                self.cidr_version.append(version)
+                self.cidr_first.append(first)
+                self.cidr_last.append(last)
+                self.cidr_source.append(cidr)
+            for pair in perm.get('UserIdGroupPairs', []):
+                if not pair.get('GroupId'):
+                    continue
+                source = self._group(pair['GroupId'])
+                self.refs_from[source].append(len(self.ref_group))
+                self.ref_group.append(group)
+                self.ref_protocol.append(protocol)
+                self.ref_from.append(low)
+                self.ref_to.append(high)
+                self.ref_source.append(source)
+
+    def rule_count(self):
+        return len(self.cidr_group) + len(self.ref_group)
+
+    def query(self, sources=INTERNET, ports=SG_EXPOSURE_PORTS, protocol='tcp'):
+        """Resources that every address of one of the `sources` CIDRs can reach on `ports`.
+
+        A host reached on one of the ports is treated as a stepping stone: groups that
+        allow traffic from its group on those ports are exposed through it. Returns
+        [{'resource', 'port', 'group_id', 'source', 'via'}] by port, direct exposure first;
+        `via` lists the stepping-stone groups (outermost first) and is empty for direct exposure.
+        """
+        wanted = [address_range(cidr) for cidr in sources]
+        code = protocol_code(protocol)
+        ports = sorted(set(ports))
+        # port -> {group: (rule source, pivot group or None)}; direct exposure first, then breadth first
+        exposed = {port: {} for port in ports}
+
+        # one pass over the address columns per source CIDR, then protocol and ports of the hits
+        hits = set()
+        for version, first, last in wanted:
+            hits.update(row for row, (rule_version, rule_first, rule_last)
+                        in enumerate(zip(self.cidr_version, self.cidr_first, self.cidr_last))
+                        if rule_first <= first and last <= rule_last and rule_version == version)
+        footholds = {}  # group -> (rule source, previous pivot)
+        for row in sorted(hits):
+            if self.cidr_protocol[row] in (-1, code):
+                group, source = self.cidr_group[row], self.cidr_source[row]
+                low, high = self.cidr_from[row], self.cidr_to[row]
+                for port in ports:
+                    if low <= port <= high:
+                        exposed[port].setdefault(group, (source, None))
+                        if group in self.members:
+                            footholds.setdefault(group, (source, None))
+
+        # members of an exposed group are reachable on a queried port; what other groups
+        # allow from those members on a queried port is exposed in turn
+        queue = deque(footholds)
+        while queue:
+            pivot = queue.popleft()
+            source = footholds[pivot][0]
+            for row in self.refs_from.get(pivot, ()):
+                if self.ref_protocol[row] not in (-1, code):
+                    continue
+                target = self.ref_group[row]
+                low, high = self.ref_from[row], self.ref_to[row]
+                reached = False
+                for port in ports:
+                    if low <= port <= high:
+                        exposed[port].setdefault(target, (source, pivot))
+                        reached = True
+                if reached and target in self.members and target not in footholds:
+                    footholds[target] = (source, pivot)
+                    queue.append(target)
+
+        findings, chains = [], {None: []}
+        for port in ports:
+            claimed = bytearray(len(self.resources))
+            for group, (source, pivot) in exposed[port].items():
+                if pivot not in chains:
+                    chains[pivot] = self._chain(footholds, pivot)
+                group_id, via = self.group_ids[group], chains[pivot]
+                for member in self.members.get(group, ()):
+                    if not claimed[member]:
+                        claimed[member] = 1
+                        findings.append({'resource': self.resources[member], 'port': port,
+                                         'group_id': group_id, 'source': source, 'via': via})
+        return findings
+
+    def _chain(self, footholds, group):
+        chain = []
+        while group is not None:
+            chain.append(self.group_ids[group])
+            group = footholds[group][1]
+        return chain[::-1]
+
+def build_exposure_index(report):
+    return ExposureIndex(report['sg_index'], collect_resources(report))
+
+def print_findings(findings, sources, ports, protocol='tcp'):
+    render.heading(f"\n🌐 可從 {', '.join(sources)} 連入的資源（{protocol} {', '.join(map(str, ports))}）:")
+    by_port = defaultdict(list)
+    for finding in findings:
+        by_port[finding['port']].append(finding)
+    for port in sorted(set(ports)):
+        port_findings = by_port.get(port, [])
+        render.heading(f"\n🚪 Port {port}：{len(port_findings)} 個資源", 2)
+        for finding in port_findings:
+            resource = finding['resource']
+            emit('sg_exposure', kind=resource['kind'], resource_id=resource['id'], name=resource['name'],
+                 public=resource['public'], port=port, protocol=protocol, group_id=finding['group_id'],
+                 source=finding['source'], via=finding['via'])
+            public = '公開' if resource['public'] else '私有'
+            via = f" | 經由 {' → '.join(finding['via'])}" if finding['via'] else ''
+            print(f"  ▶ {_KIND_ICONS[resource['kind']]} {resource['id']} ({resource['name']}) | {public} | "
+                  f"{finding['group_id']} ⬅ {finding['source']}{via}")
+
+def run_query(index, sources, ports, protocol='tcp'):
+    started = time.perf_counter()
+    findings = index.query(sources, ports, protocol)
+    elapsed = time.perf_counter() - started
+    print_findings(findings, sources, ports, protocol)
+    print(f"\n  ⏱️ 查詢 {index.rule_count()} 條規則、{len(index.resources)} 個資源：{elapsed * 1000:.1f} ms")
+    return findings
+
+@datasets.shared_datasets
+def describe_sg_exposure(max_workers=None, sources=INTERNET, ports=SG_EXPOSURE_PORTS):
+    index = build_exposure_index(datasets.get('vpc_report') if max_workers is None else collect_vpc_report(max_workers))
+    print(f"\n🧱 安全群組暴露分析：{len(index.group_ids)} 個群組、{index.rule_count()} 條規則、{len(index.resources)} 個資源")
+    run_query(index, sources, ports)
+    return index
+
+def query_exposure(index):
+    """Interactive exposure queries: a CIDR list (or 'internet'), ports and an optional protocol."""
+    while True:
+        text = input("\n🔎 輸入來源 CIDR 與 Port（例：internet 22,3389 或 203.0.113.0/24 443 udp，直接 Enter 返回）：").strip()
+        if not text:
+            return
+        parts = text.split()
+        try:
+            sources = INTERNET if parts[0] == 'internet' else tuple(parts[0].split(','))
+            ports = [int(port) for port in parts[1].split(',')] if len(parts) > 1 else SG_EXPOSURE_PORTS
+            protocol = parts[2] if len(parts) > 2 else 'tcp'
+            run_query(index, sources, ports, protocol)
+        except ValueError as e:
+            print(f"❌ 格式錯誤：{e}")
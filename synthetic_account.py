@@ -0,0 +1,478 @@
+# synthetic_account.py
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+import botocore.session
+
+# account sizes for benchmark.py --scale
+SCALES = {
+    'ci': {
+        'vpcs': 20, 'subnets_per_vpc': 3, 'instances': 1000, 'lambdas': 50, 'db_instances': 20,
+        'albs': 10, 'targets_per_alb': 5, 'buckets': 100, 'zones': 15, 'records_per_zone': 20,
+        'users': 100, 'groups': 25, 'roles': 125, 'policies': 40, 'ses_identities': 10,
+        'certificates': 20, 'distributions': 10,
+    },
+    'large': {
+        'vpcs': 500, 'subnets_per_vpc': 4, 'instances': 20000, 'lambdas': 1000, 'db_instances': 500,
+        'albs': 200, 'targets_per_alb': 10, 'buckets': 2000, 'zones': 300, 'records_per_zone': 50,
+        'users': 2000, 'groups': 500, 'roles': 2500, 'policies': 500, 'ses_identities': 200,
+        'certificates': 200, 'distributions': 100,
+    },
+}
+
+REGIONS = ('us-east-1', 'eu-west-1', 'ap-northeast-1')
+ACCOUNT_ID = '123456789012'
+
+class ApiError(Exception):
+    def __init__(self, code, status=400, message=''):
+        super().__init__(code)
+        self.code = code
+        self.status = status
+        self.message = message or code
+
+class _StubHttp:
+    """Minimal HTTP response for a before-call short circuit."""
+    headers = {}
+    raw = None
+    content = b''
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+def _policy_document(rng):
+    action = rng.choice(['*', 's3:*', 'ec2:Describe*', 'iam:*', 'logs:PutLogEvents', 'sqs:SendMessage'])
+    return {'Version': '2012-10-17', 'Statement': [{'Effect': 'Allow', 'Action': action, 'Resource': '*'}]}
+
+def _encoded(document):
+    # IAM returns URL-encoded JSON; botocore decodes it in an after-call handler
+    return quote(json.dumps(document))
+
+def _record_order(record):
+    # Route 53 lists records by name with labels reversed (apex first), then by type
+    return tuple(reversed(record['Name'].rstrip('.').split('.'))), record['Type']
+
+def _dig(data, path):
+    for part in path.split('.'):
+        data = data.get(part) if isinstance(data, dict) else None
+    return data
+
+def _put(data, path, value):
+    *parents, last = path.split('.')
+    for part in parents:
+        data = data.setdefault(part, {})
+    data[last] = value
+
+class SyntheticAccount:
+    """A generated AWS account served to botocore clients without any network calls.
+
+    install() registers a before-call handler on a boto3 session, so every client
+    created from it afterwards answers from the generated data. Pagination
+    follows botocore's paginator models, each call can be delayed by `latency`
+    seconds, and calls are counted per operation.
+    """
+
+    def __init__(self, scale, seed=0, latency=0.0):
+        self.scale = dict(scale)
+        self.latency = latency
+        self.calls = Counter()
+        self.unstubbed = Counter()
+        self._lock = threading.Lock()
+        self._paginator_models = {}
+        self._rng = random.Random(seed)
+        self._now = datetime.now(timezone.utc)
+        self._generate()
+
+    # ---- data ----
+
+    def _generate(self):
+        rng, s = self._rng, self.scale
+        self.vpcs, self.subnets, self.route_tables, self.igws, self.security_groups = [], [], [], [], []
+        subnets_by_vpc, sgs_by_vpc = defaultdict(list), defaultdict(list)
+        for v in range(s['vpcs']):
+            vpc_id = f"vpc-{v:08x}"
+            self.vpcs.append({'VpcId': vpc_id, 'CidrBlock': f"10.{v % 256}.0.0/16",
+                              'Tags': [{'Key': 'Name', 'Value': f"vpc-{v}"}]})
+            public = v % 2 == 0
+            if public:
+                self.igws.append({'InternetGatewayId': f"igw-{v:08x}",
+                                  'Attachments': [{'State': 'available', 'VpcId': vpc_id}]})
+            for n in range(s['subnets_per_vpc']):
+                subnet_id = f"subnet-{v:05x}{n:03x}"
+                subnets_by_vpc[vpc_id].append(subnet_id)
+                self.subnets.append({'SubnetId': subnet_id, 'VpcId': vpc_id, 'CidrBlock': f"10.{v % 256}.{n}.0/24",
+                                     'AvailabilityZone': f"us-east-1{'abc'[n % 3]}",
+                                     'Tags': [{'Key': 'Name', 'Value': f"subnet-{v}-{n}"}]})
+                gateway = f"igw-{v:08x}" if public and n == 0 else f"nat-{v:08x}"
+                self.route_tables.append({
+                    'RouteTableId': f"rtb-{v:05x}{n:03x}",
+                    'Routes': [{'DestinationCidrBlock': '10.0.0.0/8', 'GatewayId': 'local'},
+                               {'DestinationCidrBlock': '0.0.0.0/0',
+                                **({'GatewayId': gateway} if gateway.startswith('igw-') else {'NatGatewayId': gateway})}],
+                    'Associations': [{'SubnetId': subnet_id}],
+                })
+            for g in range(4):
+                sg_id = f"sg-{v:05x}{g:03x}"
+                sgs_by_vpc[vpc_id].append(sg_id)
+                self.security_groups.append({
+                    'GroupId': sg_id, 'GroupName': f"sg-{v}-{g}", 'VpcId': vpc_id,
+                    'IpPermissions': [
+                        {'IpProtocol': 'tcp', 'FromPort': 443, 'ToPort': 443, 'IpRanges': [{'CidrIp': '0.0.0.0/0'}]},
+                        {'IpProtocol': 'tcp', 'FromPort': 22, 'ToPort': 22, 'IpRanges': [{'CidrIp': '10.0.0.0/8'}],
+                         'UserIdGroupPairs': [{'GroupId': f"sg-{v:05x}{(g + 1) % 4:03x}"}]},
+                    ],
+                })
+                # a few groups open admin/database ports to the world (security-group exposure report)
+                permissions = self.security_groups[-1]['IpPermissions']
+                if g == 3 and v % 5 == 0:
+                    permissions.append({'IpProtocol': 'tcp', 'FromPort': 22, 'ToPort': 22,
+                                        'IpRanges': [{'CidrIp': '0.0.0.0/0'}]})
+                if g == 2 and v % 7 == 0:
+                    permissions.append({'IpProtocol': 'tcp', 'FromPort': 3389, 'ToPort': 3389,
+                                        'Ipv6Ranges': [{'CidrIpv6': '::/0'}]})
+                if g == 0:
+                    permissions.append({'IpProtocol': 'tcp', 'FromPort': 5432, 'ToPort': 5432,
+                                        'UserIdGroupPairs': [{'GroupId': f"sg-{v:05x}{3:03x}"}]})
+
+        self.instances = []
+        instances_by_vpc = defaultdict(list)
+        for i in range(s['instances']):
+            vpc_id = rng.choice(self.vpcs)['VpcId']
+            subnet_id = rng.choice(subnets_by_vpc[vpc_id])
+            private_ip = f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+            instance = {
+                'InstanceId': f"i-{i:017x}", 'PrivateIpAddress': private_ip,
+                'Tags': [{'Key': 'Name', 'Value': f"web-{i}"}],
+                'NetworkInterfaces': [{'VpcId': vpc_id, 'SubnetId': subnet_id,
+                                       'Groups': [{'GroupId': g} for g in rng.sample(sgs_by_vpc[vpc_id], 2)],
+                                       'PrivateIpAddresses': [{'PrivateIpAddress': private_ip}]}],
+            }
+            if i % 3 == 0:
+                instance['PublicIpAddress'] = f"54.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+            if i % 2 == 0:
+                instance['IamInstanceProfile'] = {'Arn': f"arn:aws:iam::{ACCOUNT_ID}:instance-profile/app-{i % 50}"}
+            self.instances.append(instance)
+            instances_by_vpc[vpc_id].append(instance)
+
+        self.functions = []
+        for f in range(s['lambdas']):
+            function = {'FunctionName': f"fn-{f}", 'FunctionArn': f"arn:aws:lambda:us-east-1:{ACCOUNT_ID}:function:fn-{f}",
+                        'Runtime': 'python3.12', 'Timeout': 30, 'Role': f"arn:aws:iam::{ACCOUNT_ID}:role/role-{f % 100}"}
+            if f % 2 == 0:
+                vpc_id = rng.choice(self.vpcs)['VpcId']
+                function['VpcConfig'] = {'VpcId': vpc_id, 'SubnetIds': subnets_by_vpc[vpc_id][:2],
+                                         'SecurityGroupIds': sgs_by_vpc[vpc_id][:1]}
+            self.functions.append(function)
+
+        self.db_instances = []
+        for d in range(s['db_instances']):
+            vpc_id = rng.choice(self.vpcs)['VpcId']
+            self.db_instances.append({
+                'DBInstanceIdentifier': f"db-{d}", 'Engine': 'postgres', 'DBInstanceClass': 'db.t3.medium',
+                'PubliclyAccessible': d % 10 == 0, 'IAMDatabaseAuthenticationEnabled': d % 3 == 0,
+                'DBSubnetGroup': {'DBSubnetGroupName': f"dbsg-{d}", 'VpcId': vpc_id,
+                                  'Subnets': [{'SubnetIdentifier': sn} for sn in subnets_by_vpc[vpc_id][:2]]},
+                'VpcSecurityGroups': [{'VpcSecurityGroupId': sgs_by_vpc[vpc_id][0]}],
+            })
+
+        self.load_balancers, self.listeners, self.target_groups, self.target_health = [], {}, {}, {}
+        for a in range(s['albs']):
+            vpc_id = rng.choice(self.vpcs)['VpcId']
+            arn = f"arn:aws:elasticloadbalancing:us-east-1:{ACCOUNT_ID}:loadbalancer/app/alb-{a}/{a:016x}"
+            tg_arn = f"arn:aws:elasticloadbalancing:us-east-1:{ACCOUNT_ID}:targetgroup/tg-{a}/{a:016x}"
+            self.load_balancers.append({
+                'LoadBalancerArn': arn, 'LoadBalancerName': f"alb-{a}", 'Type': 'application', 'VpcId': vpc_id,
+                'Scheme': 'internet-facing', 'DNSName': f"alb-{a}-{a:08x}.us-east-1.elb.amazonaws.com",
+                'AvailabilityZones': [{'SubnetId': sn} for sn in subnets_by_vpc[vpc_id][:2]],
+                'SecurityGroups': sgs_by_vpc[vpc_id][:1],
+            })
+            forward = [{'Type': 'forward', 'TargetGroupArn': tg_arn}]
+            self.listeners[arn] = [
+                {'Port': 80, 'Protocol': 'HTTP', 'DefaultActions': forward},
+                {'Port': 443, 'Protocol': 'HTTPS', 'DefaultActions': forward,
+                 'Certificates': [{'CertificateArn': f"arn:aws:acm:us-east-1:{ACCOUNT_ID}:certificate/{a:08x}"}]},
+            ]
+            self.target_groups[tg_arn] = {'TargetGroupArn': tg_arn, 'TargetGroupName': f"tg-{a}", 'TargetType': 'instance',
+                                          'Protocol': 'HTTP', 'Port': 80, 'VpcId': vpc_id, 'LoadBalancerArns': [arn]}
+            self.target_health[tg_arn] = [
+                {'Target': {'Id': instance['InstanceId'], 'Port': 80}, 'TargetHealth': {'State': 'healthy'}}
+                for instance in instances_by_vpc[vpc_id][:s['targets_per_alb']]
+            ]
+
+        self.buckets, self.bucket_regions, self.bucket_policies = [], {}, {}
+        for b in range(s['buckets']):
+            name = f"bucket-{b:05d}"
+            self.buckets.append({'Name': name, 'CreationDate': self._now - timedelta(days=b % 900)})
+            self.bucket_regions[name] = REGIONS[b % len(REGIONS)]
+            if b % 2 == 0:
+                self.bucket_policies[name] = json.dumps(_policy_document(rng))
+
+        alb_dns = [lb['DNSName'] for lb in self.load_balancers]
+        self.zones, self.records = [], {}
+        for z in range(s['zones']):
+            zone_id, zone_name = f"Z{z:012d}", f"zone{z}.example.com."
+            self.zones.append({'Id': f"/hostedzone/{zone_id}", 'Name': zone_name, 'CallerReference': str(z),
+                               'ResourceRecordSetCount': s['records_per_zone']})
+            records = [
+                {'Name': zone_name, 'Type': 'SOA', 'TTL': 900,
+                 'ResourceRecords': [{'Value': f"ns-1.awsdns-00.com. hostmaster.example.com. {z} 7200 900 1209600 86400"}]},
+            ]
+            for r in range(s['records_per_zone'] - 1):
+                name = f"host{r}.{zone_name}"
+                if r % 5 == 0 and alb_dns:
+                    # some aliases point at ALBs that no longer exist
+                    target = rng.choice(alb_dns) if r % 15 else f"gone-{z}-{r}.us-east-1.elb.amazonaws.com"
+                    records.append({'Name': name, 'Type': 'A', 'AliasTarget': {
+                        'DNSName': f"dualstack.{target}.", 'HostedZoneId': 'Z35SXDOTRQ7X7K', 'EvaluateTargetHealth': False}})
+                elif r % 5 == 1:
+                    records.append({'Name': name, 'Type': 'CNAME', 'TTL': 300, 'ResourceRecords': [{'Value': f"www.{zone_name}"}]})
+                else:
+                    records.append({'Name': name, 'Type': 'A', 'TTL': 300, 'ResourceRecords': [{'Value': f"192.0.2.{r % 256}"}]})
+            self.records[zone_id] = sorted(records, key=_record_order)
+
+        self.policies = []
+        for p in range(s['policies']):
+            arn = f"arn:aws:iam::{ACCOUNT_ID}:policy/custom-{p}"
+            self.policies.append({'PolicyName': f"custom-{p}", 'Arn': arn, 'DefaultVersionId': 'v1',
+                                  'PolicyVersionList': [{'VersionId': 'v1', 'IsDefaultVersion': True,
+                                                         'Document': _encoded(_policy_document(rng))}]})
+        attachable = [{'PolicyName': p['PolicyName'], 'PolicyArn': p['Arn']} for p in self.policies] or [
+            {'PolicyName': 'ReadOnlyAccess', 'PolicyArn': 'arn:aws:iam::aws:policy/ReadOnlyAccess'}]
+        self.groups = [{'GroupName': f"group-{g}", 'AttachedManagedPolicies': rng.sample(attachable, min(2, len(attachable)))}
+                       for g in range(s['groups'])]
+        self.users = [{'UserName': f"user-{u}", 'AttachedManagedPolicies': rng.sample(attachable, min(u % 3, len(attachable))),
+                       'GroupList': [g['GroupName'] for g in rng.sample(self.groups, min(u % 3, len(self.groups)))]}
+                      for u in range(s['users'])]
+        self.roles = [{'RoleName': f"role-{r}", 'AttachedManagedPolicies': rng.sample(attachable, min(1 + r % 2, len(attachable)))}
+                      for r in range(s['roles'])]
+
+        self.identities = [f"sender{i}@example.com" if i % 2 else f"mail{i}.example.com" for i in range(s['ses_identities'])]
+        self.identity_policies = {
+            identity: {'send': json.dumps({'Version': '2012-10-17', 'Statement': [
+                {'Effect': 'Allow', 'Principal': {'AWS': ACCOUNT_ID}, 'Action': 'ses:SendEmail', 'Resource': '*'}]})}
+            for identity in self.identities[::3]
+        }
+
+        self.certificates = {}
+        for c in range(s['certificates']):
+            arn = f"arn:aws:acm:us-east-1:{ACCOUNT_ID}:certificate/{c:08x}"
+            self.certificates[arn] = {
+                'CertificateArn': arn, 'DomainName': f"app{c}.example.com",
+                'SubjectAlternativeNames': [f"app{c}.example.com", f"*.app{c}.example.com"],
+                'Status': 'PENDING_VALIDATION' if c % 25 == 0 else 'EXPIRED' if c * 37 % 400 < 30 else 'ISSUED',
+                'NotAfter': self._now + timedelta(days=c * 37 % 400 - 30),
+                'RenewalEligibility': 'ELIGIBLE' if c % 3 else 'INELIGIBLE',
+                'InUseBy': [self.load_balancers[c % len(self.load_balancers)]['LoadBalancerArn']] if self.load_balancers and c % 2 else [],
+            }
+        self.distributions = [{
+            'Id': f"E{d:012X}", 'DomainName': f"d{d:012x}.cloudfront.net",
+            'Aliases': {'Quantity': 1, 'Items': [f"cdn{d}.example.com"]},
+            'Origins': {'Quantity': 1, 'Items': [{'Id': 'origin', 'DomainName': f"bucket-{d:05d}.s3.amazonaws.com"}]},
+            'ViewerCertificate': {'ACMCertificateArn': f"arn:aws:acm:us-east-1:{ACCOUNT_ID}:certificate/{d:08x}"},
+        } for d in range(s['distributions'])]
+
+    # ---- operations ----
+
+    def _bucket(self, params):
+        name = params['Bucket']
+        if name not in self.bucket_regions:
+            raise ApiError('NoSuchBucket', 404)
+        return name
+
+    def respond(self, service, operation, params, region):
+        """Unpaged response for one call, or ApiError."""
+        if (service, operation) == ('ec2', 'DescribeVpcs'):
+            return {'Vpcs': self.vpcs}
+        if (service, operation) == ('ec2', 'DescribeInternetGateways'):
+            return {'InternetGateways': self.igws}
+        if (service, operation) == ('ec2', 'DescribeRouteTables'):
+            return {'RouteTables': self.route_tables}
+        if (service, operation) == ('ec2', 'DescribeSubnets'):
+            vpc_ids = {v for f in params.get('Filters', []) if f['Name'] == 'vpc-id' for v in f['Values']}
+            return {'Subnets': [sn for sn in self.subnets if not vpc_ids or sn['VpcId'] in vpc_ids]}
+        if (service, operation) == ('ec2', 'DescribeSecurityGroups'):
+            group_ids = set(params.get('GroupIds', []))
+            return {'SecurityGroups': [sg for sg in self.security_groups if not group_ids or sg['GroupId'] in group_ids]}
+        if (service, operation) == ('ec2', 'DescribeInstances'):
+            # five instances per reservation, as launched in batches
+            return {'Reservations': [{'ReservationId': f"r-{i:017x}", 'Instances': self.instances[i:i + 5]}
+                                     for i in range(0, len(self.instances), 5)]}
+        if (service, operation) == ('lambda', 'ListFunctions'):
+            return {'Functions': self.functions}
+        if (service, operation) == ('rds', 'DescribeDBInstances'):
+            return {'DBInstances': self.db_instances}
+        if (service, operation) == ('elbv2', 'DescribeLoadBalancers'):
+            return {'LoadBalancers': self.load_balancers}
+        if (service, operation) == ('elbv2', 'DescribeListeners'):
+            return {'Listeners': self.listeners.get(params.get('LoadBalancerArn'), [])}
+        if (service, operation) == ('elbv2', 'DescribeTargetGroups'):
+            if 'TargetGroupArns' in params:
+                return {'TargetGroups': [self.target_groups[arn] for arn in params['TargetGroupArns'] if arn in self.target_groups]}
+            lb_arn = params.get('LoadBalancerArn')
+            return {'TargetGroups': [tg for tg in self.target_groups.values() if not lb_arn or lb_arn in tg['LoadBalancerArns']]}
+        if (service, operation) == ('elbv2', 'DescribeTargetHealth'):
+            return {'TargetHealthDescriptions': self.target_health.get(params['TargetGroupArn'], [])}
+
+        if (service, operation) == ('iam', 'GetAccountAuthorizationDetails'):
+            return {'UserDetailList': self.users, 'GroupDetailList': self.groups,
+                    'RoleDetailList': self.roles, 'Policies': self.policies}
+        if (service, operation) == ('iam', 'GetPolicy'):
+            return {'Policy': {'Arn': params['PolicyArn'], 'DefaultVersionId': 'v1'}}
+        if (service, operation) == ('iam', 'GetPolicyVersion'):
+            return {'PolicyVersion': {'VersionId': 'v1', 'IsDefaultVersion': True,
+                                      'Document': _encoded({'Version': '2012-10-17', 'Statement': []})}}
+        if (service, operation) == ('sts', 'GetCallerIdentity'):
+            return {'Account': ACCOUNT_ID, 'Arn': f"arn:aws:iam::{ACCOUNT_ID}:user/benchmark", 'UserId': 'AIDA'}
+
+        if (service, operation) == ('ses', 'ListIdentities'):
+            return {'Identities': self.identities}
+        if (service, operation) == ('ses', 'ListIdentityPolicies'):
+            return {'PolicyNames': list(self.identity_policies.get(params['Identity'], {}))}
+        if (service, operation) == ('ses', 'GetIdentityVerificationAttributes'):
+            return {'VerificationAttributes': {
+                identity: {'VerificationStatus': 'Success' if i % 7 else 'Pending'}
+                for i, identity in enumerate(self.identities) if identity in set(params['Identities'])
+            }}
+        if (service, operation) == ('ses', 'GetIdentityPolicies'):
+            policies = self.identity_policies.get(params['Identity'], {})
+            return {'Policies': {name: policies[name] for name in params['PolicyNames'] if name in policies}}
+
+        if (service, operation) == ('s3', 'ListBuckets'):
+            return {'Buckets': self.buckets, 'Owner': {'ID': 'owner'}}
+        if (service, operation) == ('s3', 'GetBucketLocation'):
+            region_name = self.bucket_regions[self._bucket(params)]
+            # S3 still reports the legacy constraints: none for us-east-1, 'EU' for eu-west-1
+            return {'LocationConstraint': {'us-east-1': None, 'eu-west-1': 'EU'}.get(region_name, region_name)}
+        if (service, operation) == ('s3', 'GetBucketPolicy'):
+            policy = self.bucket_policies.get(self._bucket(params))
+            if policy is None:
+                raise ApiError('NoSuchBucketPolicy', 404, 'The bucket policy does not exist')
+            return {'Policy': policy}
+        if (service, operation) == ('s3', 'GetBucketPolicyStatus'):
+            return {'PolicyStatus': {'IsPublic': int(self._bucket(params)[-5:]) % 20 == 0}}
+        if (service, operation) == ('s3', 'GetBucketEncryption'):
+            if int(self._bucket(params)[-5:]) % 5 == 0:
+                raise ApiError('ServerSideEncryptionConfigurationNotFoundError', 404)
+            return {'ServerSideEncryptionConfiguration': {'Rules': [{'ApplyServerSideEncryptionByDefault': {'SSEAlgorithm': 'AES256'}}]}}
+        if (service, operation) == ('s3', 'GetBucketLogging'):
+            name = self._bucket(params)
+            return {'LoggingEnabled': {'TargetBucket': 'bucket-logs', 'TargetPrefix': name}} if int(name[-5:]) % 4 == 0 else {}
+        if (service, operation) == ('s3', 'ListBucketInventoryConfigurations'):
+            self._bucket(params)
+            return {'IsTruncated': False}
+        if (service, operation) == ('cloudwatch', 'ListMetrics'):
+            return {'Metrics': [
+                {'Namespace': 'AWS/S3', 'MetricName': params['MetricName'],
+                 'Dimensions': [{'Name': 'BucketName', 'Value': name},
+                                {'Name': 'StorageType', 'Value': 'StandardStorage' if params['MetricName'] == 'BucketSizeBytes' else 'AllStorageTypes'}]}
+                for name, bucket_region in self.bucket_regions.items() if bucket_region == region
+            ]}
+        if (service, operation) == ('cloudwatch', 'GetMetricData'):
+            results = []
+            for query in params['MetricDataQueries']:
+                metric = query['MetricStat']['Metric']
+                bucket = next(d['Value'] for d in metric['Dimensions'] if d['Name'] == 'BucketName')
+                value = int(bucket[-5:]) * (1000 if metric['MetricName'] == 'NumberOfObjects' else 1048576)
+                results.append({'Id': query['Id'], 'Values': [float(value)], 'Timestamps': [self._now - timedelta(days=1)],
+                                'StatusCode': 'Complete'})
+            return {'MetricDataResults': results}
+
+        if (service, operation) == ('route53', 'ListHostedZones'):
+            return {'HostedZones': self.zones, 'IsTruncated': False, 'MaxItems': '100'}
+        if (service, operation) == ('route53', 'GetHostedZone'):
+            zone = next((z for z in self.zones if z['Id'].endswith('/' + params['Id'].split('/')[-1])), None)
+            if zone is None:
+                raise ApiError('NoSuchHostedZone', 404)
+            return {'HostedZone': zone}
+        if (service, operation) == ('route53', 'ListResourceRecordSets'):
+            records = self.records.get(params['HostedZoneId'].split('/')[-1])
+            if records is None:
+                raise ApiError('NoSuchHostedZone', 404)
+            start_name = params.get('StartRecordName')
+            if start_name and not start_name.isdigit():
+                start = _record_order({'Name': start_name, 'Type': params.get('StartRecordType', '')})
+                records = [rec for rec in records if _record_order(rec) >= start]
+            return {'ResourceRecordSets': records, 'IsTruncated': False, 'MaxItems': '300'}
+        if (service, operation) == ('cloudfront', 'ListDistributions'):
+            return {'DistributionList': {'Items': self.distributions, 'Quantity': len(self.distributions),
+                                         'Marker': '', 'MaxItems': 100, 'IsTruncated': False}}
+        if (service, operation) == ('acm', 'ListCertificates'):
+            statuses = set(params.get('CertificateStatuses') or ['ISSUED', 'EXPIRED'])
+            return {'CertificateSummaryList': [
+                {'CertificateArn': arn, 'DomainName': cert['DomainName'], 'Status': cert['Status'],
+                 'NotAfter': cert['NotAfter'], 'InUse': bool(cert['InUseBy'])}
+                for arn, cert in self.certificates.items() if cert['Status'] in statuses
+            ]}
+        if (service, operation) == ('acm', 'DescribeCertificate'):
+            cert = self.certificates.get(params['CertificateArn'])
+            if cert is None:
+                raise ApiError('ResourceNotFoundException')
+            return {'Certificate': cert}
+
+        self.unstubbed[f"{service}.{operation}"] += 1
+        return {}
+
+    # ---- botocore plumbing ----
+
+    def _paginator(self, service, operation):
+        if service not in self._paginator_models:
+            try:
+                self._paginator_models[service] = botocore.session.get_session().get_paginator_model(service)
+            except Exception:
+                self._paginator_models[service] = None
+        model = self._paginator_models[service]
+        try:
+            return model.get_paginator(operation) if model else None
+        except ValueError:
+            return None
+
+    def _page(self, service, operation, params, response):
+        config = self._paginator(service, operation)
+        if not config:
+            return response
+        input_tokens = config['input_token'] if isinstance(config['input_token'], list) else [config['input_token']]
+        output_tokens = config['output_token'] if isinstance(config['output_token'], list) else [config['output_token']]
+        result_keys = config['result_key'] if isinstance(config['result_key'], list) else [config['result_key']]
+        token = params.get(input_tokens[0])
+        start = int(token) if token and str(token).isdigit() else 0
+        size = int(params.get(config.get('limit_key'), 0) or 100)
+
+        more = False
+        for key in result_keys:
+            items = _dig(response, key)
+            if isinstance(items, list):
+                _put(response, key, items[start:start + size])
+                more = more or len(items) > start + size
+        if more:
+            # the first token carries the offset; the rest only need to be present
+            for i, output_token in enumerate(output_tokens):
+                _put(response, output_token.split(' ')[0], str(start + size) if i == 0 else 'next')
+        if config.get('more_results'):
+            _put(response, config['more_results'], more)
+        return response
+
+    def install(self, session):
+        """Answer every client later created from this boto3 session from the synthetic account."""
+
+        def capture(params, context, **kwargs):
+            context['synthetic_params'] = dict(params)
+
+        def answer(model, context, **kwargs):
+            service, operation = model.service_model.service_name, model.name
+            params = context.get('synthetic_params', {})
+            with self._lock:
+                self.calls[f"{service}.{operation}"] += 1
+            if self.latency:
+                time.sleep(self.latency)
+            try:
+                response = self._page(service, operation, params,
+                                      self.respond(service, operation, params, context.get('client_region')))
+            except ApiError as e:
+                return _StubHttp(e.status), {'Error': {'Code': e.code, 'Message': e.message}, 'ResponseMetadata': {}}
+            return _StubHttp(200), {**response, 'ResponseMetadata': {'HTTPStatusCode': 200}}
+
+        session.events.register_first('before-parameter-build.*.*', capture)
+        session.events.register('before-call.*.*', answer)
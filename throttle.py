@@ -0,0 +1,133 @@
+# throttle.py
+import threading
+import time
+from collections import Counter
+
+# error codes AWS services use for request-rate throttling
+THROTTLE_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'RequestLimitExceeded', 'RequestThrottled', 'SlowDown',
+    'PriorRequestNotComplete', 'EC2ThrottledException', 'BandwidthLimitExceeded',
+    'ProvisionedThroughputExceededException',
+}
+
+def is_throttle(response):
+    """True if a (http_response, parsed) pair from botocore is a throttling error."""
+    if not response:
+        return False
+    http_response, parsed = response
+    error = parsed.get('Error', {}) if isinstance(parsed, dict) else {}
+    return (http_response.status_code == 429 or error.get('Code') in THROTTLE_CODES
+            or 'Rate exceeded' in (error.get('Message') or ''))
+
+class AdaptiveRate:
+    """Token bucket whose rate follows AIMD: +step/s while callers are queueing, x backoff on throttles."""
+
+    def __init__(self, rate, max_rate, min_rate=0.5, step=1.0, backoff=0.7, cooldown=1.0):
+        self.rate = float(rate)
+        self.max_rate = float(max_rate)
+        self.min_rate = min_rate
+        self.step = step
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._last_cut = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Reserve one request slot and sleep until it is due; returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def on_success(self, waited):
+        # only grow while the bucket is what holds callers back, so idle services don't drift upward
+        if not waited:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.step / self.rate)
+
+    def on_throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            # requests already in flight throttle together; count them as one congestion event
+            if now - self._last_cut < self.cooldown:
+                return
+            self._last_cut = now
+            self.rate = max(self.min_rate, self.rate * self.backoff)
+
+class RequestScheduler:
+    """Paces every HTTP attempt through one AdaptiveRate per account, service and region.
+
+    Attached to clients alongside the response cache: before-send waits for a
+    slot (cache hits never get there), needs-retry feeds the outcome of each
+    attempt back into the rate. Retries and backoff themselves stay with
+    botocore's retry config.
+    """
+
+    def __init__(self, rates, default_rate, max_rate):
+        self.rates = dict(rates)
+        self.default_rate = default_rate
+        self.max_rate = max_rate
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._limiters = {}
+
+    def limiter(self, scope, service, region):
+        key = (scope, service, region)
+        with self._lock:
+            if key not in self._limiters:
+                rate = self.rates.get(service, self.default_rate)
+                self._limiters[key] = AdaptiveRate(rate, max(rate, self.max_rate))
+            return self._limiters[key]
+
+    def attach(self, client, scope):
+        """Register the scheduler on a botocore client; scope identifies the account."""
+        service = client.meta.service_model.service_name
+        limiter = self.limiter(scope, service, client.meta.region_name)
+
+        def before_send(request, **kwargs):
+            waited = limiter.acquire()
+            request.context['throttle_waited'] = request.context.get('throttle_waited', 0.0) + waited
+            self._count(service, 'requests', 1)
+            self._count(service, 'wait', waited)
+
+        def after_attempt(response, request_dict, **kwargs):
+            if is_throttle(response):
+                limiter.on_throttle()
+                self._count(service, 'throttles', 1)
+            elif response:
+                limiter.on_success(request_dict['context'].get('throttle_waited'))
+
+        events = client.meta.events
+        events.register('before-send.*.*', before_send)
+        events.register('needs-retry.*.*', after_attempt)
+
+    def _count(self, service, kind, amount):
+        with self._lock:
+            self.stats[(service, kind)] += amount
+
+    def reset_stats(self):
+        self.stats.clear()
+
+    def print_stats(self):
+        if not self.stats:
+            return
+        services = sorted({service for service, _ in self.stats})
+        throttles = sum(n for (_, kind), n in self.stats.items() if kind == 'throttles')
+        waited = sum(n for (_, kind), n in self.stats.items() if kind == 'wait')
+        print(f"\n🚦 請求排程：節流 {int(throttles)} 次 | 等待 {waited:.1f} s")
+        with self._lock:
+            limiters = list(self._limiters.items())
+        for service in services:
+            rates = [l.rate for (_, s, _), l in limiters if s == service]
+            print(f"  ▶ {service}: 請求 {int(self.stats[(service, 'requests')])} | "
+                  f"節流 {int(self.stats[(service, 'throttles')])} | 等待 {self.stats[(service, 'wait')]:.1f} s | "
+                  f"目前速率 {max(rates, default=0):.1f}/s")
@@ -0,0 +1,313 @@
+# topology.py
+"""Cross-service edge topology: domain → Route53 record → CloudFront / ALB → listener
+certificate → target group → EC2 instance or Lambda.
+
+Every resource list is fetched once and turned into hash indexes (DNS name,
+ARN, instance ID/IP), so building the graph and each query are linear in the
+number of edges instead of nested scans.
+"""
+from collections import defaultdict, Counter
+from datetime import datetime, timedelta, timezone
+from aws_session import elb_client, account_shared, iter_items, ACM_EXPIRY_DAYS
+from fanout import FanOut
+from output import emit
+from Model1 import get_all_load_balancers, build_target_index, _normalize_dns
+import datasets
+import render
+
+# record types whose values name another host or address
+_ROUTED_TYPES = {'A', 'AAAA', 'CNAME'}
+
+class TopologyGraph:
+    """Directed graph with adjacency lists in both directions; node ids are 'kind:key'."""
+
+    def __init__(self):
+        self.nodes = {}
+        self.out_edges = defaultdict(list)
+        self.in_edges = defaultdict(list)
+        self.dangling = []
+        self._edge_set = set()
+        self._by_key = {}
+
+    def add_node(self, kind, key, label=None, **attrs):
+        node_id = f"{kind}:{key}"
+        node = self.nodes.get(node_id)
+        if node is None:
+            self.nodes[node_id] = {'id': node_id, 'kind': kind, 'label': label or key, **attrs}
+            self._by_key.setdefault(key, node_id)
+        else:
+            node.update(attrs)
+        return node_id
+
+    def add_edge(self, source, target, relation):
+        if (source, target) in self._edge_set:
+            return
+        self._edge_set.add((source, target))
+        self.out_edges[source].append((target, relation))
+        self.in_edges[target].append((source, relation))
+
+    def edge_count(self):
+        return len(self._edge_set)
+
+    def walk(self, start, reverse=False):
+        """Depth-first (node_id, depth, relation) from start; each node is visited once."""
+        edges = self.in_edges if reverse else self.out_edges
+        seen = {start}
+        stack = [(start, 0, None)]
+        while stack:
+            node_id, depth, relation = stack.pop()
+            yield node_id, depth, relation
+            for neighbour, rel in reversed(edges.get(node_id, ())):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    stack.append((neighbour, depth + 1, rel))
+
+    def find(self, text):
+        """Node id for a domain name, an ARN / resource ID, or 'kind:key'."""
+        text = text.strip()
+        if text in self.nodes:
+            return text
+        domain = f"domain:{_normalize_dns(text)}"
+        if domain in self.nodes:
+            return domain
+        return self._by_key.get(text)
+
+    def serves(self, text):
+        """What answers for a domain (or any node): everything reachable downstream."""
+        start = self.find(text)
+        return list(self.walk(start)) if start else []
+
+    def impacted_by(self, text):
+        """Domains that stop working if this node (certificate, ALB, target group …) goes away."""
+        start = self.find(text)
+        if not start:
+            return []
+        return [node_id for node_id, _, _ in self.walk(start, reverse=True)
+                if self.nodes[node_id]['kind'] == 'domain']
+
+def _target_group_names(tg_arns):
+    names = {}
+    for start in range(0, len(tg_arns), 20):
+        response = elb_client.describe_target_groups(TargetGroupArns=tg_arns[start:start + 20])
+        names.update((tg['TargetGroupArn'], tg['TargetGroupName']) for tg in response['TargetGroups'])
+    return names
+
+def _action_target_groups(action):
+    if action.get('TargetGroupArn'):
+        yield action['TargetGroupArn']
+    for group in action.get('ForwardConfig', {}).get('TargetGroups', []):
+        yield group['TargetGroupArn']
+
+def collect_topology(max_workers=None):
+    """Fetch every resource the graph links, in parallel waves (listings, then listeners, then targets)."""
+    with FanOut(max_workers) as pool:
+        zones_f = pool.submit('route53', account_shared, 'hosted_zones', lambda: datasets.get('hosted_zones'))
+        distributions_f = pool.submit('cloudfront', account_shared, 'distributions', lambda: datasets.get('distributions'))
+        certificates_f = pool.submit('acm', datasets.get, 'certificates')
+        instances_f = pool.submit('ec2', datasets.get, 'instances')
+        lambdas_f = pool.submit('lambda', datasets.get, 'lambda_functions')
+        load_balancers = pool.submit('elbv2', get_all_load_balancers).result()
+
+        listeners = pool.map(
+            'elbv2',
+            lambda arn: list(iter_items(elb_client, 'describe_listeners', 'Listeners[]', LoadBalancerArn=arn)),
+            [lb['LoadBalancerArn'] for lb in load_balancers],
+        )
+        tg_arns = list(dict.fromkeys(
+            tg_arn
+            for lb_listeners in listeners.values() for listener in lb_listeners
+            for action in listener.get('DefaultActions', []) for tg_arn in _action_target_groups(action)
+        ))
+        names_f = pool.submit('elbv2', _target_group_names, tg_arns)
+        target_health = pool.map(
+            'elbv2',
+            lambda arn: elb_client.describe_target_health(TargetGroupArn=arn)['TargetHealthDescriptions'],
+            tg_arns,
+        )
+        return {
+            'region': elb_client.meta.region_name,
+            'zones': zones_f.result()['zones'],
+            'distributions': distributions_f.result(),
+            'certificates': certificates_f.result(),
+            'instances': instances_f.result(),
+            'lambdas': lambdas_f.result(),
+            'load_balancers': load_balancers,
+            'listeners': listeners,
+            'target_group_names': names_f.result(),
+            'target_health': target_health,
+        }
+
+def build_topology(data):
+    graph = TopologyGraph()
+    elb_suffix = f".{data['region']}.elb.amazonaws.com"
+
+    # hash indexes: DNS name / address / target ID → node
+    dns_index = {}
+    for lb in data['load_balancers']:
+        node_id = graph.add_node('alb', lb['LoadBalancerArn'], lb['LoadBalancerName'], dns=lb['DNSName'])
+        dns_index[_normalize_dns(lb['DNSName'])] = node_id
+    for dist in data['distributions']:
+        node_id = graph.add_node('cloudfront', dist['Id'], f"{dist['Id']} ({dist['DomainName']})")
+        dns_index[_normalize_dns(dist['DomainName'])] = node_id
+    for arn, cert in data['certificates'].items():
+        graph.add_node('cert', arn, cert.get('DomainName'), status=cert.get('Status'), not_after=cert.get('NotAfter'))
+
+    target_index = build_target_index(data['instances'], data['lambdas'])
+    for instance in data['instances']:
+        if instance.public_ip:
+            target_index.setdefault(instance.public_ip, target_index[instance.instance_id])
+
+    def target_node(target_id):
+        kind, name, resource_id, _ = target_index.get(target_id, (None, None, None, None))
+        if kind is None:
+            return graph.add_node('ip', target_id)
+        return graph.add_node(kind, resource_id, f"{name} ({resource_id})" if kind == 'instance' else name)
+
+    def link_dns(source, dns_name, relation, missing_when):
+        target = _normalize_dns(dns_name)
+        node_id = dns_index.get(target) or (f"domain:{target}" if f"domain:{target}" in graph.nodes else None)
+        if node_id is None and missing_when(target):
+            node_id = graph.add_node('missing', target)
+            graph.dangling.append((source, relation, target))
+        elif node_id is None:
+            node_id = graph.add_node('external', target)
+        graph.add_edge(source, node_id, relation)
+
+    def aws_managed(target):
+        return target.endswith(elb_suffix) or target.endswith('.cloudfront.net')
+
+    def link_certificate(source, cert_arn):
+        if f"cert:{cert_arn}" not in graph.nodes and f":acm:{data['region']}:" in cert_arn:
+            # a certificate in this region that ACM no longer lists
+            graph.dangling.append((source, 'certificate', cert_arn))
+        graph.add_edge(source, graph.add_node('cert', cert_arn, cert_arn.rsplit('/', 1)[-1]), 'certificate')
+
+    # domains first, so CNAME chains resolve to the record that answers for the next name
+    routed = []
+    for zone_id, entry in data['zones'].items():
+        for record in entry['records']:
+            if record['Type'] in _ROUTED_TYPES:
+                dns_node = graph.add_node('domain', _normalize_dns(record['Name']))
+                routed.append((zone_id, dns_node, record))
+
+    for zone_id, dns_node, record in routed:
+        key = f"{zone_id}/{record['Name']}/{record['Type']}/{record.get('SetIdentifier', '')}"
+        record_node = graph.add_node('record', key, f"{record['Name']} {record['Type']}")
+        graph.add_edge(dns_node, record_node, 'record')
+        alias = record.get('AliasTarget', {}).get('DNSName')
+        if alias:
+            link_dns(record_node, alias, 'alias', aws_managed)
+        elif record['Type'] == 'CNAME':
+            for value in record.get('ResourceRecords', []):
+                link_dns(record_node, value['Value'], 'cname', aws_managed)
+        else:
+            for value in record.get('ResourceRecords', []):
+                graph.add_edge(record_node, target_node(value['Value']), 'address')
+
+    for dist in data['distributions']:
+        dist_node = f"cloudfront:{dist['Id']}"
+        for alias in dist.get('Aliases', {}).get('Items', []):
+            graph.add_edge(graph.add_node('domain', _normalize_dns(alias)), dist_node, 'alternate domain')
+        cert_arn = dist.get('ViewerCertificate', {}).get('ACMCertificateArn')
+        if cert_arn:
+            link_certificate(dist_node, cert_arn)
+        for origin in dist.get('Origins', {}).get('Items', []):
+            link_dns(dist_node, origin['DomainName'], 'origin', lambda target: target.endswith(elb_suffix))
+
+    for lb_arn, lb_listeners in data['listeners'].items():
+        for listener in lb_listeners:
+            listener_node = graph.add_node('listener', listener.get('ListenerArn') or f"{lb_arn}:{listener['Port']}",
+                                           f"{listener.get('Protocol')}:{listener['Port']}")
+            graph.add_edge(f"alb:{lb_arn}", listener_node, 'listener')
+            for cert in listener.get('Certificates', []):
+                link_certificate(listener_node, cert['CertificateArn'])
+            for action in listener.get('DefaultActions', []):
+                for tg_arn in _action_target_groups(action):
+                    tg_node = graph.add_node('target_group', tg_arn, data['target_group_names'].get(tg_arn, tg_arn))
+                    graph.add_edge(listener_node, tg_node, 'forward')
+
+    for tg_arn, targets in data['target_health'].items():
+        for target in targets:
+            graph.add_edge(f"target_group:{tg_arn}", target_node(target['Target']['Id']), 'target')
+    return graph
+
+_KIND_ICONS = {
+    'domain': '🌐', 'record': '📄', 'cloudfront': '🚀', 'alb': '🧩', 'listener': '🔊', 'cert': '🔐',
+    'target_group': '🎯', 'instance': '🖥️', 'lambda': 'λ', 'ip': '📍', 'external': '↗️', 'missing': '❌',
+}
+
+def print_tree(graph, walked, indent='  '):
+    for node_id, depth, relation in walked:
+        node = graph.nodes[node_id]
+        via = f"[{relation}] " if relation else ''
+        print(f"{indent}{'  ' * depth}{_KIND_ICONS.get(node['kind'], '•')} {via}{node['label']}")
+
+def _fronted_domains(graph):
+    """Domains whose chain reaches a CloudFront distribution or a load balancer."""
+    for node_id, node in sorted(graph.nodes.items()):
+        if node['kind'] != 'domain' or not graph.out_edges.get(node_id):
+            continue
+        walked = list(graph.walk(node_id))
+        kinds = {graph.nodes[n]['kind'] for n, _, _ in walked}
+        if kinds & {'cloudfront', 'alb'}:
+            yield node, walked
+
+@datasets.dataset('edge_topology')
+def _load_edge_topology():
+    return collect_topology()
+
+@datasets.shared_datasets
+def describe_edge_topology(max_workers=None, expiry_days=ACM_EXPIRY_DAYS):
+    graph = build_topology(datasets.get('edge_topology') if max_workers is None else collect_topology(max_workers))
+    kinds = Counter(node['kind'] for node in graph.nodes.values())
+    print(f"\n🕸️ Edge Topology：{len(graph.nodes)} 個節點、{graph.edge_count()} 條連線")
+    print("  " + " | ".join(f"{_KIND_ICONS.get(kind, '•')} {kind}: {count}" for kind, count in sorted(kinds.items())))
+
+    render.heading("\n🔗 網域 → 前端 → 憑證 → 目標:")
+    for node, walked in _fronted_domains(graph):
+        reached = [graph.nodes[n] for n, _, _ in walked]
+        emit('topology_path', domain=node['label'],
+             fronts=[n['label'] for n in reached if n['kind'] in ('cloudfront', 'alb')],
+             certificates=[n['id'].split(':', 1)[1] for n in reached if n['kind'] == 'cert'],
+             targets=[n['label'] for n in reached if n['kind'] in ('instance', 'lambda', 'ip')])
+        print_tree(graph, walked)
+
+    if graph.dangling:
+        render.heading("\n⚠️ 指向不存在資源的記錄 / 設定:")
+        for source, relation, target in graph.dangling:
+            emit('topology_dangling', source=graph.nodes[source]['label'], relation=relation, target=target)
+            print(f"  ▶ {graph.nodes[source]['label']} | {relation} ➡ {target}")
+    else:
+        render.heading("\n✅ 沒有指向不存在資源的記錄。")
+
+    cutoff = datetime.now(timezone.utc) + timedelta(days=expiry_days)
+    expiring = sorted(
+        (node for node in graph.nodes.values()
+         if node['kind'] == 'cert' and node.get('status') == 'ISSUED' and node.get('not_after')
+         and node['not_after'] <= cutoff),
+        key=lambda node: node['not_after'],
+    )
+    render.heading(f"\n⏰ {expiry_days} 天內到期的憑證會影響的網域:")
+    for node in expiring:
+        domains = [graph.nodes[n]['label'] for n in graph.impacted_by(node['id'])]
+        emit('topology_cert_impact', certificate_arn=node['id'].split(':', 1)[1], domain=node['label'],
+             not_after=node['not_after'].isoformat(), impacted_domains=domains)
+        print(f"  🔐 {node['label']}（{node['not_after']:%Y-%m-%d}）➡ {', '.join(domains) if domains else '無網域使用'}")
+    if not expiring:
+        print("  ✅ 無")
+    return graph
+
+def query_topology(graph):
+    """Interactive lookups against a built graph: what serves a domain, what breaks without a resource."""
+    while True:
+        text = input("\n🔎 輸入網域、ARN 或資源 ID 查詢（直接 Enter 返回）：").strip()
+        if not text:
+            return
+        node_id = graph.find(text)
+        if node_id is None:
+            print("❌ 找不到此資源。")
+            continue
+        print(f"\n⬇️ {graph.nodes[node_id]['label']} 由以下資源提供服務:")
+        print_tree(graph, graph.serves(node_id))
+        domains = [graph.nodes[n]['label'] for n in graph.impacted_by(node_id)]
+        print(f"\n⬆️ 若此資源失效，受影響的網域: {', '.join(domains) if domains else '無'}")